@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for oversized and invalid webhook bodies.
+
+Streams bodies of growing size, in 64KB chunks and without a Content-Length
+so they cannot be rejected up front, and measures the peak memory of reading
+them. `request.body()` holds the whole body before anything can be checked;
+`read_body` stops at the size limit, and validates larger bodies as they
+stream, so a body that is oversized, or does not match the event schema near
+its start, is rejected with the same memory whatever its size. A body invalid
+only at its end has been read up to the limit when it is rejected.
+
+Usage:
+    python benchmarks/body_memory.py [SIZES_MB...]
+"""
+import asyncio
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Coroutine, Dict, Iterator, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from starlette.requests import Request
+
+from eyos.models import NewStoreEvent
+from eyos.services.request_body import read_body
+from eyos.utils.json_stream import schema_for_model
+
+CHUNK_SIZE = 64 * 1024
+LIMIT = 1024 * 1024
+STREAM_THRESHOLD = 256 * 1024
+
+
+def _chunks(size: int, field: bytes) -> Iterator[bytes]:
+    """Generate a JSON object of about `size` bytes, a field holding a long list of strings."""
+    filler = (b'"' + b"x" * 61 + b'",') * (CHUNK_SIZE // 64)
+    yield b'{"' + field + b'":['
+    for _ in range(size // CHUNK_SIZE):
+        # A server receives every chunk into a new buffer
+        yield bytes(bytearray(filler))
+    yield b'""]}'
+
+
+
+def _request(size: int, field: bytes) -> Request:
+    chunks = _chunks(size, field)
+
+    async def receive() -> Dict[str, Any]:
+        chunk = next(chunks, b"")
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunk)}
+
+    return Request({"type": "http", "method": "POST", "headers": []}, receive)
+
+
+async def _plain(request: Request) -> None:
+    body = await request.body()
+    if len(body) > LIMIT:
+        raise ValueError("Too large")
+
+
+async def _limited(request: Request, limit: int) -> None:
+    await read_body(request, "benchmark", limit, STREAM_THRESHOLD, schema_for_model(NewStoreEvent))
+
+
+def _reject(read: Callable[[Request], Coroutine[Any, Any, None]], request: Request) -> None:
+    try:
+        asyncio.run(read(request))
+    except Exception:
+        return
+    raise AssertionError("The body was accepted")
+
+
+def measure(read: Callable[[Request], Coroutine[Any, Any, None]], size: int, field: bytes) -> Tuple[float, float]:
+    """
+    Measure the peak memory and time of reading and rejecting a body.
+
+    Args:
+        read: Reads the request body, raising when it is rejected
+        size: Body size in bytes
+        field: Field holding the bulk of the body
+
+    Returns:
+        Peak memory in MB, and seconds without tracing memory
+    """
+    started = time.perf_counter()
+    _reject(read, _request(size, field))
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    _reject(read, _request(size, field))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024, elapsed
+
+
+def main() -> None:
+    """Print peak memory per body size for each way of reading it."""
+    sizes: List[int] = [int(arg) for arg in sys.argv[1:]] or [1, 10, 50]
+    unlimited = 1024 * LIMIT
+    # Reader, and the field holding the bulk of the body: unknown and only missing fields
+    # are found at the end, a payload that is not an object at the start
+    readers: Dict[str, Tuple[Callable[[Request], Coroutine[Any, Any, None]], bytes]] = {
+        "request.body()": (_plain, b"padding"),
+        "read_body, over limit": (lambda request: _limited(request, LIMIT), b"padding"),
+        "read_body, invalid at end": (lambda request: _limited(request, unlimited), b"padding"),
+        "read_body, invalid at start": (lambda request: _limited(request, unlimited), b"payload"),
+    }
+
+    print(f"Peak memory and time rejecting bodies ({LIMIT // 1024}KB limit, {CHUNK_SIZE // 1024}KB chunks):")
+    for name, (read, field) in readers.items():
+        results = [measure(read, size * 1024 * 1024, field) for size in sizes]
+        cells = "  ".join(
+            f"{size:3}MB {peak:7.2f}MB {elapsed:6.3f}s" for size, (peak, elapsed) in zip(sizes, results, strict=True)
+        )
+        print(f"  {name:28} {cells}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark of transaction serialization with the compiled encoder.
+
+Compares `model_dump_json` with the compiled encoder under each omit policy,
+on transactions of increasing size. "cold" clears the encoder's cache of
+formatted amounts before every transaction, as when no amount repeats. It is
+slower than `model_dump_json` then, which `HailEncoder` uses when no field is
+left out.
+
+Usage:
+    python benchmarks/hail_encoder.py [REPEATS]
+"""
+import asyncio
+import json
+import logging
+import sys
+import timeit
+from functools import partial
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from eyos.models import HailTransaction, NewStoreEvent
+from eyos.services import hail_encoder
+from eyos.services.hail_encoder import OMIT_POLICIES, ModelEncoder, compile_encoder
+from eyos.services.transformer import transform_newstore_to_hail
+
+
+def encode_cold(encoder: ModelEncoder, transaction: HailTransaction) -> None:
+    """Encode a transaction without any cached amount."""
+    hail_encoder._float_text.clear()
+    encoder(transaction)
+
+
+def measure(operation: Callable[[], object], repeats: int) -> float:
+    """Best time of an operation in microseconds."""
+    return min(timeit.repeat(operation, number=repeats, repeat=5)) / repeats * 1e6
+
+
+def main() -> None:
+    """Print the time and size of each serialization of a transaction."""
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    # The generated lines do not add up to the sample's totals
+    logging.disable(logging.WARNING)
+    sample = json.loads((Path(__file__).parent.parent / "newstore_sample_payload.json").read_text())
+    item = sample["payload"]["items"][0]
+
+    print("Transaction serialization (us per transaction):")
+    print(f"  {'lines':>6} {'serializer':>18} {'us':>9} {'bytes':>8} {'speedup':>8}")
+    for count in (2, 10, 50, 200):
+        sample["payload"]["items"] = [
+            dict(item, id=f"item-{i}", product_id=f"SKU-{i}", list_price=round(10 + i * 0.37, 2), tax=round(2 + i * 0.07, 2))
+            for i in range(count)
+        ]
+        transaction = asyncio.run(transform_newstore_to_hail(NewStoreEvent(**sample)))
+
+        baseline = measure(transaction.model_dump_json, repeats)
+        size = len(transaction.model_dump_json())
+        print(f"  {count:6} {'model_dump_json':>18} {baseline:9.1f} {size:8} {1:7.2f}x")
+        for omit in OMIT_POLICIES:
+            encoder = compile_encoder(HailTransaction, omit)
+            body = encoder(transaction).encode()
+            if omit == "none":
+                assert body == transaction.model_dump_json().encode()
+            elapsed = measure(partial(encoder, transaction), repeats)
+            print(f"  {count:6} {'encoder ' + omit:>18} {elapsed:9.1f} {len(body):8} {baseline / elapsed:7.2f}x")
+
+        elapsed = measure(partial(encode_cold, compile_encoder(HailTransaction, "none"), transaction), repeats)
+        print(f"  {count:6} {'encoder none cold':>18} {elapsed:9.1f} {size:8} {baseline / elapsed:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tail latency benchmark of hedged requests to the Hail API.
+
+Sends transactions to a simulated Hail API whose latency has a heavy tail: most
+requests take around 10ms, and a few percent stall for 20 times longer, as
+they do behind a busy load balancer or a GC pause. Without hedging, every
+stall is paid in full; with hedging a request still unanswered after the p95
+latency is duplicated, and the duplicate usually answers in the typical time.
+The extra requests sent are bounded by the hedge budget.
+
+Usage:
+    python benchmarks/hail_hedging.py [REQUESTS] [STALL_PERCENT]
+"""
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple, Union
+from unittest.mock import MagicMock
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from eyos.config import Settings
+from eyos.models import NewStoreEvent
+from eyos.services.hail_client import HailClient
+from eyos.services.transformer import transform_newstore_to_hail
+
+SAMPLE_PAYLOAD = Path(__file__).parent.parent / "newstore_sample_payload.json"
+CONCURRENCY = 8
+
+
+async def run(hedge: bool, requests: int, stall: float) -> Tuple[List[float], int]:
+    """
+    Send transactions and time them.
+
+    Args:
+        hedge: Hedge slow requests
+        requests: Transactions sent
+        stall: Fraction of requests that stall
+
+    Returns:
+        The latency of each transaction in seconds, and the number of requests sent
+    """
+    settings = Settings(hail_api_base_url="https://hail.example.com", hail_api_hedge=hedge)
+    client = HailClient(settings)
+    rng = random.Random(0)
+    response = MagicMock()
+    response.json.return_value = {"status": "success"}
+    sent = 0
+
+    async def post(url: Union[httpx.URL, str], **kwargs: Any) -> httpx.Response:
+        nonlocal sent
+        sent += 1
+        latency = rng.lognormvariate(-4.6, 0.25)
+        if rng.random() < stall:
+            latency *= 20
+        await asyncio.sleep(latency)
+        return response
+
+    client.client.post = post  # type: ignore[method-assign]
+    event = NewStoreEvent.model_validate_json(SAMPLE_PAYLOAD.read_bytes())
+    transaction = await transform_newstore_to_hail(event)
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def send() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await client.send_transaction(transaction)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(send() for _ in range(requests)))
+    return latencies, sent
+
+
+def _quantile(latencies: List[float], quantile: float) -> float:
+    return statistics.quantiles(latencies, n=100)[int(quantile * 100) - 1] * 1000
+
+
+def main() -> None:
+    """Print the latency quantiles with and without hedging."""
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    stall = (float(sys.argv[2]) if len(sys.argv) > 2 else 3) / 100
+    logging.disable(logging.WARNING)
+
+    print(f"{requests} transactions, {stall:.0%} stalled 20x, {CONCURRENCY} in flight:")
+    results: Dict[str, Tuple[List[float], int]] = {
+        "no hedging": asyncio.run(run(False, requests, stall)),
+        "hedged at p95": asyncio.run(run(True, requests, stall)),
+    }
+    for name, (latencies, sent) in results.items():
+        print(
+            f"  {name:14} p50 {_quantile(latencies, 0.5):6.1f}ms  p95 {_quantile(latencies, 0.95):6.1f}ms"
+            f"  p99 {_quantile(latencies, 0.99):6.1f}ms  {sent / requests - 1:6.1%} extra requests"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Import time benchmark for the service and the CLI.
+
+Runs each entry point's import in a fresh interpreter with `-X importtime`
+and prints the total cold import time and the slowest modules.
+
+Usage:
+    python benchmarks/import_time.py [TOP]
+"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from eyos.services.profiling import measure_import
+
+SRC_PATH = Path(__file__).parent.parent / "src"
+
+ENTRY_POINTS = {
+    "app": "import eyos.main",
+    "cli": "import eyos.commands.cli",
+}
+
+
+def main() -> None:
+    """Print cold import times of the entry points."""
+    top = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    env = dict(os.environ, PYTHONPATH=str(SRC_PATH))
+
+    for name, statement in ENTRY_POINTS.items():
+        runs = [measure_import(statement, env) for _ in range(5)]
+        totals = sorted(sum(t.cumulative_us for t in timings if t.depth == 0) / 1000 for timings in runs)
+        print(f"{name} ({statement}): best {totals[0]:.0f}ms, median {totals[len(totals) // 2]:.0f}ms")
+
+        slowest = sorted(runs[0], key=lambda timing: timing.self_us, reverse=True)[:top]
+        for timing in slowest:
+            print(f"  {timing.self_us / 1000:8.1f}ms  {timing.module}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
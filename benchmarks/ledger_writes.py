@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Cost of recording deliveries in the ledger.
+
+Compares writing each step to SQLite as it happens, in its own transaction,
+with the ledger, which only appends the step to a list on the request path
+and writes the rows in batches from a thread. Reports the time the request
+path spends per step, and how many rows each way stores per second.
+
+Usage:
+    python benchmarks/ledger_writes.py [ROWS]
+"""
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from eyos.services.ledger import DeliveryLedger, DeliveryState, connect
+
+
+def per_row(path: str, rows: int) -> float:
+    """
+    Insert and commit each row as it is recorded.
+
+    Args:
+        path: The database file
+        rows: Rows written
+
+    Returns:
+        Seconds spent
+    """
+    connection = connect(path)
+    started = time.perf_counter()
+    for i in range(rows):
+        with connection:
+            connection.execute(
+                "INSERT INTO deliveries VALUES (?, ?, ?, ?, ?, ?)",
+                ("acme", f"order-{i}", "order.completed", "received", time.time(), None),
+            )
+    elapsed = time.perf_counter() - started
+    connection.close()
+    return elapsed
+
+
+async def batched(path: str, rows: int) -> Tuple[float, float]:
+    """
+    Record rows in the ledger and write them in batches.
+
+    Args:
+        path: The database file
+        rows: Rows written
+
+    Returns:
+        Seconds spent recording, and in total once written
+    """
+    ledger = DeliveryLedger(path, batch_size=500)
+    ledger.start()
+    started = time.perf_counter()
+    recording = 0.0
+    for i in range(rows):
+        before = time.perf_counter()
+        ledger.record("acme", f"order-{i}", "order.completed", DeliveryState.RECEIVED)
+        recording += time.perf_counter() - before
+        if i % 100 == 0:
+            # Let the writer run, as a server does between requests
+            await asyncio.sleep(0)
+    await ledger.stop()
+    return recording, time.perf_counter() - started
+
+
+def main() -> None:
+    """Print the request path cost and throughput of each way of writing."""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    with tempfile.TemporaryDirectory() as directory:
+        direct = per_row(str(Path(directory) / "direct.db"), rows)
+        recording, total = asyncio.run(batched(str(Path(directory) / "batched.db"), rows))
+
+    print(f"Recording {rows} delivery steps:")
+    print(f"  {'commit per row':16} {direct / rows * 1e6:8.2f}us on the request path {rows / direct:10.0f} rows/s")
+    print(f"  {'batched ledger':16} {recording / rows * 1e6:8.2f}us on the request path {rows / total:10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
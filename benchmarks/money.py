@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark of order amounts as floats and as Money.
+
+Runs the same order lines through each representation: parsing them from
+JSON, computing unit prices, nets and totals, and serializing them back.
+
+Usage:
+    python benchmarks/money.py [REPEATS]
+"""
+import json
+import sys
+import timeit
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple, Type
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from pydantic import BaseModel, TypeAdapter
+
+from eyos.models.money import Money
+
+
+class FloatLine(BaseModel):
+    """The amounts of an order line as floats, as they were before Money."""
+
+    quantity: int
+    pricebook_price: float
+    list_price: float
+    item_discounts: float
+    order_discounts: float
+    tax: float
+
+
+class MoneyLine(BaseModel):
+    """The amounts of an order line as Money."""
+
+    quantity: int
+    pricebook_price: Money
+    list_price: Money
+    item_discounts: Money
+    order_discounts: Money
+    tax: Money
+
+
+def float_totals(lines: List[FloatLine]) -> Dict[str, float]:
+    """Compute line amounts with floats, rounding every result to cents."""
+    subtotal = tax_total = net_total = 0.0
+    for line in lines:
+        round(line.list_price / line.quantity, 2)
+        net = round(line.list_price - line.tax, 2)
+        subtotal = round(subtotal + line.list_price, 2)
+        tax_total = round(tax_total + line.tax, 2)
+        net_total = round(net_total + net, 2)
+    return {"subtotal": subtotal, "tax_total": tax_total, "net_total": net_total}
+
+
+def money_totals(lines: List[MoneyLine]) -> Dict[str, Money]:
+    """Compute line amounts with Money, exactly."""
+    subtotal = tax_total = net_total = Money(0)
+    for line in lines:
+        line.list_price / line.quantity
+        net = line.list_price - line.tax
+        subtotal += line.list_price
+        tax_total += line.tax
+        net_total += net
+    return {"subtotal": subtotal, "tax_total": tax_total, "net_total": net_total}
+
+
+def measure(operation: Callable[[], object], repeats: int) -> float:
+    """Best time of an operation in microseconds."""
+    return min(timeit.repeat(operation, number=repeats, repeat=5)) / repeats * 1e6
+
+
+def main() -> None:
+    """Print the time of each step for both representations."""
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    totals: Dict[Type[BaseModel], Tuple[TypeAdapter[List[Any]], Callable[[Any], object]]] = {
+        FloatLine: (TypeAdapter(List[FloatLine]), float_totals),
+        MoneyLine: (TypeAdapter(List[MoneyLine]), money_totals),
+    }
+
+    print("Order amounts, float vs Money (us per order):")
+    print(f"  {'lines':>6} {'step':>10} {'float':>9} {'money':>9} {'ratio':>6}")
+    for count in (2, 50, 500):
+        body = json.dumps([
+            {
+                "quantity": 1 + i % 3,
+                "pricebook_price": round(12 + i * 0.37, 2),
+                "list_price": round(10 + i * 0.37, 2),
+                "item_discounts": round(i * 0.05, 2),
+                "order_discounts": 0.0,
+                "tax": round(2 + i * 0.07, 2),
+            }
+            for i in range(count)
+        ]).encode()
+
+        results: Dict[str, Dict[Type[BaseModel], float]] = {"parse": {}, "arithmetic": {}, "serialize": {}}
+        for model, (adapter, compute) in totals.items():
+            lines = adapter.validate_json(body)
+            assert adapter.dump_json(lines) == adapter.dump_json(adapter.validate_json(body))
+            results["parse"][model] = measure(partial(adapter.validate_json, body), repeats)
+            results["arithmetic"][model] = measure(partial(compute, lines), repeats)
+            results["serialize"][model] = measure(partial(adapter.dump_json, lines), repeats)
+
+        for step, timings in results.items():
+            as_float, as_money = timings[FloatLine], timings[MoneyLine]
+            print(f"  {count:6} {step:>10} {as_float:9.1f} {as_money:9.1f} {as_money / as_float:5.2f}x")
+
+        float_adapter, money_adapter = TypeAdapter(List[FloatLine]), TypeAdapter(List[MoneyLine])
+        same = float_adapter.dump_json(float_adapter.validate_json(body)) == money_adapter.dump_json(
+            money_adapter.validate_json(body)
+        )
+        print(f"  {count:6} {'identical JSON':>10}: {same}")
+
+
+if __name__ == "__main__":
+    main()
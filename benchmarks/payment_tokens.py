@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark of payment token generation in the transformer.
+
+Compares the former four `uuid.uuid4()` calls per card payment with the
+random and derived modes of `_payment_token`, which produce all identifiers
+of a payment from one random read or one keyed BLAKE2b hash.
+
+Usage:
+    python benchmarks/payment_tokens.py [ITERATIONS]
+"""
+import sys
+import timeit
+import uuid
+from pathlib import Path
+from typing import Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from eyos.services.transformer import _payment_token
+
+
+def uuid4_tokens() -> str:
+    """Generate the identifiers of a payment the way the transformer used to."""
+    return uuid.uuid4().hex[:10] + uuid.uuid4().hex[:8] + uuid.uuid4().hex[:8] + uuid.uuid4().hex[:8]
+
+
+def main() -> None:
+    """Print the cost of generating the identifiers of one payment in each mode."""
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    key = b"benchmark-token-key"
+
+    modes: Dict[str, Callable[[], str]] = {
+        "uuid4 x4 (previous)": uuid4_tokens,
+        "random": lambda: _payment_token(None, "newlook", "order-00000001", 0),
+        "derived": lambda: _payment_token(key, "newlook", "order-00000001", 0),
+    }
+
+    results = {
+        name: min(timeit.repeat(generate, number=iterations, repeat=3)) / iterations
+        for name, generate in modes.items()
+    }
+
+    baseline = results["uuid4 x4 (previous)"]
+    print(f"Identifiers of one card payment ({iterations} iterations):")
+    for name, seconds in results.items():
+        print(f"  {name:20} {seconds * 1e9:8.0f} ns  {baseline / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for queued events.
+
+Measures the bytes each queued event retains when the backlog is held as
+nested event dicts, as the queue used to do, versus compact `QueuedEvent`
+records. Each representation is built from the raw webhook body, so nothing
+is shared with the validated model that the request discards.
+
+Usage:
+    python benchmarks/queue_memory.py [EVENTS]
+"""
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from eyos.models import NewStoreEvent
+from eyos.services.queued_event import QueuedEvent
+
+
+def measure(bodies: List[bytes], build: Callable[[NewStoreEvent], Any]) -> float:
+    """
+    Measure the memory retained per event by a representation.
+
+    Args:
+        bodies: Raw webhook bodies of the events to hold
+        build: Converts a validated event into its queued representation
+
+    Returns:
+        Retained bytes per event
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    backlog = [build(NewStoreEvent.model_validate_json(body)) for body in bodies]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert len(backlog) == len(bodies)
+    return (after - before) / len(bodies)
+
+
+def main() -> None:
+    """Print bytes per queued event for each representation."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    sample_file = Path(__file__).parent.parent / "newstore_sample_payload.json"
+    sample = json.loads(sample_file.read_text())
+
+    bodies = []
+    for i in range(count):
+        sample["payload"]["id"] = f"order-{i:08d}"
+        sample["payload"]["external_id"] = f"EXT-{i:08d}"
+        bodies.append(json.dumps(sample).encode())
+
+    results = {
+        "nested dict (model_dump)": measure(bodies, lambda event: event.model_dump()),
+        "nested dict (JSON types)": measure(bodies, lambda event: json.loads(event.model_dump_json())),
+        "QueuedEvent": measure(bodies, QueuedEvent.from_event),
+    }
+
+    baseline = results["nested dict (model_dump)"]
+    print(f"Bytes per queued event ({count} events, {len(bodies[0])} byte payload):")
+    for name, size in results.items():
+        print(f"  {name:26} {size:8.0f} bytes  {baseline / size:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark of the queue pipeline.
+
+Drains a backlog of sample events through the queue processor, with sends to
+the Hail API simulated by a fixed latency, either taking one event off the
+queue at a time, or in batches that grow with the backlog. Both send at most
+`queue_workers` events at once.
+
+Usage:
+    python benchmarks/queue_pipeline.py [EVENTS] [SEND_LATENCY_MS]
+"""
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from eyos.config import Settings
+from eyos.models import HailTransaction
+from eyos.services.queue_processor import InMemoryQueue, QueueProcessor
+from eyos.services.queued_event import QueuedEvent
+
+
+async def drain(max_batch_size: int, events: int, latency: float) -> float:
+    """
+    Drain a backlog of events.
+
+    Args:
+        max_batch_size: Most events taken off the queue at once
+        events: Size of the backlog
+        latency: Seconds each send takes
+
+    Returns:
+        Events per second
+    """
+    settings = Settings(hail_api_base_url="mock", queue_workers=4, queue_batch_max_size=max_batch_size)
+    queue = InMemoryQueue.from_settings(settings)
+    processor = QueueProcessor(queue, settings)
+    done = asyncio.Event()
+    sent = 0
+
+    async def send_transaction(
+        transaction: HailTransaction, retry_count: int = 0, deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        nonlocal sent
+        await asyncio.sleep(latency)
+        sent += 1
+        if sent == events:
+            done.set()
+        return {"status": "success"}
+
+    processor.hail_client.send_transaction = send_transaction  # type: ignore[method-assign]
+
+    sample = json.loads((Path(__file__).parent.parent / "newstore_sample_payload.json").read_text())
+    for i in range(events):
+        sample["payload"]["id"] = f"order-{i:08d}"
+        queue.scheduler.push(sample["tenant"], QueuedEvent.from_dict(sample))
+
+    started = time.perf_counter()
+    await queue.start(processor.pipeline.run)
+    await done.wait()
+    elapsed = time.perf_counter() - started
+    await queue.stop()
+    return events / elapsed
+
+
+def main() -> None:
+    """Print the drain rate of each way of processing the queue."""
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+    logging.disable(logging.INFO)
+
+    print(f"Draining {events} events, {latency * 1000:.0f}ms per send, 4 concurrent sends:")
+    baseline = 0.0
+    for name, max_batch_size in (("single events", 1), ("batches of up to 32", 32)):
+        rate = asyncio.run(drain(max_batch_size, events, latency))
+        baseline = baseline or rate
+        print(f"  {name:20} {rate:8.1f} events/s  {rate / baseline:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Benchmark of line amount computation for orders of increasing size.
+
+Compares the line-by-line path with the NumPy path of
+`compute_line_amounts`, which the transformer switches to from
+`VECTORIZE_MIN_ITEMS` lines on.
+
+Usage:
+    python benchmarks/receipt_totals.py [REPEATS]
+"""
+import json
+import sys
+import timeit
+from functools import partial
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from eyos.models import NewStoreEvent
+from eyos.services.totals import VECTORIZE_MIN_ITEMS, _line_amounts_numpy, _line_amounts_python
+
+
+def main() -> None:
+    """Print the time to compute the line amounts of an order with each path."""
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    sample = json.loads((Path(__file__).parent.parent / "newstore_sample_payload.json").read_text())
+    item = sample["payload"]["items"][0]
+
+    print(f"Line amounts per order, NumPy is used from {VECTORIZE_MIN_ITEMS} lines:")
+    print(f"  {'lines':>6} {'python us':>10} {'numpy us':>10} {'speedup':>8}")
+    for count in (8, 32, 64, 256, 1024, 4096):
+        sample["payload"]["items"] = [
+            dict(item, id=f"item-{i}", list_price=10 + i * 0.37, tax=2 + i * 0.07, quantity=1 + i % 3)
+            for i in range(count)
+        ]
+        items = NewStoreEvent(**sample).payload.items
+
+        python, vectorized = (
+            min(timeit.repeat(partial(compute, items, False, 2), number=repeats, repeat=3)) / repeats
+            for compute in (_line_amounts_python, _line_amounts_numpy)
+        )
+        print(f"  {count:6} {python * 1e6:10.1f} {vectorized * 1e6:10.1f} {python / vectorized:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark of server configurations on the webhook route.
+
+Starts the service once per event loop / HTTP parser combination that is
+installed, posts the sample event from concurrent keep-alive connections and
+reports requests per second and latency percentiles.
+
+Usage:
+    python benchmarks/server_configs.py [REQUESTS] [CONCURRENCY]
+"""
+import asyncio
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import httpx
+
+ROOT = Path(__file__).parent.parent
+PORT = 8765
+CONFIGS: List[Tuple[str, str]] = [
+    ("asyncio", "h11"),
+    ("asyncio", "httptools"),
+    ("uvloop", "h11"),
+    ("uvloop", "httptools"),
+]
+
+
+def installed(loop: str, http: str) -> bool:
+    """Check whether the implementations of a configuration are available."""
+    return all(
+        name in ("asyncio", "h11") or importlib.util.find_spec(name) is not None for name in (loop, http)
+    )
+
+
+async def wait_until_live(client: httpx.AsyncClient, timeout: float = 20.0) -> None:
+    """Wait for the server to answer its liveness probe."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health/live")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("Server did not start")
+
+
+async def load(requests: int, concurrency: int, body: bytes) -> Dict[str, float]:
+    """
+    Post the event `requests` times from `concurrency` connections.
+
+    Returns:
+        Throughput and latency percentiles in milliseconds
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits) as client:
+        await wait_until_live(client)
+        latencies: List[float] = []
+        remaining = iter(range(requests))
+        headers = {"Content-Type": "application/json"}
+
+        async def worker() -> None:
+            for _ in remaining:
+                started_at = time.perf_counter()
+                response = await client.post("/webhooks/newstore/", content=body, headers=headers)
+                latencies.append(time.perf_counter() - started_at)
+                response.raise_for_status()
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started_at
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {"rps": requests / elapsed, "p50": quantiles[49] * 1000, "p99": quantiles[98] * 1000}
+
+
+def main() -> None:
+    """Benchmark every installed configuration and print a table."""
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    body = (ROOT / "newstore_sample_payload.json").read_bytes()
+
+    env = dict(
+        os.environ,
+        PYTHONPATH=str(ROOT / "src"),
+        EYOS_QUEUE_ENABLED="true",
+        EYOS_QUEUE_MAX_SIZE="0",
+        EYOS_QUEUE_HIGH_WATERMARK="0",
+        EYOS_QUEUE_LOW_WATERMARK="0",
+        EYOS_LOG_LEVEL="WARNING",
+    )
+
+    print(f"{requests} requests from {concurrency} connections to POST /webhooks/newstore/")
+    print(f"{'loop':8} {'http':10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for loop, http in CONFIGS:
+        if not installed(loop, http):
+            print(f"{loop:8} {http:10} not installed")
+            continue
+
+        server = subprocess.Popen(
+            [sys.executable, "-m", "eyos", "run", "--port", str(PORT), "--log-level", "warning",
+             "--loop", loop, "--http", http],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            result = asyncio.run(load(requests, concurrency, body))
+        finally:
+            server.terminate()
+            server.wait()
+
+        print(f"{loop:8} {http:10} {result['rps']:8.0f} {result['p50']:8.2f} {result['p99']:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+from eyos.commands.cli import main
+
+if __name__ == "__main__":
+    main()
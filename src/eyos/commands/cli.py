@@ -1,49 +1,161 @@
+import importlib.util
 import logging
+import os
+import shutil
 import sys
+import tempfile
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Literal, Optional, overload
 
 import typer
-import uvicorn
 
 from eyos.config import get_settings
 from eyos.utils.helpers import configure_logging
 
 cli_app = typer.Typer(help="NewStore to Hail API Integration CLI")
 
+# Faster implementation and the standard library fallback used when it is not installed
+SERVER_IMPLEMENTATIONS = {
+    "loop": ("uvloop", "asyncio"),
+    "http": ("httptools", "h11"),
+}
+
+
+# Implementations uvicorn accepts for its loop and http options
+LoopImplementation = Literal["asyncio", "uvloop"]
+HttpImplementation = Literal["h11", "httptools"]
+
+
+@overload
+def resolve_server_implementation(kind: Literal["loop"], requested: str) -> LoopImplementation: ...
+
+
+@overload
+def resolve_server_implementation(kind: Literal["http"], requested: str) -> HttpImplementation: ...
+
+
+@overload
+def resolve_server_implementation(kind: str, requested: str) -> str: ...
+
+
+def resolve_server_implementation(kind: str, requested: str) -> str:
+    """
+    Pick the event loop or HTTP parser implementation for the server.
+
+    `auto` selects the faster implementation when it is installed. Requesting
+    it explicitly while it is not installed falls back with a warning instead
+    of failing at startup.
+
+    Args:
+        kind: "loop" or "http"
+        requested: "auto" or an implementation name
+
+    Returns:
+        The implementation name to pass to uvicorn
+
+    Raises:
+        typer.BadParameter: When the implementation is unknown
+    """
+    fast, fallback = SERVER_IMPLEMENTATIONS[kind]
+    if requested not in ("auto", fast, fallback):
+        raise typer.BadParameter(f"Unknown {kind} implementation {requested!r}, use auto, {fast} or {fallback}")
+
+    if requested == fallback:
+        return fallback
+    if importlib.util.find_spec(fast) is not None:
+        return fast
+    if requested == fast:
+        logging.warning("%s is not installed, falling back to %s", fast, fallback)
+    return fallback
+
 
 @cli_app.command()
 def run(
     host: str = "127.0.0.1",
     port: int = 8000,
     reload: bool = False,
+    workers: int = typer.Option(1, min=1, help="Number of worker processes sharing the listening socket"),
     log_level: str = "info",
+    loop: Optional[str] = typer.Option(None, help="Event loop: auto, asyncio or uvloop"),
+    http: Optional[str] = typer.Option(None, help="HTTP parser: auto, h11 or httptools"),
+    backlog: Optional[int] = typer.Option(None, min=1, help="Pending connections the socket queues"),
+    keep_alive_timeout: Optional[int] = typer.Option(None, min=0, help="Seconds idle connections stay open"),
+    limit_concurrency: Optional[int] = typer.Option(None, min=1, help="Connections before answering 503"),
+    h11_max_incomplete_event_size: Optional[int] = typer.Option(
+        None, min=1, help="Bytes buffered for request headers with h11"
+    ),
 ) -> None:
-    """Run the API server."""
-    configure_logging(log_level)
+    """
+    Run the API server.
+
+    With --workers N a supervisor process binds the socket and forks N workers,
+    each with its own Hail connection pool and queue workers. Send SIGHUP to the
+    supervisor for a rolling restart, SIGTTIN/SIGTTOU to add or remove a worker.
+
+    Server tuning options default to the EYOS_SERVER_* settings.
+    """
+    if reload and workers > 1:
+        typer.echo("Error: --reload cannot be combined with --workers")
+        raise typer.Exit(1)
+
+    run_dir = None
+    if workers > 1:
+        # Workers coordinate the Hail rate limit and publish metrics through a shared run directory
+        run_dir = Path(tempfile.mkdtemp(prefix="eyos-"))
+        os.environ.setdefault("EYOS_METRICS_DIR", str(run_dir / "metrics"))
+        os.environ.setdefault("EYOS_HAIL_API_RATE_LIMIT_FILE", str(run_dir / "hail-rate-limit"))
+
+    settings = get_settings()
+    configure_logging(log_level, settings.log_format, settings.log_sample_rates)
+
+    loop_implementation = resolve_server_implementation("loop", loop or settings.server_loop)
+    http_implementation = resolve_server_implementation("http", http or settings.server_http)
+    if keep_alive_timeout is None:
+        keep_alive_timeout = settings.server_keep_alive_timeout
+    if h11_max_incomplete_event_size is None:
+        h11_max_incomplete_event_size = settings.server_h11_max_incomplete_event_size
 
     # Add src to the Python path if not already there
     src_path = Path(__file__).parent.parent.parent
     if str(src_path) not in sys.path:
         sys.path.insert(0, str(src_path))
 
-    # Get settings
-    settings = get_settings()
-
     # Log startup information
-    logging.info(f"Starting {settings.api_title} v{settings.api_version}")
-    logging.info(f"Listening on http://{host}:{port}")
+    logging.info("Starting %s v%s", settings.api_title, settings.api_version)
+    logging.info("Listening on http://%s:%d", host, port)
+    logging.info("Using the %s event loop and the %s HTTP parser", loop_implementation, http_implementation)
 
     if reload:
         logging.info("Hot reload enabled")
+    if workers > 1:
+        logging.info("Starting %d worker processes, metrics published to %s", workers, settings.metrics_dir)
 
     # Run the server
-    uvicorn.run(
-        "eyos.main:app",
-        host=host,
-        port=port,
-        reload=reload,
-        log_level=log_level.lower(),
-    )
+    import uvicorn
+
+    try:
+        uvicorn.run(
+            "eyos.main:app",
+            host=host,
+            port=port,
+            reload=reload,
+            workers=workers,
+            log_level=log_level.lower(),
+            loop=loop_implementation,
+            http=http_implementation,
+            backlog=backlog or settings.server_backlog,
+            timeout_keep_alive=keep_alive_timeout,
+            limit_concurrency=limit_concurrency or settings.server_limit_concurrency,
+            h11_max_incomplete_event_size=h11_max_incomplete_event_size,
+            # Leave uvicorn's loggers unconfigured so they propagate into our queue-based pipeline
+            log_config=None,
+        )
+    finally:
+        if run_dir is not None:
+            shutil.rmtree(run_dir, ignore_errors=True)
 
 
 @cli_app.command()
@@ -86,6 +198,145 @@ def simulate(event_file: str = "newstore_sample_payload.json") -> None:
         raise typer.Exit(1) from e
 
 
+@cli_app.command()
+def backfill(
+    input_file: Path = typer.Argument(..., exists=True, dir_okay=False, help="NDJSON or JSON array export"),
+    checkpoint: Optional[Path] = typer.Option(None, help="Resume file, defaults to <input>.checkpoint"),
+    errors_file: Optional[Path] = typer.Option(None, help="Failed events, defaults to <input>.errors.ndjson"),
+    concurrency: Optional[int] = typer.Option(None, min=1, help="Concurrent sends to the Hail API"),
+    batch_size: Optional[int] = typer.Option(None, min=1, help="Events transformed per pool task"),
+    processes: Optional[int] = typer.Option(None, min=1, help="Transformer processes, defaults to CPU count"),
+) -> None:
+    """Backfill a NewStore order export to the Hail API, resuming from the last checkpoint."""
+    import asyncio
+
+    from eyos.services.backfill import Backfill, BackfillProgress
+
+    settings = get_settings()
+    configure_logging("warning", settings.log_format)
+
+    job = Backfill(
+        settings,
+        input_file,
+        checkpoint_path=checkpoint or input_file.with_name(input_file.name + ".checkpoint"),
+        errors_path=errors_file or input_file.with_name(input_file.name + ".errors.ndjson"),
+        concurrency=concurrency or settings.backfill_concurrency,
+        batch_size=batch_size or settings.backfill_batch_size,
+        processes=processes,
+    )
+    if job.checkpoint.offset:
+        typer.echo(f"Resuming from byte {job.checkpoint.offset} ({job.checkpoint.sent} events already sent)")
+
+    def show_progress(progress: BackfillProgress) -> None:
+        percent = 100 * progress.offset / progress.total_bytes if progress.total_bytes else 100.0
+        eta = progress.eta_seconds
+        eta_text = time.strftime("%H:%M:%S", time.gmtime(eta)) if eta is not None else "--:--:--"
+        typer.echo(
+            f"\rsent={progress.sent} failed={progress.failed} "
+            f"{progress.events_per_second:.1f} events/s {percent:.1f}% ETA {eta_text}",
+            nl=False,
+            err=True,
+        )
+
+    result = asyncio.run(job.run(show_progress))
+    typer.echo("", err=True)
+    typer.echo(f"Backfill finished: {result.sent} sent, {result.failed} failed")
+    if result.failed:
+        typer.echo(f"Failed events were written to {job.errors_path}")
+        raise typer.Exit(1)
+
+
+@cli_app.command()
+def transform(
+    input_file: Path = typer.Argument(..., exists=True, dir_okay=False, help="NDJSON or JSON array export"),
+    output_dir: Path = typer.Argument(..., file_okay=False, help="Directory receiving the transaction shards"),
+    errors_file: Optional[Path] = typer.Option(None, help="Failed events, defaults to <output>/errors.ndjson"),
+    compression: str = typer.Option("none", help="Shard compression: none, gzip or zstd"),
+    shard_size: int = typer.Option(100_000, min=0, help="Transactions per shard, 0 for a single shard"),
+    ordered: bool = typer.Option(True, help="Keep the input order in the output"),
+    batch_size: Optional[int] = typer.Option(None, min=1, help="Events transformed per pool task"),
+    processes: Optional[int] = typer.Option(None, min=1, help="Transformer processes, defaults to CPU count"),
+) -> None:
+    """
+    Transform a NewStore export to Hail transactions on disk, without sending anything.
+
+    Use it to review receipts before a backfill, or as a throughput benchmark of the transformer.
+    """
+    from eyos.services.bulk_transform import BulkTransform, TransformStats
+    from eyos.services.transformer import payment_token_key
+
+    settings = get_settings()
+    configure_logging("warning", settings.log_format)
+
+    try:
+        job = BulkTransform(
+            input_file,
+            output_dir,
+            errors_path=errors_file or output_dir / "errors.ndjson",
+            batch_size=batch_size or settings.backfill_batch_size,
+            shard_size=shard_size,
+            compression=compression,
+            ordered=ordered,
+            processes=processes,
+            token_key=payment_token_key(settings),
+            tax_rates_file=settings.tax_rates_file,
+        )
+    except ValueError as e:
+        typer.echo(f"Error: {e}")
+        raise typer.Exit(1) from e
+
+    def show_progress(stats: TransformStats) -> None:
+        typer.echo(
+            f"\rtransformed={stats.transformed} failed={stats.failed} {stats.events_per_second:.1f} events/s",
+            nl=False,
+            err=True,
+        )
+
+    result = job.run(show_progress)
+    typer.echo("", err=True)
+    typer.echo(
+        f"Transformed {result.transformed} events into {len(result.shards)} shard(s) in {result.elapsed:.2f}s "
+        f"({result.events_per_second:.1f} events/s on {job.processes} processes), {result.failed} failed"
+    )
+    if result.failed:
+        typer.echo(f"Failed events were written to {job.errors_path}")
+        raise typer.Exit(1)
+
+
+@cli_app.command()
+def deliveries(
+    database: Optional[Path] = typer.Option(None, help="Ledger database, defaults to EYOS_LEDGER_PATH"),
+    output: Optional[Path] = typer.Option(None, "--output", "-o", help="Output file, defaults to stdout"),
+    output_format: str = typer.Option("jsonl", "--format", help="jsonl or csv"),
+    tenant: Optional[str] = typer.Option(None, help="Only rows of this tenant"),
+    since: Optional[datetime] = typer.Option(None, help="Only rows recorded from this time on, UTC unless given"),
+) -> None:
+    """
+    Export the delivery ledger, every recorded step of every event.
+
+    The database is opened read only, so it can be exported while the service writes to it.
+    """
+    from eyos.services.ledger import connect, export_rows, write_export
+
+    if output_format not in ("jsonl", "csv"):
+        raise typer.BadParameter(f"Unsupported export format {output_format!r}, use jsonl or csv")
+    path = database or get_settings().ledger_path
+    if not path or not Path(path).exists():
+        typer.echo(f"Error: Ledger database not found: {path or 'EYOS_LEDGER_PATH is not set'}", err=True)
+        raise typer.Exit(1)
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    connection = connect(str(path), read_only=True)
+    try:
+        rows = export_rows(connection, tenant, since.timestamp() if since is not None else None)
+        with open(output, "w", newline="") if output is not None else nullcontext(sys.stdout) as stream:
+            count = write_export(rows, stream, output_format)
+    finally:
+        connection.close()
+    typer.echo(f"Exported {count} rows", err=True)
+
+
 @cli_app.command()
 def scripts() -> None:
     """List available Rye scripts."""
@@ -133,5 +384,10 @@ def scripts() -> None:
     typer.echo("Run scripts with: rye run <script-name>")
 
 
-if __name__ == "__main__":
+def main() -> None:
+    """Entry point of `python -m eyos`."""
     cli_app()
+
+
+if __name__ == "__main__":
+    main()
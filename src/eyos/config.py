@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -16,18 +16,96 @@ class Settings(BaseSettings):
     newstore_webhook_secret: str = Field(default="mock_webhook_secret")
     newstore_supported_events: List[str] = ["order.completed"]
 
+    # Request body settings
+    body_max_size: int = 4 * 1024 * 1024  # Bytes accepted by a route unless set in body_max_sizes, 413 above
+    body_max_sizes: Dict[str, int] = {}  # Per-route limits keyed by route name: webhook or simulate
+    body_stream_threshold: int = 256 * 1024  # Bytes above which bodies are validated as they stream
+    body_max_depth: int = 32  # Deepest JSON nesting of a streamed body
+
     # Hail API settings
     hail_api_base_url: str = Field(default="mock")
     hail_api_key: str = Field(default="mock_api_key")
     hail_api_max_retries: int = 3
     hail_api_retry_delay: float = 1.0  # Base delay in seconds
+    hail_api_max_retry_after: float = 30.0  # Longest Retry-After honoured in seconds, longer waits are cut to it
+    hail_api_timeout: float = 30.0  # Seconds an attempt may take to connect, and for each write and read
+    hail_api_idempotency: bool = True  # Send Idempotency-Key headers, which makes retrying unanswered requests safe
+    hail_api_deadline: float = 0  # Seconds from accepting an event to giving up its delivery, 0 for none
+    hail_api_hedge: bool = False  # Send a duplicate of requests slower than the hedge quantile
+    hail_api_hedge_quantile: float = 0.95
+    hail_api_hedge_budget: float = 0.1  # Hedged requests per request, bounds the extra load
+    hail_api_hedge_min_samples: int = 50  # Latencies observed before requests are hedged
+    hail_api_max_connections: int = 100  # Per-process connection pool size
+    hail_api_max_keepalive_connections: int = 20
+    hail_api_rate_limit: float = 0  # Requests per second across all workers, 0 disables
+    hail_api_rate_burst: Optional[int] = None
+    hail_api_rate_limit_file: Optional[str] = None  # Shared bucket file, set by `run --workers`
+    hail_api_compression: str = "none"  # Request Content-Encoding: none, gzip, deflate or zstd
+    hail_api_compression_level: int = 6
+    hail_api_compression_min_size: int = 4096  # Bytes below which bodies are sent uncompressed
+    hail_api_compression_thread_min_size: int = 256 * 1024  # Bytes above which compression runs in a thread
+    hail_api_omit_fields: str = "none"  # Transaction fields left out: none, null (None values) or empty
+
+    # Transformer settings
+    payment_token_mode: str = "random"  # random, or derived from the order so re-sent transactions are identical
+    payment_token_key: str = Field(default="mock_token_key")  # Secret keying derived tokens, must be changed to use it
+    tax_rates_file: Optional[str] = None  # JSON tax rate tables, the bundled tables when unset
+
+    # Server settings
+    server_loop: str = "auto"  # auto, asyncio or uvloop
+    server_http: str = "auto"  # auto, h11 or httptools
+    server_backlog: int = 2048  # Pending connections the listening socket queues
+    server_keep_alive_timeout: int = 5  # Seconds an idle keep-alive connection stays open
+    server_limit_concurrency: Optional[int] = None  # Connections and tasks before answering 503
+    server_h11_max_incomplete_event_size: Optional[int] = None  # Bytes buffered for request headers, h11 only
+
+    # Backfill settings
+    backfill_concurrency: int = 32  # Concurrent sends to the Hail API
+    backfill_batch_size: int = 100  # Events transformed per process pool task
+
+    # Health check settings
+    health_check_interval: float = 5.0  # Seconds between readiness checks
+    health_hail_timeout: float = 2.0  # Seconds to wait for the Hail API reachability probe
+    health_max_hail_failures: int = 5  # Consecutive Hail failures after which the service is not ready
+
+    # Metrics settings
+    metrics_dir: Optional[str] = None  # Directory where each worker publishes its metrics
+    metrics_flush_interval: float = 5.0  # Seconds between metrics publications
 
     # Queue settings (for future implementation)
     queue_enabled: bool = False
     queue_url: Optional[str] = None
+    queue_max_size: int = 10000
+    queue_high_watermark: int = 8000  # Start shedding new events at this depth
+    queue_low_watermark: int = 5000  # Accept new events again below this depth
+    queue_max_retry_after: int = 60  # Upper bound for the Retry-After header in seconds
+    queue_shed_status_code: int = 503  # 429 or 503
+    queue_workers: int = 4  # Concurrent sends per process
+    queue_batch_max_size: int = 32  # Most events dequeued and transformed together, batches grow with the backlog
+    queue_pipeline_buffer: int = 2  # Batches waiting between two pipeline stages
+    queue_tenant_weights: Dict[str, int] = {}  # Events per round-robin turn, keyed by tenant
+    queue_default_tenant_weight: int = 1
+    queue_tenant_max_in_flight: Dict[str, int] = {}  # Events processed at once, keyed by tenant
+    queue_default_tenant_max_in_flight: int = 0  # 0 for unlimited
+    queue_priority_aging_interval: float = 5.0  # Seconds of waiting that promote a lane by one, 0 disables
+    queue_coalesce: bool = False  # Replace a queued event by a newer one for the same order and event name
+
+    # Delivery ledger settings
+    ledger_path: Optional[str] = None  # SQLite database recording each event's delivery, disabled when unset
+    ledger_flush_interval: float = 0.5  # Seconds between batched writes
+    ledger_batch_size: int = 500  # Waiting rows that trigger a write before the interval
+    ledger_max_pending: int = 100_000  # Rows held while writes fail, newer ones are dropped
+
+    # Profiling settings (admin-only endpoints, disabled by default)
+    profiling_enabled: bool = False
+    admin_api_key: str = Field(default="mock_admin_key")  # Must be changed to enable profiling
+    loop_lag_interval: float = 0.1  # Seconds between event loop probes
+    loop_lag_threshold: float = 0.05  # Minimum lag in seconds counted as a stall
 
     # Logging settings
     log_level: str = "INFO"
+    log_format: str = "json"  # "json" or "text"
+    log_sample_rates: Dict[str, float] = {}  # Fraction of INFO records kept per logger
 
     model_config = SettingsConfigDict(
         env_file=".env",
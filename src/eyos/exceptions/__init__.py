@@ -1,5 +1,7 @@
-from eyos.exceptions import validations
+from eyos.exceptions import queue, request_body, validations
 from eyos.exceptions.base import ExceptionHandlers
 
 exception_handlers = ExceptionHandlers()
 exception_handlers.include_exception_handlers(validations.exception_handler)
+exception_handlers.include_exception_handlers(queue.exception_handler)
+exception_handlers.include_exception_handlers(request_body.exception_handler)
@@ -0,0 +1,26 @@
+from typing import Awaitable
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from eyos.exceptions.base import ExceptionHandlers
+
+exception_handler = ExceptionHandlers()
+
+
+class QueueOverloadedError(Exception):
+    """Raised when the event queue is above its high watermark and sheds load."""
+
+    def __init__(self, retry_after: int, status_code: int = 503) -> None:
+        super().__init__(f"Event queue is overloaded, retry after {retry_after} seconds")
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+@exception_handler.add_exception_handler(QueueOverloadedError)
+def handle_queue_overloaded_error(request: Request, exc: QueueOverloadedError) -> Response | Awaitable[Response]:
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"message": "Service overloaded", "details": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
@@ -0,0 +1,43 @@
+from typing import Awaitable
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from eyos.exceptions.base import ExceptionHandlers
+
+exception_handler = ExceptionHandlers()
+
+
+class RequestBodyTooLargeError(Exception):
+    """Raised when a request body is larger than its route accepts."""
+
+    def __init__(self, limit: int) -> None:
+        super().__init__(f"Request body is larger than {limit} bytes")
+        self.limit = limit
+
+
+class InvalidRequestBodyError(Exception):
+    """Raised when a streamed request body cannot be a valid event."""
+
+
+@exception_handler.add_exception_handler(RequestBodyTooLargeError)
+def handle_request_body_too_large_error(
+    request: Request, exc: RequestBodyTooLargeError
+) -> Response | Awaitable[Response]:
+    # The rest of the body is not read, the connection is not reused
+    return JSONResponse(
+        status_code=413,
+        content={"message": "Request body too large", "details": str(exc)},
+        headers={"Connection": "close"},
+    )
+
+
+@exception_handler.add_exception_handler(InvalidRequestBodyError)
+def handle_invalid_request_body_error(
+    request: Request, exc: InvalidRequestBodyError
+) -> Response | Awaitable[Response]:
+    return JSONResponse(
+        status_code=400,
+        content={"message": "Invalid request body", "details": str(exc)},
+        headers={"Connection": "close"},
+    )
@@ -1,3 +1,4 @@
+import json
 from typing import Awaitable
 
 import pydantic_core._pydantic_core
@@ -13,4 +14,6 @@ exception_handler = ExceptionHandlers()
 def handle_pydantic_validation_error(
     request: Request, exc: pydantic_core._pydantic_core.ValidationError
 ) -> Response | Awaitable[Response]:
-    return JSONResponse(status_code=400, content={"message": "Validation error", "details": exc.errors()})
+    # Inputs are left out: a raw body that failed to parse is bytes, which cannot be rendered as JSON
+    details = json.loads(exc.json(include_input=False))
+    return JSONResponse(status_code=400, content={"message": "Validation error", "details": details})
@@ -1,23 +1,23 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
-from typing import Any, AsyncGenerator, Dict
+from typing import AsyncGenerator
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from eyos.commands.cli import cli_app
-from eyos.config import get_settings
+from eyos.config import Settings, get_settings
 from eyos.exceptions import exception_handlers
-from eyos.routers import hail_mock, newstore
+from eyos.routers import health, newstore
+from eyos.routers import metrics as metrics_router
 from eyos.services.hail_client import HailClient
+from eyos.services.health import CachedResponse, ReadinessMonitor
+from eyos.services.ledger import DeliveryLedger
+from eyos.services.metrics import metrics
 from eyos.services.queue_processor import InMemoryQueue, QueueProcessor
-from eyos.utils.helpers import set_log_level
+from eyos.utils.enviroment import environment_details
+from eyos.utils.helpers import configure_logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
 logger = logging.getLogger(__name__)
 
 
@@ -26,27 +26,78 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """
     Application lifecycle manager.
 
-    This context manager handles startup and shutdown events.
+    This context manager handles startup and shutdown events. When the service
+    runs with several worker processes, each process goes through its own
+    lifespan and therefore owns its own connection pool and queue workers.
     """
     # Initialize services on startup
     settings = get_settings()
     hail_client = HailClient(settings)
-
-    # Create queue and queue processor
-    queue = InMemoryQueue()
-    queue_processor = QueueProcessor(queue, settings)
-
-    # Start the queue processor if enabled
-    if settings.queue_enabled:
-        logger.info("Starting queue processor...")
-        async with queue_processor.lifespan():
-            logger.info("Queue processor started")
+    app.state.hail_client = hail_client
+
+    # Start the profiling probes if enabled
+    if settings.profiling_enabled:
+        from eyos.services.profiling import LoopLagMonitor, TaskTracker
+
+        app.state.task_tracker = TaskTracker()
+        app.state.task_tracker.install(asyncio.get_running_loop())
+        app.state.loop_lag_monitor = LoopLagMonitor(settings.loop_lag_interval, settings.loop_lag_threshold)
+        app.state.loop_lag_monitor.start()
+
+    # Record the delivery of each event, written in batches in the background
+    ledger = None
+    if settings.ledger_path:
+        ledger = DeliveryLedger(
+            settings.ledger_path,
+            settings.ledger_flush_interval,
+            settings.ledger_batch_size,
+            settings.ledger_max_pending,
+        )
+        ledger.start()
+        metrics.register_collector("ledger", ledger.stats)
+    app.state.ledger = ledger
+
+    # Create queue and queue processor, shared with the webhook routes
+    queue = InMemoryQueue.from_settings(settings)
+    queue_processor = QueueProcessor(queue, settings, hail_client, ledger)
+    app.state.queue_processor = queue_processor
+    metrics.register_collector("queue", queue.stats)
+    metrics.register_collector("queue_pipeline", queue_processor.pipeline.stats)
+
+    # Evaluate readiness in the background so probes are served from a snapshot
+    readiness_monitor = ReadinessMonitor(queue, hail_client, settings)
+    app.state.readiness_monitor = readiness_monitor
+    readiness_monitor.start()
+
+    # Publish this process' metrics so they can be aggregated across workers
+    metrics_publisher = None
+    if settings.metrics_dir:
+        metrics_publisher = asyncio.create_task(
+            metrics.run_publisher(settings.metrics_dir, settings.metrics_flush_interval)
+        )
+
+    try:
+        # Start the queue processor if enabled
+        if settings.queue_enabled:
+            logger.info("Starting queue processor...")
+            async with queue_processor.lifespan():
+                logger.info("Queue processor started")
+                yield
+                logger.info("Shutting down queue processor...")
+            logger.info("Queue processor stopped")
+        else:
+            logger.info("Queue processor disabled")
             yield
-            logger.info("Shutting down queue processor...")
-        logger.info("Queue processor stopped")
-    else:
-        logger.info("Queue processor disabled")
-        yield
+    finally:
+        await readiness_monitor.stop()
+        if metrics_publisher is not None:
+            metrics_publisher.cancel()
+            await asyncio.gather(metrics_publisher, return_exceptions=True)
+        if settings.profiling_enabled:
+            await app.state.loop_lag_monitor.stop()
+        if ledger is not None:
+            await ledger.stop()
+        await hail_client.aclose()
 
 
 def create_app() -> FastAPI:
@@ -55,11 +106,17 @@ def create_app() -> FastAPI:
 
     Returns:
         Configured FastAPI application
+
+    Raises:
+        ValueError: When the profiling endpoints are enabled with the default admin key
     """
     settings = get_settings()
+    if settings.profiling_enabled and settings.admin_api_key == Settings.model_fields["admin_api_key"].default:
+        # The default key is public, it would expose heap and stack dumps to anyone
+        raise ValueError("EYOS_ADMIN_API_KEY must be set to a secret when EYOS_PROFILING_ENABLED is true")
 
-    # Set log level from settings
-    set_log_level(settings.log_level)
+    # Configure non-blocking logging from settings
+    configure_logging(settings.log_level, settings.log_format, settings.log_sample_rates)
 
     # Initialize FastAPI application
     app = FastAPI(
@@ -69,6 +126,9 @@ def create_app() -> FastAPI:
         lifespan=lifespan,
     )
 
+    # Settings are read once per application instead of from the environment and .env on every request
+    app.dependency_overrides[get_settings] = lambda: settings
+
     # Add CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -82,26 +142,35 @@ def create_app() -> FastAPI:
 
     # Include routers
     app.include_router(newstore.router)
+    app.include_router(metrics_router.router)
+    app.include_router(health.router)
 
     # Include mock routers only in development mode
+    # Optional routers are imported on demand to keep startup fast
     if settings.hail_api_base_url == "mock":
+        from eyos.routers import hail_mock
+
         app.include_router(hail_mock.router)
 
+    # Include admin profiling endpoints only when explicitly enabled
+    if settings.profiling_enabled:
+        from eyos.routers import admin
+
+        app.include_router(admin.router)
+
+    # Build details do not change while the process runs, so the response is rendered once
+    index_response = CachedResponse.from_content(environment_details())
+
     @app.get(
         "/",
         summary="Status",
         responses={200: {"content": {"application/json": {"example": {"status": "OK"}}}}},
     )
-    async def index() -> Dict[str, Any]:
+    async def index(request: Request) -> Response:
         """
         Show application status and version information.
         """
-        return {
-            "status": "OK",
-            "git_hash": "unknown",
-            "image_build_date": "unknown",
-            "version": settings.api_version
-        }
+        return index_response.respond(request)
 
     return app
 
@@ -110,4 +179,7 @@ def create_app() -> FastAPI:
 app = create_app()
 
 if __name__ == "__main__":
+    # Prefer `python -m eyos`, which starts the CLI without building the application first
+    from eyos.commands.cli import cli_app
+
     cli_app()
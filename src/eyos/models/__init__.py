@@ -1,9 +1,12 @@
 from eyos.models.hail import HailTransaction, Receipt, SaleItem, Tax
-from eyos.models.newstore import NewStoreEvent, OrderItem, OrderPayload
+from eyos.models.money import Money
+from eyos.models.newstore import NewStoreEvent, NewStoreEventEnvelope, OrderItem, OrderPayload
 
 __all__ = [
     "HailTransaction",
+    "Money",
     "NewStoreEvent",
+    "NewStoreEventEnvelope",
     "OrderItem",
     "OrderPayload",
     "Receipt",
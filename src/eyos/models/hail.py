@@ -2,9 +2,11 @@ from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel
 
+from eyos.models.money import Money
+
 
 class Amount(BaseModel):
-    value: float
+    value: Money
     unit: Optional[str] = None
 
 
@@ -42,7 +44,7 @@ class SaleItem(BaseModel):
     header: str
     footer: Optional[str] = ""
     quantity: Dict[str, Any]
-    total: Dict[str, float]
+    total: Dict[str, Money]
     sku: str
     currency: Currency
     salesperson: Optional[Associate] = None
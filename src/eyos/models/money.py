@@ -0,0 +1,253 @@
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, Dict, Optional, Tuple, Type, Union, overload
+
+from pydantic import GetCoreSchemaHandler, GetJsonSchemaHandler
+from pydantic.json_schema import JsonSchemaValue
+from pydantic_core import core_schema
+
+# ISO 4217 currencies whose minor unit is not the cent, all others use 2 decimals
+CURRENCY_EXPONENTS: Dict[str, int] = {
+    "BIF": 0, "CLP": 0, "DJF": 0, "GNF": 0, "ISK": 0, "JPY": 0, "KMF": 0, "KRW": 0, "PYG": 0,
+    "RWF": 0, "UGX": 0, "UYI": 0, "VND": 0, "VUV": 0, "XAF": 0, "XOF": 0, "XPF": 0,
+    "BHD": 3, "IQD": 3, "JOD": 3, "KWD": 3, "LYD": 3, "OMR": 3, "TND": 3,
+}
+
+# Most decimals kept when an amount is parsed, beyond that amounts are rounded
+MAX_EXPONENT = 6
+
+_SCALES = tuple(10**exponent for exponent in range(MAX_EXPONENT + 1))
+
+Number = Union[int, float, str, Decimal]
+
+
+def currency_exponent(code: Optional[str]) -> int:
+    """
+    Get the number of decimals of a currency.
+
+    Args:
+        code: ISO 4217 currency code
+
+    Returns:
+        The exponent of the currency's minor unit, 2 for unknown currencies
+    """
+    return CURRENCY_EXPONENTS.get((code or "").upper(), 2)
+
+
+# Builds amounts without going through Money.__new__ on hot paths, e.g. validation
+_new = float.__new__
+
+
+def _divide(amount: int, divisor: int) -> int:
+    """Divide an integer by a positive integer, rounding half away from zero."""
+    quotient = (2 * abs(amount) + divisor) // (2 * divisor)
+    return quotient if amount >= 0 else -quotient
+
+
+class Money(float):
+    """
+    An exact amount of money, stored as an integer number of minor units.
+
+    `Money(1999, 2)` is 19.99. Amounts are parsed with as many decimals as
+    they are written with, at least two, so arithmetic on them is exact and
+    rounding only happens where it is asked for, with `quantize` or division.
+
+    Money is also the float nearest to the amount, which is exact up to
+    9,007,199,254 major units at six decimals. Serialization, hashing and
+    comparisons therefore run at float speed and give the same JSON numbers
+    as the float fields it replaces, while `+`, `-`, integer `*` and `/`
+    work on the minor units. Other float operations return plain floats.
+    """
+
+    __slots__ = ("exponent", "minor")
+
+    exponent: int
+    minor: int
+
+    def __new__(cls, minor: int, exponent: int = 2) -> "Money":
+        """
+        Create an amount.
+
+        Args:
+            minor: Number of minor units
+            exponent: Decimals of the minor unit, 2 for cents
+        """
+        return _money(minor, exponent, cls)
+
+    def __reduce__(self) -> Tuple[Any, Tuple[int, int]]:
+        return Money, (self.minor, self.exponent)
+
+    @classmethod
+    def from_number(cls, value: Number) -> "Money":
+        """
+        Parse an amount, keeping the decimals it is written with.
+
+        Args:
+            value: The amount in major units
+
+        Returns:
+            The amount
+
+        Raises:
+            ValueError: When the value is not a finite number
+        """
+        if type(value) is float:
+            # Fast path for whole cents, the binary error of e.g. 19.99 is absorbed by rounding
+            try:
+                minor = round(value * 100)
+            except (OverflowError, ValueError) as e:
+                raise ValueError(f"Invalid amount: {value!r}") from e
+            if minor / 100 == value:
+                money = _new(cls, value)
+                money.minor = minor
+                money.exponent = 2
+                return money
+            # The shortest representation of a float is the decimal it was written as
+            value = repr(value)
+        elif isinstance(value, Money):
+            return value
+        elif isinstance(value, float):
+            value = repr(float(value))
+        elif isinstance(value, int) and not isinstance(value, bool):
+            return cls(value * 100, 2)
+
+        try:
+            decimal = Decimal(value)
+        except InvalidOperation as e:
+            raise ValueError(f"Invalid amount: {value!r}") from e
+        if not decimal.is_finite():
+            raise ValueError(f"Invalid amount: {value!r}")
+
+        exponent = min(max(2, -int(decimal.as_tuple().exponent)), MAX_EXPONENT)
+        minor = int((decimal * _SCALES[exponent]).to_integral_value(ROUND_HALF_UP))
+        return cls(minor, exponent)
+
+    def quantize(self, exponent: int) -> "Money":
+        """
+        Round to a number of decimals, half away from zero.
+
+        Args:
+            exponent: Decimals to keep, e.g. `currency_exponent("GBP")`
+
+        Returns:
+            The rounded amount
+        """
+        if exponent == self.exponent:
+            return self
+        if exponent > self.exponent:
+            return _money(self.minor * _SCALES[exponent - self.exponent], exponent)
+        return _money(_divide(self.minor, _SCALES[self.exponent - exponent]), exponent)
+
+    def _align(self, other: "Money") -> Tuple[int, int, int]:
+        if self.exponent == other.exponent:
+            return self.minor, other.minor, self.exponent
+        exponent = max(self.exponent, other.exponent)
+        return (
+            self.minor * _SCALES[exponent - self.exponent],
+            other.minor * _SCALES[exponent - other.exponent],
+            exponent,
+        )
+
+    @staticmethod
+    def _coerce(other: Any) -> Optional["Money"]:
+        if isinstance(other, Money):
+            return other
+        if isinstance(other, (int, float, Decimal)) and not isinstance(other, bool):
+            return Money.from_number(other)
+        return None
+
+    def __add__(self, other: Any) -> "Money":
+        if other.__class__ is Money and other.exponent == self.exponent:
+            return _money(self.minor + other.minor, self.exponent)
+        money = self._coerce(other)
+        if money is None:
+            return NotImplemented
+        left, right, exponent = self._align(money)
+        return _money(left + right, exponent)
+
+    # Supports sum(), which starts from 0
+    __radd__ = __add__
+
+    def __sub__(self, other: Any) -> "Money":
+        if other.__class__ is Money and other.exponent == self.exponent:
+            return _money(self.minor - other.minor, self.exponent)
+        money = self._coerce(other)
+        if money is None:
+            return NotImplemented
+        left, right, exponent = self._align(money)
+        return _money(left - right, exponent)
+
+    def __rsub__(self, other: Any) -> "Money":
+        difference: Money = -self + other
+        return difference
+
+    def __neg__(self) -> "Money":
+        return _money(-self.minor, self.exponent)
+
+    def __mul__(self, other: Any) -> "Money":
+        if isinstance(other, int) and not isinstance(other, bool):
+            return _money(self.minor * other, self.exponent)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    @overload
+    def __truediv__(self, other: int) -> "Money": ...
+
+    @overload
+    def __truediv__(self, other: float) -> float: ...
+
+    def __truediv__(self, other: Any) -> float:
+        """
+        Divide by a positive integer, e.g. a quantity, rounding half away from zero.
+
+        Dividing by an amount or a float gives a plain float, e.g. the ratio of two amounts.
+        """
+        if isinstance(other, int) and not isinstance(other, bool):
+            if other <= 0:
+                raise ZeroDivisionError("Money can only be divided by a positive integer")
+            return _money(_divide(self.minor, other), self.exponent)
+        if isinstance(other, Money):
+            # Exact ratio of the minor units, the reflected float division is skipped between Money
+            left, right, _ = self._align(other)
+            return left / right
+        if isinstance(other, float):
+            return float(self) / other
+        return NotImplemented
+
+    def to_decimal(self) -> Decimal:
+        """Get the exact amount as a Decimal."""
+        return Decimal(self.minor).scaleb(-self.exponent)
+
+    def __str__(self) -> str:
+        return str(self.to_decimal())
+
+    def __repr__(self) -> str:
+        return f"Money('{self}')"
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: GetCoreSchemaHandler) -> core_schema.CoreSchema:
+        """Validate numbers into Money and serialize Money as a JSON number."""
+        from_number = core_schema.no_info_after_validator_function(
+            cls.from_number, core_schema.float_schema(allow_inf_nan=False)
+        )
+        return core_schema.json_or_python_schema(
+            json_schema=from_number,
+            python_schema=core_schema.union_schema([core_schema.is_instance_schema(cls), from_number]),
+            # Serialized natively as the float it is, without a call back into Python
+            serialization=core_schema.simple_ser_schema("float"),
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(
+        cls, schema: core_schema.CoreSchema, handler: GetJsonSchemaHandler
+    ) -> JsonSchemaValue:
+        """Document amounts as numbers."""
+        return {"type": "number"}
+
+
+def _money(minor: int, exponent: int, cls: Type[Money] = Money) -> Money:
+    """Create an amount, cheaper than calling the class on hot paths."""
+    money = _new(cls, minor / _SCALES[exponent])
+    money.minor = minor
+    money.exponent = exponent
+    return money
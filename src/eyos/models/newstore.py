@@ -3,6 +3,8 @@ from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
+from eyos.models.money import Money
+
 
 class Address(BaseModel):
     first_name: str
@@ -18,7 +20,7 @@ class Address(BaseModel):
 
 class TaxProviderDetail(BaseModel):
     name: str
-    amount: float
+    amount: Money
     rate: float
 
 
@@ -27,11 +29,11 @@ class OrderItem(BaseModel):
     item_type: str
     product_id: str
     pricebook_id: str
-    pricebook_price: float
-    list_price: float
-    item_discounts: float
-    order_discounts: float
-    tax: float
+    pricebook_price: Money
+    list_price: Money
+    item_discounts: Money
+    order_discounts: Money
+    tax: Money
     tax_provider_details: List[TaxProviderDetail]
     tax_class: str
     quantity: int
@@ -48,7 +50,7 @@ class Payment(BaseModel):
     payment_method: str
     card_brand: Optional[str] = None
     card_last4: Optional[str] = None
-    amount: float
+    amount: Money
     currency: str
     status: str
 
@@ -72,12 +74,12 @@ class OrderPayload(BaseModel):
     billing_address: Address
     shipping_address: Address
     price_method: str
-    subtotal: float
-    discount_total: float
-    shipping_total: float
-    shipping_tax: float
-    tax_total: float
-    grand_total: float
+    subtotal: Money
+    discount_total: Money
+    shipping_total: Money
+    shipping_tax: Money
+    tax_total: Money
+    grand_total: Money
     currency: str
     tax_strategy: str
     tax_exempt: bool
@@ -91,3 +93,27 @@ class NewStoreEvent(BaseModel):
     name: str
     published_at: datetime
     payload: OrderPayload
+
+
+class ItemEnvelope(BaseModel):
+    """An order item whose fields are validated later, with the full event."""
+
+
+class OrderEnvelope(BaseModel):
+    id: str
+    channel_type: Optional[str] = None
+    is_historical: bool = False
+    items: List[ItemEnvelope]
+
+
+class NewStoreEventEnvelope(BaseModel):
+    """
+    The fields of a NewStore event needed to accept and route it.
+
+    Validating the envelope skips the nested items, addresses, payments and
+    timestamps, which are only validated by the worker that processes the event.
+    """
+
+    tenant: str
+    name: str
+    payload: OrderEnvelope
@@ -1,7 +1,24 @@
-from eyos.routers.hail_mock import router as hail_mock_router
-from eyos.routers.newstore import router as newstore_router
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from fastapi import APIRouter
 
 __all__ = [
+    "admin_router",
     "hail_mock_router",
+    "health_router",
+    "metrics_router",
     "newstore_router"
 ]
+
+
+def __getattr__(name: str) -> "APIRouter":
+    """Import routers on first access, so optional routers cost nothing at startup."""
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import importlib
+
+    module: Any = importlib.import_module(f"{__name__}.{name.removesuffix('_router')}")
+    router: APIRouter = module.router
+    return router
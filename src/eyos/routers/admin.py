@@ -0,0 +1,165 @@
+import asyncio
+import hmac
+import logging
+import threading
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+
+from eyos.config import Settings, get_settings
+from eyos.services.profiling import CpuSampler, LoopLagMonitor, MemoryProfiler, TaskTracker
+
+logger = logging.getLogger(__name__)
+
+
+def require_admin(
+    x_admin_token: str = Header(default=""),
+    settings: Settings = Depends(get_settings),
+) -> None:
+    """Dependency that rejects requests without a valid admin token."""
+    if not hmac.compare_digest(x_admin_token.encode(), settings.admin_api_key.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
+router = APIRouter(
+    prefix="/admin/profiling",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+    responses={
+        403: {"description": "Forbidden"},
+        409: {"description": "Conflict"},
+    }
+)
+
+# Only one CPU profile may run at a time, since concurrent samplers skew each other
+_cpu_profile_lock = asyncio.Lock()
+memory_profiler = MemoryProfiler()
+
+
+@router.get(
+    "/cpu",
+    summary="Sample the event loop thread's CPU usage",
+)
+async def cpu_profile(
+    seconds: float = Query(default=5.0, gt=0, le=120),
+    interval_ms: float = Query(default=5.0, ge=1, le=1000),
+    limit: int = Query(default=50, ge=1, le=1000),
+) -> Dict[str, Any]:
+    """
+    Run a statistical CPU profile of the event loop thread.
+
+    Stacks are sampled from a background thread while the event loop keeps
+    serving requests, so the profile reflects real traffic.
+
+    Args:
+        seconds: Profiling duration
+        interval_ms: Milliseconds between samples
+        limit: Maximum number of stacks and functions to return
+
+    Returns:
+        The most frequent stacks and functions seen on CPU
+    """
+    if _cpu_profile_lock.locked():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A CPU profile is already running")
+
+    async with _cpu_profile_lock:
+        sampler = CpuSampler(threading.get_ident(), interval_ms / 1000)
+        logger.info("Starting CPU profile for %.1f seconds", seconds)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+
+    return sampler.report(limit)
+
+
+@router.post(
+    "/tracemalloc/start",
+    summary="Start tracing memory allocations",
+)
+async def tracemalloc_start(frames: int = Query(default=1, ge=1, le=50)) -> Dict[str, Any]:
+    """
+    Start tracemalloc and take the baseline snapshot for later diffs.
+
+    Args:
+        frames: Number of frames stored per allocation traceback
+
+    Returns:
+        The tracing status
+    """
+    memory_profiler.start(frames)
+    return {"tracing": True}
+
+
+@router.get(
+    "/tracemalloc/diff",
+    summary="Compare current allocations against the baseline",
+)
+async def tracemalloc_diff(
+    key_type: Literal["filename", "lineno", "traceback"] = "lineno",
+    limit: int = Query(default=25, ge=1, le=1000),
+) -> Dict[str, Any]:
+    """
+    Diff a fresh tracemalloc snapshot against the baseline.
+
+    Args:
+        key_type: How allocations are grouped
+        limit: Maximum number of entries to return
+
+    Returns:
+        The largest allocation changes since tracing started
+    """
+    if memory_profiler.baseline is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="tracemalloc is not started")
+
+    # Snapshots walk every traced block, keep that off the event loop
+    return await asyncio.to_thread(memory_profiler.diff, key_type, limit)
+
+
+@router.post(
+    "/tracemalloc/stop",
+    summary="Stop tracing memory allocations",
+)
+async def tracemalloc_stop() -> Dict[str, Any]:
+    """Stop tracemalloc and release its memory."""
+    memory_profiler.stop()
+    return {"tracing": False}
+
+
+@router.get(
+    "/tasks",
+    summary="List pending asyncio tasks",
+)
+async def task_dump(request: Request) -> List[Dict[str, Any]]:
+    """
+    List all pending asyncio tasks, oldest first.
+
+    Args:
+        request: The HTTP request
+
+    Returns:
+        The coroutine, age and current location of each task
+    """
+    task_tracker: TaskTracker = getattr(request.app.state, "task_tracker", None) or TaskTracker()
+    return task_tracker.dump()
+
+
+@router.get(
+    "/loop-lag",
+    summary="Event loop stall histogram",
+)
+async def loop_lag(request: Request) -> Dict[str, Any]:
+    """
+    Report event loop lag measured by the background monitor.
+
+    Args:
+        request: The HTTP request
+
+    Returns:
+        The stall histogram and most recent stalls
+    """
+    monitor: Optional[LoopLagMonitor] = getattr(request.app.state, "loop_lag_monitor", None)
+    if monitor is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Loop lag monitor is not running")
+    return monitor.report()
@@ -1,18 +1,105 @@
 import logging
-from typing import Any, Dict
+from collections import OrderedDict
+from typing import Any, Callable, Coroutine, Dict, Optional
 
-from fastapi import APIRouter, Body, status
+from fastapi import APIRouter, Body, Header, HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
 
 from eyos.models import HailTransaction
+from eyos.utils.compression import decompress
 
 logger = logging.getLogger(__name__)
 
+# Largest decoded request body accepted, so a small compressed body cannot expand without bound
+MAX_DECODED_BODY_SIZE = 16 * 1024 * 1024
+# Idempotency keys remembered, the oldest are forgotten first
+IDEMPOTENCY_CACHE_SIZE = 10_000
+
+
+class IdempotencyCache:
+    """Responses of recent requests by idempotency key, bounded to the most recent keys."""
+
+    def __init__(self, max_size: int) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_size: Most keys remembered
+        """
+        self.max_size = max_size
+        self.responses: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the response of an earlier request.
+
+        Args:
+            key: The idempotency key
+
+        Returns:
+            The response, None when the key was not seen or was forgotten
+        """
+        response = self.responses.get(key)
+        if response is not None:
+            self.responses.move_to_end(key)
+        return response
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        """
+        Remember the response of a request.
+
+        Args:
+            key: The idempotency key
+            response: The response
+        """
+        self.responses[key] = response
+        self.responses.move_to_end(key)
+        if len(self.responses) > self.max_size:
+            self.responses.popitem(last=False)
+
+
+idempotency_cache = IdempotencyCache(IDEMPOTENCY_CACHE_SIZE)
+
+
+class DecodedRequest(Request):
+    """Request whose body is decoded according to its Content-Encoding header."""
+
+    async def body(self) -> bytes:
+        """Read the body and decode it once."""
+        if not hasattr(self, "_decoded_body"):
+            encoding = self.headers.get("content-encoding", "")
+            raw = await super().body()
+            try:
+                self._decoded_body = decompress(raw, encoding, MAX_DECODED_BODY_SIZE)
+            except ValueError as e:
+                status_code = 415 if str(e).startswith("Unsupported") else 400
+                raise HTTPException(status_code=status_code, detail=str(e)) from e
+            if encoding:
+                logger.debug("Decoded %s request body: %d -> %d bytes", encoding, len(raw), len(self._decoded_body))
+        return self._decoded_body
+
+
+class DecodingRoute(APIRoute):
+    """Route that accepts gzip, deflate and zstd encoded request bodies like the Hail API."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        """Wrap the handler so it receives a decoding request."""
+        handler = super().get_route_handler()
+
+        async def decoding_handler(request: Request) -> Response:
+            return await handler(DecodedRequest(request.scope, request.receive))
+
+        return decoding_handler
+
+
 router = APIRouter(
     prefix="/mock/hail",
     tags=["mock"],
+    route_class=DecodingRoute,
     responses={
         404: {"description": "Not found"},
         400: {"description": "Bad request"},
+        415: {"description": "Unsupported content encoding"},
         500: {"description": "Internal server error"},
     }
 )
@@ -24,34 +111,54 @@ router = APIRouter(
     summary="Mock Hail API transaction endpoint",
 )
 async def mock_hail_transaction(
-    transaction: HailTransaction = Body(...)
+    response: Response,
+    transaction: HailTransaction = Body(...),
+    idempotency_key: Optional[str] = Header(None),
 ) -> Dict[str, Any]:
     """
     Mock endpoint for the Hail API transaction endpoint.
 
     This endpoint simulates the behavior of the Hail API for testing purposes.
+    Compressed bodies are decoded before validation, so a body that does not
+    decompress to a valid transaction is rejected. A transaction sent again
+    with the same Idempotency-Key is not processed again: the first response
+    is returned with an `Idempotent-Replayed: true` header.
 
     Args:
+        response: The response, for its headers
         transaction: The transaction to process
+        idempotency_key: Key identifying retries of the same transaction
 
     Returns:
         A mock response from the Hail API
     """
+    if idempotency_key is not None:
+        replayed = idempotency_cache.get(idempotency_key)
+        if replayed is not None:
+            logger.info("Replayed transaction: %s", transaction.receipt.transaction_information.id)
+            response.headers["Idempotent-Replayed"] = "true"
+            return replayed
+
     # Log the receipt for debugging
-    logger.info(f"Received transaction: {transaction.receipt.transaction_information.id}")
+    logger.info("Received transaction: %s", transaction.receipt.transaction_information.id)
 
     # Log some details for debugging
-    logger.debug(
-        f"Transaction details:\n"
-        f"- Device: {transaction.device_ref}\n"
-        f"- Total: {transaction.receipt.total.amount.value} {transaction.receipt.total.amount.unit}\n"
-        f"- Items: {len(transaction.receipt.sale_items)}\n"
-        f"- Delivery: {[ch.channel for ch in transaction.delivery_channels]}"
-    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Transaction details:\n- Device: %s\n- Total: %s %s\n- Items: %d\n- Delivery: %s",
+            transaction.device_ref,
+            transaction.receipt.total.amount.value,
+            transaction.receipt.total.amount.unit,
+            len(transaction.receipt.sale_items),
+            [ch.channel for ch in transaction.delivery_channels],
+        )
 
     # Simulate processing the transaction
-    return {
+    result = {
         "status": "success",
         "transaction_id": transaction.receipt.transaction_information.id,
         "message": "Transaction processed successfully"
     }
+    if idempotency_key is not None:
+        idempotency_cache.put(idempotency_key, result)
+    return result
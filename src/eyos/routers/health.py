@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Request, Response
+
+from eyos.services.health import CachedResponse
+
+router = APIRouter(
+    prefix="/health",
+    tags=["monitoring"],
+)
+
+_LIVE = CachedResponse.from_content({"status": "alive"})
+
+
+@router.get(
+    "/live",
+    summary="Liveness probe",
+    responses={200: {"content": {"application/json": {"example": {"status": "alive"}}}}},
+)
+async def live(request: Request) -> Response:
+    """
+    Report that the process is running and its event loop is responsive.
+    """
+    return _LIVE.respond(request)
+
+
+@router.get(
+    "/ready",
+    summary="Readiness probe",
+    responses={
+        200: {"description": "Ready to receive events"},
+        304: {"description": "Not modified since the ETag in If-None-Match"},
+        503: {"description": "Not ready, see the failing checks"},
+    },
+)
+async def ready(request: Request) -> Response:
+    """
+    Report whether the process should receive traffic.
+
+    The result is computed periodically in the background, see `ReadinessMonitor`.
+    """
+    snapshot: CachedResponse = request.app.state.readiness_monitor.snapshot
+    return snapshot.respond(request)
@@ -0,0 +1,36 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from eyos.config import Settings, get_settings
+from eyos.services.metrics import aggregate_published, metrics
+
+router = APIRouter(
+    tags=["monitoring"],
+)
+
+
+@router.get(
+    "/metrics",
+    summary="Service metrics",
+)
+async def get_metrics(
+    aggregate: bool = Query(default=False),
+    settings: Settings = Depends(get_settings),
+) -> Dict[str, Any]:
+    """
+    Show the counters and gauges of this process, or of all worker processes.
+
+    Args:
+        aggregate: Sum the counters published by every worker process, with gauges labelled by pid
+        settings: Application settings
+
+    Returns:
+        A snapshot of the metrics registry
+    """
+    if not aggregate:
+        return metrics.snapshot()
+
+    if settings.metrics_dir is None:
+        raise HTTPException(status_code=400, detail="Metrics publication is not configured")
+    return aggregate_published(settings.metrics_dir)
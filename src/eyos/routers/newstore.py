@@ -1,13 +1,18 @@
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Union
 
-from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 
 from eyos.config import Settings, get_settings
-from eyos.models.newstore import NewStoreEvent
+from eyos.exceptions.queue import QueueOverloadedError
+from eyos.models.newstore import NewStoreEvent, NewStoreEventEnvelope
 from eyos.services.hail_client import HailClient
+from eyos.services.ledger import DeliveryLedger, DeliveryState
+from eyos.services.metrics import metrics
 from eyos.services.newstore_webhook import NewStoreWebhookHandler
 from eyos.services.queue_processor import InMemoryQueue, QueueProcessor
+from eyos.services.queued_event import QueuedEvent
+from eyos.services.request_body import RequestBody
 
 logger = logging.getLogger(__name__)
 
@@ -17,70 +22,109 @@ router = APIRouter(
     responses={
         404: {"description": "Not found"},
         400: {"description": "Bad request"},
+        413: {"description": "Request body too large"},
         500: {"description": "Internal server error"},
         202: {"description": "Accepted for processing"},
+        503: {"description": "Queue overloaded, retry after the given delay"},
     }
 )
 
 
-def get_webhook_handler() -> NewStoreWebhookHandler:
-    """Dependency for the webhook handler."""
-    settings = get_settings()
-    hail_client = HailClient(settings)
-    return NewStoreWebhookHandler(settings, hail_client)
+def get_webhook_handler(request: Request, settings: Settings = Depends(get_settings)) -> NewStoreWebhookHandler:
+    """Dependency for the webhook handler, using the process' pooled Hail client."""
+    hail_client: Optional[HailClient] = getattr(request.app.state, "hail_client", None)
+    return NewStoreWebhookHandler(settings, hail_client or HailClient(settings))
 
 
-def get_queue_processor() -> QueueProcessor:
-    """Dependency for the queue processor."""
-    settings = get_settings()
-    queue = InMemoryQueue()
-    return QueueProcessor(queue, settings)
+def get_queue_processor(request: Request, settings: Settings = Depends(get_settings)) -> QueueProcessor:
+    """Dependency for the queue processor shared with the application lifespan."""
+    queue_processor: Optional[QueueProcessor] = getattr(request.app.state, "queue_processor", None)
+    if queue_processor is None:
+        queue_processor = QueueProcessor(InMemoryQueue.from_settings(settings), settings)
+    return queue_processor
 
 
-@router.post(
-    "/",
-    status_code=202,
-    summary="Process NewStore webhook event",
-)
-async def process_webhook(
-    request: Request,
-    background_tasks: BackgroundTasks,
-    event: NewStoreEvent = Body(...),
-    webhook_handler: NewStoreWebhookHandler = Depends(get_webhook_handler),
-    queue_processor: QueueProcessor = Depends(get_queue_processor),
-    settings: Settings = Depends(get_settings)
+def get_ledger(request: Request) -> Optional[DeliveryLedger]:
+    """Dependency for the delivery ledger, None when it is disabled."""
+    ledger: Optional[DeliveryLedger] = getattr(request.app.state, "ledger", None)
+    return ledger
+
+
+def _inline_schema(schema: Any, definitions: Dict[str, Any]) -> Any:
+    """Replace the `$defs` references of a JSON schema with the definitions themselves."""
+    if isinstance(schema, dict):
+        if "$ref" in schema:
+            return _inline_schema(definitions[schema["$ref"].rsplit("/", 1)[-1]], definitions)
+        return {key: _inline_schema(value, definitions) for key, value in schema.items() if key != "$defs"}
+    if isinstance(schema, list):
+        return [_inline_schema(value, definitions) for value in schema]
+    return schema
+
+
+# The body is read raw, so its schema is documented explicitly
+_event_schema = NewStoreEvent.model_json_schema()
+_EVENT_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": _inline_schema(_event_schema, _event_schema.get("$defs", {}))}},
+    }
+}
+
+
+async def _handle_event(
+    body: bytes,
+    webhook_handler: NewStoreWebhookHandler,
+    queue_processor: QueueProcessor,
+    settings: Settings,
+    ledger: Optional[DeliveryLedger] = None,
 ) -> Dict[str, Any]:
     """
-    Process a webhook event from NewStore.
+    Accept or process a raw webhook event.
 
-    This endpoint accepts events from NewStore's webhook system and
-    processes them asynchronously. The event is validated and transformed
-    into a format suitable for the Hail API.
+    With the queue enabled only the event envelope is validated before the raw
+    body is queued, and the full event is validated by the worker. Without the
+    queue the full event is validated and processed before responding.
 
     Args:
-        request: The HTTP request
-        background_tasks: FastAPI's background tasks
-        event: The webhook event from NewStore
+        body: The raw request body
         webhook_handler: Service for handling webhook events
         queue_processor: Service for processing events in background
         settings: Application settings
+        ledger: Ledger recording the delivery of the event, None to not record it
 
     Returns:
         A dictionary with the status of the request
     """
+    # Shed load before doing any work if the queue cannot hold more events
+    if settings.queue_enabled and queue_processor.queue.is_overloaded():
+        metrics.increment("queue_shed_total")
+        raise QueueOverloadedError(queue_processor.queue.retry_after(), queue_processor.queue.shed_status_code)
+
+    # Validation errors are answered by the registered pydantic exception handler
+    event: Union[NewStoreEvent, NewStoreEventEnvelope]
+    if settings.queue_enabled:
+        event = NewStoreEventEnvelope.model_validate_json(body)
+    else:
+        event = NewStoreEvent.model_validate_json(body)
+
     # Validate the event
     try:
         await webhook_handler.validate_event(event)
     except Exception as e:
-        logger.info(
-            f"Validation failed for {event.name} event for order {event.payload.id}: {e!s}"
-        )
+        logger.info("Validation failed for %s event for order %s: %s", event.name, event.payload.id, e)
         raise HTTPException(status_code=400, detail=f"Invalid event: {e!s}") from e
 
+    def record(state: DeliveryState, detail: Optional[str] = None) -> None:
+        if ledger is not None:
+            ledger.record(event.tenant, event.payload.id, event.name, state, detail)
+
+    record(DeliveryState.RECEIVED)
+
     # Use the queue for async processing if enabled
-    if settings.queue_enabled:
-        # Add the event to the queue for processing
-        await queue_processor.enqueue_event(event.dict())
+    if isinstance(event, NewStoreEventEnvelope):
+        # Queue the raw event, it is only parsed in full by the worker
+        await queue_processor.queue.enqueue(QueuedEvent.from_json(body, event))
+        record(DeliveryState.QUEUED)
 
         return {
             "status": "accepted",
@@ -90,11 +134,11 @@ async def process_webhook(
     else:
         # Process the event directly
         try:
+            record(DeliveryState.SENT)
             result = await webhook_handler.process_event(event)
+            record(DeliveryState.ACKED, result["transaction_id"])
 
-            logger.info(
-                f"Successfully processed {event.name} event for order {event.payload.id}"
-            )
+            logger.info("Successfully processed %s event for order %s", event.name, event.payload.id)
 
             return {
                 "status": "processed",
@@ -103,52 +147,118 @@ async def process_webhook(
                 "result": result
             }
         except Exception as e:
-            logger.error(f"Error processing event directly: {e!s}")
+            logger.error("Error processing event directly: %s", e)
+            record(DeliveryState.FAILED, str(getattr(e, "detail", e)))
             raise HTTPException(
                 status_code=500,
                 detail=f"Error processing event: {e!s}"
             ) from e
 
 
+@router.post(
+    "/",
+    status_code=202,
+    summary="Process NewStore webhook event",
+    openapi_extra=_EVENT_REQUEST_BODY,
+)
+async def process_webhook(
+    request: Request,
+    body: bytes = Depends(RequestBody("webhook", NewStoreEvent)),
+    webhook_handler: NewStoreWebhookHandler = Depends(get_webhook_handler),
+    queue_processor: QueueProcessor = Depends(get_queue_processor),
+    settings: Settings = Depends(get_settings),
+    ledger: Optional[DeliveryLedger] = Depends(get_ledger),
+) -> Dict[str, Any]:
+    """
+    Process a webhook event from NewStore.
+
+    This endpoint accepts events from NewStore's webhook system and
+    processes them asynchronously. The body is read within the route's size
+    limit, its signature is checked, then the event is validated and
+    transformed into a format suitable for the Hail API.
+
+    Args:
+        request: The HTTP request
+        body: The raw request body
+        webhook_handler: Service for handling webhook events
+        queue_processor: Service for processing events in background
+        settings: Application settings
+        ledger: Ledger recording the delivery of the event
+
+    Returns:
+        A dictionary with the status of the request
+    """
+    await webhook_handler.validate_signature(request, body)
+    return await _handle_event(body, webhook_handler, queue_processor, settings, ledger)
+
+
 @router.post(
     "/simulate",
     status_code=202,
     summary="Simulate a NewStore webhook event",
+    openapi_extra=_EVENT_REQUEST_BODY,
 )
 async def simulate_webhook(
-    background_tasks: BackgroundTasks,
-    event: NewStoreEvent = Body(...),
+    body: bytes = Depends(RequestBody("simulate", NewStoreEvent)),
     webhook_handler: NewStoreWebhookHandler = Depends(get_webhook_handler),
     queue_processor: QueueProcessor = Depends(get_queue_processor),
-    settings: Settings = Depends(get_settings)
+    settings: Settings = Depends(get_settings),
+    ledger: Optional[DeliveryLedger] = Depends(get_ledger),
 ) -> Dict[str, Any]:
     """
     Simulate a webhook event from NewStore.
 
     This endpoint behaves the same as the main webhook endpoint, but is intended
     for testing and development. It accepts the same event format and processes
-    it the same way.
+    it the same way, without requiring a signature.
 
     Args:
-        background_tasks: FastAPI's background tasks
-        event: The webhook event from NewStore
+        body: The raw request body
         webhook_handler: Service for handling webhook events
         queue_processor: Service for processing events in background
         settings: Application settings
+        ledger: Ledger recording the delivery of the event
 
     Returns:
         A dictionary with the status of the request
     """
-    logger.info(
-        f"Simulating {event.name} event for order {event.payload.id}"
-    )
+    logger.info("Simulating webhook event")
 
     # Process the same as a real webhook
-    return await process_webhook(
-        request=Request(scope={"type": "http"}),  # Create a minimal request
-        background_tasks=background_tasks,
-        event=event,
-        webhook_handler=webhook_handler,
-        queue_processor=queue_processor,
-        settings=settings
-    )
+    return await _handle_event(body, webhook_handler, queue_processor, settings, ledger)
+
+
+@router.get(
+    "/status/{order_id}",
+    summary="Delivery status of an order's events",
+    responses={404: {"description": "No event recorded for the order, or the ledger is disabled"}},
+)
+async def delivery_status(
+    order_id: str,
+    tenant: Optional[str] = Query(None, description="Only events of this tenant"),
+    ledger: Optional[DeliveryLedger] = Depends(get_ledger),
+) -> Dict[str, Any]:
+    """
+    Tell whether an order's events were delivered to the Hail API.
+
+    Answered from the delivery ledger: for each tenant and event name the last
+    state, one of received, queued, sent, acked or failed, and the history of
+    steps with their times and details.
+
+    Args:
+        order_id: ID of the order
+        tenant: Only events of this tenant
+        ledger: The delivery ledger
+
+    Returns:
+        The order ID and the delivery of each of its events
+
+    Raises:
+        HTTPException: With 404 when the ledger is disabled or has no record of the order
+    """
+    if ledger is None:
+        raise HTTPException(status_code=404, detail="The delivery ledger is disabled, set EYOS_LEDGER_PATH")
+    deliveries = await ledger.status(order_id, tenant)
+    if not deliveries:
+        raise HTTPException(status_code=404, detail=f"No event recorded for order {order_id}")
+    return {"order_id": order_id, "deliveries": deliveries}
@@ -1,6 +1,7 @@
 from eyos.services.hail_client import HailClient
 from eyos.services.newstore_webhook import NewStoreWebhookHandler
 from eyos.services.queue_processor import InMemoryQueue, QueueProcessor
+from eyos.services.queued_event import QueuedEvent
 from eyos.services.transformer import transform_newstore_to_hail
 
 __all__ = [
@@ -8,5 +9,6 @@ __all__ = [
     "InMemoryQueue",
     "NewStoreWebhookHandler",
     "QueueProcessor",
+    "QueuedEvent",
     "transform_newstore_to_hail"
 ]
@@ -0,0 +1,391 @@
+import asyncio
+import json
+import logging
+import mmap
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from fastapi import HTTPException
+
+from eyos.config import Settings
+from eyos.models import HailTransaction
+from eyos.services.hail_client import HailClient
+from eyos.services.transform_worker import current_worker, init_worker
+from eyos.services.transformer import payment_token_key
+
+logger = logging.getLogger(__name__)
+
+# Characters that change the nesting state outside of strings
+_STRUCTURAL = re.compile(rb'[\[\]{},"]')
+# Remainder of a JSON string after its opening quote, up to and including the closing quote
+_STRING_REST = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+
+_WHITESPACE = b" \t\r\n"
+
+
+def detect_format(data: Union[bytes, mmap.mmap]) -> str:
+    """
+    Detect whether the data is a JSON array or newline-delimited JSON.
+
+    Args:
+        data: The file contents
+
+    Returns:
+        "json" for a JSON array, "ndjson" otherwise
+    """
+    match = re.compile(rb"\S").search(data)
+    return "json" if match is not None and match.group() == b"[" else "ndjson"
+
+
+def iter_ndjson(data: Union[bytes, mmap.mmap], start: int = 0) -> Iterator[Tuple[int, bytes]]:
+    """
+    Iterate over the records of newline-delimited JSON.
+
+    Args:
+        data: The file contents
+        start: Byte offset to resume from, must be the start of a line
+
+    Yields:
+        The offset just past each record and the record's raw bytes
+    """
+    size = len(data)
+    pos = start
+    while pos < size:
+        end = data.find(b"\n", pos)
+        end = size if end == -1 else end + 1
+        record = data[pos:end].strip(_WHITESPACE)
+        if record:
+            yield end, record
+        pos = end
+
+
+def iter_json_array(data: Union[bytes, mmap.mmap], start: int = 0) -> Iterator[Tuple[int, bytes]]:
+    """
+    Iterate over the elements of a top-level JSON array without parsing them.
+
+    Only structural characters are inspected and strings are skipped with a
+    single regex match, so scanning runs at close to memory speed.
+
+    Args:
+        data: The file contents
+        start: 0, or an offset previously yielded by this function to resume from
+
+    Yields:
+        The offset just past each element's separator and the element's raw bytes
+    """
+    depth = 0 if start == 0 else 1
+    element_start = start
+    pos = start
+
+    while True:
+        match = _STRUCTURAL.search(data, pos)
+        if match is None:
+            return
+        char = match.group()
+        pos = match.end()
+
+        if char == b'"':
+            string_end = _STRING_REST.match(data, pos)
+            if string_end is None:
+                raise ValueError(f"Unterminated string at offset {match.start()}")
+            pos = string_end.end()
+        elif char in b"[{":
+            depth += 1
+            if depth == 1:
+                element_start = pos
+        elif char in b"]}":
+            depth -= 1
+            if depth == 0:
+                element = data[element_start:match.start()].strip(_WHITESPACE)
+                if element:
+                    yield pos, element
+                return
+        elif depth == 1:
+            # Comma separating two top-level elements
+            element = data[element_start:match.start()].strip(_WHITESPACE)
+            if element:
+                yield pos, element
+            element_start = pos
+
+
+@dataclass
+class Checkpoint:
+    """Resume point of a backfill: every event before `offset` has been handled."""
+
+    input_path: str
+    offset: int = 0
+    sent: int = 0
+    failed: int = 0
+
+    @classmethod
+    def load(cls, path: Path, input_path: str) -> "Checkpoint":
+        """
+        Load the checkpoint for the input file, or start a new one.
+
+        Args:
+            path: The checkpoint file
+            input_path: The file being backfilled
+
+        Returns:
+            The checkpoint to resume from
+        """
+        if path.exists():
+            data = json.loads(path.read_text())
+            if data.get("input_path") == input_path:
+                return cls(**data)
+            logger.warning("Ignoring checkpoint %s written for a different input file", path)
+        return cls(input_path=input_path)
+
+    def save(self, path: Path) -> None:
+        """
+        Atomically write the checkpoint.
+
+        Args:
+            path: The checkpoint file
+        """
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(asdict(self)))
+        os.replace(tmp_path, path)
+
+
+@dataclass
+class BackfillProgress:
+    """Counters reported while a backfill runs."""
+
+    total_bytes: int
+    start_offset: int
+    offset: int = 0
+    sent: int = 0
+    failed: int = 0
+    start_events: int = 0  # Events handled by previous runs
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def events_per_second(self) -> float:
+        elapsed = time.monotonic() - self.started_at
+        return (self.sent + self.failed - self.start_events) / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        done = self.offset - self.start_offset
+        if done <= 0:
+            return None
+        elapsed = time.monotonic() - self.started_at
+        return elapsed * (self.total_bytes - self.offset) / done
+
+
+def _transform_batch(records: List[bytes]) -> List[Union[HailTransaction, str]]:
+    """Validate and transform raw events in a pool process, returning errors as strings."""
+    worker = current_worker()
+    results: List[Union[HailTransaction, str]] = []
+    for record in records:
+        try:
+            results.append(worker.transform(record))
+        except Exception as e:
+            results.append(f"{type(e).__name__}: {e}")
+    return results
+
+
+class Backfill:
+    """
+    Stream a NewStore export through the transformer to the Hail API.
+
+    The input is memory-mapped and split into raw events without parsing, so
+    memory use does not depend on the file size. Batches of raw events are
+    validated and transformed in a process pool and the resulting transactions
+    are sent with bounded concurrency. The checkpoint only advances past a batch
+    once it and every batch before it are done, so a resumed run never skips
+    an event.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        input_path: Path,
+        checkpoint_path: Path,
+        errors_path: Path,
+        concurrency: int,
+        batch_size: int,
+        processes: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize the backfill.
+
+        Args:
+            settings: Application settings
+            input_path: NDJSON or JSON array export to backfill
+            checkpoint_path: File recording the resume point
+            errors_path: NDJSON file collecting events that failed, for replay
+            concurrency: Maximum concurrent sends to the Hail API
+            batch_size: Events transformed per pool task
+            processes: Pool size, defaults to the number of CPUs
+        """
+        self.settings = settings
+        self.input_path = input_path
+        self.checkpoint_path = checkpoint_path
+        self.errors_path = errors_path
+        self.batch_size = batch_size
+        self.processes = processes or os.cpu_count() or 1
+        self.send_slots = asyncio.Semaphore(concurrency)
+        self.hail_client = HailClient(settings)
+
+        self.checkpoint = Checkpoint.load(checkpoint_path, str(input_path.resolve()))
+        self.progress = BackfillProgress(
+            total_bytes=input_path.stat().st_size,
+            start_offset=self.checkpoint.offset,
+            offset=self.checkpoint.offset,
+        )
+        # Batch id -> (end offset, done), in submission order
+        self._batches: Dict[int, Tuple[int, bool]] = {}
+
+    async def _send(self, transaction: HailTransaction) -> Optional[str]:
+        async with self.send_slots:
+            try:
+                await self.hail_client.send_transaction(transaction)
+                return None
+            except HTTPException as e:
+                return str(e.detail)
+
+    def _record_failure(self, errors_file: BinaryIO, record: bytes, error: str) -> None:
+        logger.warning("Backfill event failed: %s", error)
+        # Newlines can only appear between tokens in JSON, so this keeps the record valid
+        errors_file.write(record.replace(b"\r", b" ").replace(b"\n", b" ") + b"\n")
+        self.progress.failed += 1
+
+    async def _process_batch(
+        self,
+        batch_id: int,
+        records: List[bytes],
+        end_offset: int,
+        pool: ProcessPoolExecutor,
+        errors_file: BinaryIO,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(pool, _transform_batch, records)
+
+        send_errors = await asyncio.gather(
+            *(self._send(result) for result in results if isinstance(result, HailTransaction))
+        )
+
+        errors = iter(send_errors)
+        for record, result in zip(records, results, strict=True):
+            error = result if isinstance(result, str) else next(errors)
+            if error is None:
+                self.progress.sent += 1
+            else:
+                self._record_failure(errors_file, record, error)
+
+        self._batches[batch_id] = (end_offset, True)
+        self._advance_checkpoint()
+
+    def _advance_checkpoint(self) -> None:
+        advanced = False
+        while self._batches:
+            batch_id = next(iter(self._batches))
+            end_offset, done = self._batches[batch_id]
+            if not done:
+                break
+            del self._batches[batch_id]
+            self.checkpoint.offset = end_offset
+            advanced = True
+
+        if advanced:
+            self.checkpoint.sent = self.progress.sent
+            self.checkpoint.failed = self.progress.failed
+            self.checkpoint.save(self.checkpoint_path)
+            self.progress.offset = self.checkpoint.offset
+
+    async def run(
+        self,
+        on_progress: Optional[Callable[[BackfillProgress], None]] = None,
+        progress_interval: float = 1.0,
+    ) -> BackfillProgress:
+        """
+        Run the backfill to completion.
+
+        Args:
+            on_progress: Called periodically with the current progress
+            progress_interval: Seconds between progress callbacks
+
+        Returns:
+            The final progress counters
+        """
+        self.progress.sent = self.checkpoint.sent
+        self.progress.failed = self.checkpoint.failed
+        self.progress.start_events = self.checkpoint.sent + self.checkpoint.failed
+        if self.progress.total_bytes == 0:
+            return self.progress
+
+        reporter = None
+        if on_progress is not None:
+            async def report() -> None:
+                while True:
+                    await asyncio.sleep(progress_interval)
+                    on_progress(self.progress)
+
+            reporter = asyncio.create_task(report())
+
+        max_in_flight = self.processes * 2
+        in_flight: Set[asyncio.Task[None]] = set()
+
+        with (
+            open(self.input_path, "rb") as input_file,
+            mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as data,
+            open(self.errors_path, "ab") as errors_file,
+            ProcessPoolExecutor(
+                self.processes,
+                # Fork is unsafe here: the logging listener thread is already running
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(payment_token_key(self.settings), self.settings.tax_rates_file),
+            ) as pool,
+        ):
+            iter_records = iter_json_array if detect_format(data) == "json" else iter_ndjson
+            batch: List[bytes] = []
+            batch_id = 0
+            end_offset = self.checkpoint.offset
+
+            try:
+                for end_offset, record in iter_records(data, self.checkpoint.offset):
+                    batch.append(record)
+                    if len(batch) < self.batch_size:
+                        continue
+
+                    self._batches[batch_id] = (end_offset, False)
+                    in_flight.add(asyncio.create_task(
+                        self._process_batch(batch_id, batch, end_offset, pool, errors_file)
+                    ))
+                    batch_id += 1
+                    batch = []
+
+                    if len(in_flight) >= max_in_flight:
+                        done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                        # A batch that raised is never marked done, so the run must not carry on past it
+                        for task in done:
+                            task.result()
+
+                if batch:
+                    self._batches[batch_id] = (end_offset, False)
+                    in_flight.add(asyncio.create_task(
+                        self._process_batch(batch_id, batch, end_offset, pool, errors_file)
+                    ))
+
+                if in_flight:
+                    await asyncio.gather(*in_flight)
+            finally:
+                for task in in_flight:
+                    task.cancel()
+                if reporter is not None:
+                    reporter.cancel()
+                await self.hail_client.aclose()
+
+        self.progress.offset = self.progress.total_bytes
+        if on_progress is not None:
+            on_progress(self.progress)
+        return self.progress
@@ -0,0 +1,270 @@
+import gzip
+import logging
+import mmap
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Callable, Deque, Iterator, List, Optional, Tuple, Union, cast
+
+from eyos.services.backfill import detect_format, iter_json_array, iter_ndjson
+from eyos.services.transform_worker import current_worker, init_worker
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+# A serialized transaction, or the error and the raw event that failed
+TransformResult = Union[bytes, Tuple[str, bytes]]
+
+
+def _transform_batch_json(records: List[bytes]) -> List[TransformResult]:
+    """Transform and serialize raw events in a pool process."""
+    worker = current_worker()
+    results: List[TransformResult] = []
+    for record in records:
+        try:
+            results.append(worker.encoder.encode(worker.transform(record)))
+        except Exception as e:
+            results.append((f"{type(e).__name__}: {e}", record))
+    return results
+
+
+@dataclass
+class TransformStats:
+    """Counters reported while a bulk transform runs."""
+
+    transformed: int = 0
+    failed: int = 0
+    shards: List[Path] = field(default_factory=list)
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def events_per_second(self) -> float:
+        elapsed = self.elapsed
+        return (self.transformed + self.failed) / elapsed if elapsed > 0 else 0.0
+
+
+class ShardWriter:
+    """Write NDJSON lines to numbered shard files, starting a new shard every `shard_size` lines."""
+
+    def __init__(self, output_dir: Path, shard_size: int, compression: str = "none") -> None:
+        """
+        Initialize the writer.
+
+        Args:
+            output_dir: Directory receiving `part-NNNNN.ndjson[.gz|.zst]` files
+            shard_size: Lines per shard, 0 for a single shard
+            compression: One of "none", "gzip" or "zstd"
+        """
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unsupported compression: {compression}")
+        if compression == "zstd":
+            try:
+                import zstandard  # noqa: F401
+            except ImportError as e:
+                raise ValueError("zstd compression requires the 'zstandard' package") from e
+
+        self.output_dir = output_dir
+        self.shard_size = shard_size
+        self.compression = compression
+        self.paths: List[Path] = []
+        self._file: Optional[IO[bytes]] = None
+        self._lines = 0
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    def _open(self, path: Path) -> IO[bytes]:
+        if self.compression == "gzip":
+            # Level 1 keeps compression from becoming the bottleneck of the transform
+            # GzipFile is a binary file object, typeshed only declares it a BufferedIOBase
+            return cast(IO[bytes], gzip.open(path, "wb", compresslevel=1))
+        if self.compression == "zstd":
+            import zstandard
+
+            return zstandard.open(path, "wb")  # type: ignore[no-any-return]
+        return open(path, "wb", buffering=1024 * 1024)
+
+    def write(self, line: bytes) -> None:
+        """
+        Append a line, rotating to a new shard when the current one is full.
+
+        Args:
+            line: Serialized JSON without the trailing newline
+        """
+        if self._file is None or (self.shard_size and self._lines >= self.shard_size):
+            self.close()
+            path = self.output_dir / f"part-{len(self.paths):05d}.ndjson{COMPRESSION_SUFFIXES[self.compression]}"
+            self._file = self._open(path)
+            self.paths.append(path)
+            self._lines = 0
+
+        self._file.write(line + b"\n")
+        self._lines += 1
+
+    def close(self) -> None:
+        """Flush and close the current shard."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BulkTransform:
+    """
+    Transform a NewStore export into Hail transactions on disk, without any network.
+
+    Raw events are split from the memory-mapped input exactly as in `Backfill`
+    and transformed and serialized in a process pool using every core. With
+    ordered output the shards follow the input order; unordered output writes
+    batches as soon as they complete, which keeps all processes busy when batch
+    costs vary. Since nothing is sent, the run doubles as a CPU throughput
+    benchmark for the transformer.
+    """
+
+    def __init__(
+        self,
+        input_path: Path,
+        output_dir: Path,
+        errors_path: Optional[Path] = None,
+        batch_size: int = 100,
+        shard_size: int = 100_000,
+        compression: str = "none",
+        ordered: bool = True,
+        processes: Optional[int] = None,
+        token_key: Optional[bytes] = None,
+        tax_rates_file: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize the bulk transform.
+
+        Args:
+            input_path: NDJSON or JSON array export to transform
+            output_dir: Directory receiving the shards of HailTransaction NDJSON
+            errors_path: NDJSON file collecting events that failed, None to only count them
+            batch_size: Events transformed per pool task
+            shard_size: Transactions per output shard, 0 for a single shard
+            compression: One of "none", "gzip" or "zstd"
+            ordered: Keep the input order in the output
+            processes: Pool size, defaults to the number of CPUs
+            token_key: Key deriving payment tokens, random tokens when None
+            tax_rates_file: Tax rate tables, the bundled tables when None
+        """
+        self.input_path = input_path
+        self.errors_path = errors_path
+        self.batch_size = batch_size
+        self.ordered = ordered
+        self.processes = processes or os.cpu_count() or 1
+        self.token_key = token_key
+        self.tax_rates_file = tax_rates_file
+        self.writer = ShardWriter(output_dir, shard_size, compression)
+        self.stats = TransformStats()
+
+    def _batches(self, data: Union[bytes, mmap.mmap]) -> Iterator[List[bytes]]:
+        iter_records = iter_json_array if detect_format(data) == "json" else iter_ndjson
+        batch: List[bytes] = []
+        for _, record in iter_records(data):
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _results(self, pool: ProcessPoolExecutor, data: Union[bytes, mmap.mmap]) -> Iterator[List[TransformResult]]:
+        # At most two batches per process are outstanding, so memory stays bounded for any input size
+        max_in_flight = self.processes * 2
+        pending: Deque["Future[List[TransformResult]]"] = deque()
+
+        for batch in self._batches(data):
+            pending.append(pool.submit(_transform_batch_json, batch))
+            if len(pending) < max_in_flight:
+                continue
+
+            if self.ordered:
+                yield pending.popleft().result()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield future.result()
+
+        if self.ordered:
+            while pending:
+                yield pending.popleft().result()
+        else:
+            for future in as_completed(pending):
+                yield future.result()
+
+    def run(
+        self,
+        on_progress: Optional[Callable[[TransformStats], None]] = None,
+        progress_interval: float = 1.0,
+    ) -> TransformStats:
+        """
+        Run the transform to completion.
+
+        Args:
+            on_progress: Called periodically with the current counters
+            progress_interval: Seconds between progress callbacks
+
+        Returns:
+            The final counters
+        """
+        self.stats = TransformStats()
+        if self.input_path.stat().st_size == 0:
+            self.stats.finished_at = self.stats.started_at
+            return self.stats
+
+        last_report = self.stats.started_at
+        errors_file: Optional[IO[bytes]] = None
+
+        with (
+            open(self.input_path, "rb") as input_file,
+            mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as data,
+            ProcessPoolExecutor(
+                self.processes,
+                # Fork is unsafe here: the logging listener thread is already running
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(self.token_key, self.tax_rates_file),
+            ) as pool,
+        ):
+            try:
+                for results in self._results(pool, data):
+                    for result in results:
+                        if isinstance(result, bytes):
+                            self.writer.write(result)
+                            self.stats.transformed += 1
+                            continue
+
+                        error, record = result
+                        logger.warning("Transform failed: %s", error)
+                        self.stats.failed += 1
+                        if self.errors_path is not None:
+                            if errors_file is None:
+                                errors_file = open(self.errors_path, "wb")
+                            errors_file.write(record.replace(b"\r", b" ").replace(b"\n", b" ") + b"\n")
+
+                    now = time.monotonic()
+                    if on_progress is not None and now - last_report >= progress_interval:
+                        on_progress(self.stats)
+                        last_report = now
+            finally:
+                self.writer.close()
+                if errors_file is not None:
+                    errors_file.close()
+
+        self.stats.finished_at = time.monotonic()
+        self.stats.shards = list(self.writer.paths)
+        if on_progress is not None:
+            on_progress(self.stats)
+        return self.stats
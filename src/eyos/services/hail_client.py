@@ -1,16 +1,86 @@
 import asyncio
-import json
 import logging
-from typing import Any, Dict
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 from fastapi import HTTPException
 
 from eyos.config import Settings
 from eyos.models import HailTransaction
+from eyos.services.hail_encoder import HailEncoder
+from eyos.services.hedging import HedgeBudget, LatencyTracker
+from eyos.services.metrics import metrics
+from eyos.services.rate_limiter import RateLimiter
+from eyos.utils.compression import check_encoding, compress
 
 logger = logging.getLogger(__name__)
 
+# Failures before the request reached the API, retrying them cannot duplicate a transaction
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Failures after the request may have been applied, retried only when the API deduplicates it
+_UNANSWERED_ERRORS = (
+    httpx.ReadTimeout, httpx.WriteTimeout, httpx.ReadError, httpx.WriteError, httpx.RemoteProtocolError
+)
+# Statuses returned before a transaction is processed: timed out waiting for it, a request
+# with the same idempotency key in progress, rate limited, and unavailable
+_NOT_PROCESSED_STATUSES = frozenset({408, 409, 429, 503})
+
+
+def retry_safety(error: Exception) -> Optional[bool]:
+    """
+    Classify a failed attempt for retrying.
+
+    Args:
+        error: The error of the attempt
+
+    Returns:
+        True when the transaction was certainly not applied, so a retry is safe;
+        False when it may have been, so a retry is only safe when the API
+        deduplicates it by idempotency key; None when it should not be retried
+    """
+    if isinstance(error, _NOT_SENT_ERRORS):
+        return True
+    if isinstance(error, _UNANSWERED_ERRORS):
+        return False
+    if isinstance(error, httpx.HTTPStatusError):
+        status_code = error.response.status_code
+        if status_code in _NOT_PROCESSED_STATUSES:
+            return True
+        if 500 <= status_code < 600:
+            return False
+    return None
+
+
+def idempotency_key(transaction: HailTransaction) -> str:
+    """
+    Key under which the Hail API deduplicates a transaction.
+
+    The transaction ID is derived from the tenant and order, so every attempt,
+    hedge and replay of an order carries the same key.
+
+    Args:
+        transaction: The transaction
+
+    Returns:
+        The key
+    """
+    return transaction.receipt.transaction_information.id
+
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"HTTP {error.response.status_code}"
+    return f"{type(error).__name__}: {error}"
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds the API asked to wait in a Retry-After header, if any."""
+    if not isinstance(error, httpx.HTTPStatusError):
+        return None
+    value = error.response.headers.get("retry-after")
+    return float(value) if isinstance(value, str) and value.isdigit() else None
+
 
 class HailClient:
     """Client for interacting with the Hail API."""
@@ -26,29 +96,237 @@ class HailClient:
         self.api_key = settings.hail_api_key
         self.max_retries = settings.hail_api_max_retries
         self.retry_delay = settings.hail_api_retry_delay
+        self.max_retry_after = settings.hail_api_max_retry_after
+        self.timeout = settings.hail_api_timeout
+        self.idempotency = settings.hail_api_idempotency
+        self.limits = httpx.Limits(
+            max_connections=settings.hail_api_max_connections,
+            max_keepalive_connections=settings.hail_api_max_keepalive_connections,
+        )
+        self.rate_limiter = (
+            RateLimiter(
+                settings.hail_api_rate_limit,
+                settings.hail_api_rate_burst,
+                settings.hail_api_rate_limit_file,
+            )
+            if settings.hail_api_rate_limit > 0
+            else None
+        )
+        check_encoding(settings.hail_api_compression)
+        self.compression = settings.hail_api_compression
+        self.compression_level = settings.hail_api_compression_level
+        self.compression_min_size = settings.hail_api_compression_min_size
+        self.compression_thread_min_size = settings.hail_api_compression_thread_min_size
+        self.encoder = HailEncoder(settings.hail_api_omit_fields)
+        # A hedge is a duplicate request, only sent when the API can deduplicate it
+        self.hedge = settings.hail_api_hedge and settings.hail_api_idempotency
+        self.latency = LatencyTracker(settings.hail_api_hedge_quantile, min_samples=settings.hail_api_hedge_min_samples)
+        self.hedge_budget = HedgeBudget(settings.hail_api_hedge_budget)
+        self._client: Optional[httpx.AsyncClient] = None
+        # Failed attempts since the last successful request, reported by the readiness check
+        self.consecutive_failures = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled HTTP client, created on first use so each process gets its own."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close pooled connections and release the rate limiter."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self.rate_limiter is not None:
+            self.rate_limiter.close()
+
+    async def ping(self, timeout: float) -> bool:
+        """
+        Check whether the Hail API can be reached.
+
+        Any HTTP response counts, only connection problems make the API unreachable.
+
+        Args:
+            timeout: Seconds to wait for a response
+
+        Returns:
+            True when the API answered
+        """
+        if self.base_url == "mock":
+            return True
+
+        try:
+            await self.client.head(self.base_url, timeout=timeout)
+        except httpx.HTTPError as e:
+            logger.warning("Hail API is unreachable: %s", e)
+            return False
+        return True
+
+    async def encode_body(self, body: bytes) -> Tuple[bytes, Dict[str, str]]:
+        """
+        Compress a request body when it is large enough to be worth it.
+
+        Bodies above the thread threshold are compressed in a worker thread, zlib
+        and zstandard release the GIL, so the event loop keeps serving requests.
+
+        Args:
+            body: The serialized request body
+
+        Returns:
+            The body to send and the headers describing its encoding
+        """
+        if self.compression == "none" or len(body) < self.compression_min_size:
+            return body, {}
+
+        if len(body) >= self.compression_thread_min_size:
+            encoded = await asyncio.to_thread(compress, body, self.compression, self.compression_level)
+        else:
+            encoded = compress(body, self.compression, self.compression_level)
+
+        metrics.increment("hail_request_compressed_total", encoding=self.compression)
+        metrics.increment("hail_request_bytes_saved_total", len(body) - len(encoded), encoding=self.compression)
+        return encoded, {"Content-Encoding": self.compression}
+
+    async def _timed_post(self, url: str, headers: Dict[str, str], content: bytes, timeout: float) -> httpx.Response:
+        started_at = time.monotonic()
+        response = await self.client.post(url, headers=headers, content=content, timeout=timeout)
+        self.latency.record(time.monotonic() - started_at)
+        return response
+
+    async def post(
+        self, url: str, headers: Dict[str, str], content: bytes, deadline: Optional[float] = None
+    ) -> httpx.Response:
+        """
+        Send one attempt of a request, hedged when it is slow.
+
+        With hedging enabled, a request still unanswered after the tracked
+        latency quantile gets a duplicate, and the first response wins. Both
+        carry the same idempotency key so the API applies the transaction once.
+        Hedges are bounded by the hedge budget.
+
+        Args:
+            url: The URL
+            headers: The request headers
+            content: The request body
+            deadline: `time.monotonic()` time after which the attempt is abandoned
+
+        Returns:
+            The first response
+
+        Raises:
+            TimeoutError: When the deadline passes first
+        """
+        timeout = self.timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                raise TimeoutError
+
+        metrics.increment("hail_requests_total")
+        self.hedge_budget.earn()
+        async with asyncio.timeout(timeout if deadline is not None else None):
+            tasks = [asyncio.create_task(self._timed_post(url, headers, content, timeout))]
+            try:
+                hedge_after = self.latency.value if self.hedge else None
+                if hedge_after is not None:
+                    done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                    if not done and self.hedge_budget.spend():
+                        metrics.increment("hail_hedged_requests_total")
+                        if self.rate_limiter is not None:
+                            await self.rate_limiter.acquire()
+                        tasks.append(asyncio.create_task(self._timed_post(url, headers, content, timeout)))
+                return await self._first_response(tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    async def _first_response(self, tasks: List["asyncio.Task[httpx.Response]"]) -> httpx.Response:
+        """Wait for the first request to get a response, or for all of them to fail."""
+        pending = set(tasks)
+        errors: List[BaseException] = []
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                if error is None:
+                    if task is not tasks[0]:
+                        metrics.increment("hail_hedge_wins_total")
+                    return task.result()
+                errors.append(error)
+        # Every request failed, the first failure is reported
+        raise errors[0]
+
+    def _failed(self, transaction: HailTransaction, error: Exception, safe: Optional[bool]) -> HTTPException:
+        """The error for an attempt that is not retried."""
+        if isinstance(error, httpx.HTTPStatusError) and error.response.status_code < 500:
+            # Client errors are passed on
+            logger.error("Hail API client error: %d - %s", error.response.status_code, error.response.text)
+            return HTTPException(
+                status_code=error.response.status_code,
+                detail=f"Hail API client error: {error.response.status_code} - {error.response.text}",
+            )
+        self.consecutive_failures += 1
+        if safe is None:
+            logger.error("Unexpected error when sending to Hail API: %s", _describe(error))
+            return HTTPException(status_code=500, detail=f"Unexpected error when sending to Hail API: {error!s}")
+        metrics.increment("hail_unsafe_retries_skipped_total")
+        logger.error(
+            "Not retrying transaction %s without an idempotency key, it may have been applied: %s",
+            transaction.receipt.transaction_information.id,
+            _describe(error),
+        )
+        return HTTPException(
+            status_code=502,
+            detail="The Hail API did not confirm the transaction, and retrying it could apply it twice",
+        )
+
+    def _deadline_exceeded(self, transaction: HailTransaction) -> HTTPException:
+        metrics.increment("hail_deadline_exceeded_total")
+        logger.error(
+            "Deadline exceeded sending transaction %s to Hail API",
+            transaction.receipt.transaction_information.id,
+        )
+        return HTTPException(status_code=504, detail="Deadline exceeded before the Hail API accepted the transaction")
+
+    async def _backoff(self, transaction: HailTransaction, delay: float, deadline: Optional[float]) -> None:
+        """Wait before a retry, unless the deadline would pass first."""
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            raise self._deadline_exceeded(transaction)
+        await asyncio.sleep(delay)
 
     async def send_transaction(
         self,
         transaction: HailTransaction,
-        retry_count: int = 0
+        retry_count: int = 0,
+        deadline: Optional[float] = None,
     ) -> Dict[str, Any]:
         """
         Send a transaction to the Hail API with retry logic.
 
+        Attempts are sent with the transaction ID as their idempotency key, so
+        retries and hedged duplicates are applied once. Failures before the
+        request reached the API are always retried; failures after it may have
+        been applied, like a read timeout or a 500, only when idempotency keys
+        are sent, see `retry_safety`.
+
         Args:
             transaction: The transaction to send
             retry_count: Current retry attempt
+            deadline: `time.monotonic()` time after which no attempt is made or waited for, None for no deadline
 
         Returns:
             The API response
 
         Raises:
-            HTTPException: When the API request fails after all retries
+            HTTPException: When the API request fails after all retries, or with 504 once the deadline passed
         """
         if retry_count > self.max_retries:
             error_msg = f"Failed to send transaction to Hail API after {self.max_retries} retries"
-            logger.error(error_msg)
+            logger.error("Failed to send transaction to Hail API after %d retries", self.max_retries)
             raise HTTPException(status_code=503, detail=error_msg)
+        if deadline is not None and time.monotonic() >= deadline:
+            raise self._deadline_exceeded(transaction)
 
         try:
             # In a real implementation, we would use the actual API URL
@@ -59,7 +337,11 @@ class HailClient:
                     raise httpx.ConnectTimeout("Simulated connection timeout")
 
                 # Simulate a successful response
-                logger.info(f"Successfully sent transaction to Hail API: {transaction.receipt.transaction_information.id}")
+                logger.info(
+                    "Successfully sent transaction to Hail API: %s",
+                    transaction.receipt.transaction_information.id,
+                )
+                self.consecutive_failures = 0
                 result: Dict[str, Any] = {
                     "status": "success",
                     "transaction_id": transaction.receipt.transaction_information.id,
@@ -68,49 +350,54 @@ class HailClient:
                 return result
 
             # In a real implementation:
+            content, encoding_headers = await self.encode_body(self.encoder.encode(transaction))
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
+                "Content-Type": "application/json",
+                **encoding_headers,
             }
+            if self.idempotency:
+                headers["Idempotency-Key"] = idempotency_key(transaction)
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/events/v2/transaction/",
-                    headers=headers,
-                    json=json.loads(transaction.model_dump_json())
-                )
+            # Respect the (possibly host-wide) request budget
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+
+            response = await self.post(f"{self.base_url}/events/v2/transaction/", headers, content, deadline)
 
-                response.raise_for_status()
-                result_data: Dict[str, Any] = response.json()
-                return result_data
+            response.raise_for_status()
+            self.consecutive_failures = 0
+            result_data: Dict[str, Any] = response.json()
+            return result_data
 
-        except (httpx.ConnectTimeout, httpx.ConnectError, httpx.ReadTimeout) as e:
-            # Network-related errors - retryable
+        except (httpx.TransportError, httpx.HTTPStatusError) as e:
+            safe = retry_safety(e)
+            if safe is None or (not safe and not self.idempotency):
+                raise self._failed(transaction, e, safe) from e
+
+            self.consecutive_failures += 1
+            metrics.increment("hail_retries_total", safe=str(safe).lower())
             logger.warning(
-                f"Temporary connection error when sending to Hail API: {e!s}. "
-                f"Retrying {retry_count + 1}/{self.max_retries}"
+                "Hail API attempt failed: %s. Retrying %d/%d",
+                _describe(e),
+                retry_count + 1,
+                self.max_retries,
             )
-            # Exponential backoff with jitter
-            delay = self.retry_delay * (2 ** retry_count) * (0.5 + asyncio.get_event_loop().time() % 1)
-            await asyncio.sleep(delay)
-            return await self.send_transaction(transaction, retry_count + 1)
-
-        except httpx.HTTPStatusError as e:
-            # Server errors (5xx) are retryable, client errors (4xx) are not
-            if 500 <= e.response.status_code < 600:
-                logger.warning(
-                    f"Hail API server error: {e.response.status_code}. "
-                    f"Retrying {retry_count + 1}/{self.max_retries}"
-                )
-                await asyncio.sleep(self.retry_delay * (2 ** retry_count))
-                return await self.send_transaction(transaction, retry_count + 1)
+            # Exponential backoff with jitter, unless the API said how long to wait, within a bound
+            delay = _retry_after(e)
+            if delay is not None:
+                delay = min(delay, self.max_retry_after)
             else:
-                error_msg = f"Hail API client error: {e.response.status_code} - {e.response.text}"
-                logger.error(error_msg)
-                raise HTTPException(status_code=e.response.status_code, detail=error_msg) from e
+                delay = self.retry_delay * (2 ** retry_count) * (0.5 + asyncio.get_event_loop().time() % 1)
+            await self._backoff(transaction, delay, deadline)
+            return await self.send_transaction(transaction, retry_count + 1, deadline)
+
+        except TimeoutError as e:
+            # The deadline passed while waiting for a response
+            raise self._deadline_exceeded(transaction) from e
 
         except Exception as e:
             # Unexpected errors
             error_msg = f"Unexpected error when sending to Hail API: {e!s}"
-            logger.error(error_msg)
+            logger.error("Unexpected error when sending to Hail API: %s", e)
             raise HTTPException(status_code=500, detail=error_msg) from e
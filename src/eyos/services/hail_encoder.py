@@ -0,0 +1,252 @@
+import inspect
+import json.encoder
+from functools import partial
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel
+from pydantic.fields import FieldInfo
+from pydantic_core import to_json
+
+from eyos.models import HailTransaction
+
+# Fields left out of encoded transactions:
+#   none  - every field, byte-identical to model_dump_json()
+#   null  - fields that are None, as model_dump_json(exclude_none=True)
+#   empty - optional fields that are None or an empty string, list or dict
+OMIT_POLICIES = ("none", "null", "empty")
+
+# Encodes a model to JSON text
+ModelEncoder = Callable[[BaseModel], str]
+
+_NONE_TYPE = type(None)
+_EMPTY_DEFAULTS: List[Any] = [None, "", [], {}]
+
+# Quoted and escaped like serde_json: control characters escaped, non-ASCII kept as is
+_encode_string = json.encoder.encode_basestring
+# Values of unstructured fields, serialized as pydantic serializes Any
+_to_json = partial(to_json, inf_nan_mode="null")
+
+# Formatting floats is the costliest part of encoding, the text of recent amounts is kept
+_FLOAT_CACHE_SIZE = 8192
+_float_text: Dict[float, str] = {}
+
+
+def _encode_float(value: float) -> str:
+    """Format a float like pydantic, without calling into its serializer for plain numbers."""
+    text = float.__repr__(value)
+    # Exponents are written without "+" and leading zeros, infinities and NaN as null
+    if "e" in text or "n" in text:
+        text = _to_json(value).decode()
+    # Zero is not cached as 0.0 and -0.0 are the same key, nor is NaN
+    if value and value == value:
+        if len(_float_text) >= _FLOAT_CACHE_SIZE:
+            _float_text.clear()
+        _float_text[value] = text
+    return text
+
+
+def _encode_any(value: Any) -> str:
+    """Encode an unstructured value, the JSON types directly and anything else through pydantic."""
+    cls = value.__class__
+    if cls is str:
+        return _encode_string(value)
+    if cls is int:
+        return int.__repr__(value)
+    if cls is dict:
+        parts = []
+        for key, item in value.items():
+            if key.__class__ is not str:
+                return _to_json(value).decode()
+            parts.append(_encode_string(key) + ":" + _encode_any(item))
+        return "{" + ",".join(parts) + "}"
+    if value is None:
+        return "null"
+    if cls is bool:
+        return "true" if value else "false"
+    if cls is list:
+        return "[" + ",".join([_encode_any(item) for item in value]) + "]"
+    if isinstance(value, float):
+        return _float_text.get(value) or _encode_float(value)
+    return _to_json(value).decode()
+
+
+def check_omit_policy(omit: str) -> None:
+    """
+    Check that an omit policy is supported.
+
+    Args:
+        omit: One of OMIT_POLICIES
+
+    Raises:
+        ValueError: When the policy is unknown
+    """
+    if omit not in OMIT_POLICIES:
+        raise ValueError(f"Unsupported omit policy: {omit}, use one of {', '.join(OMIT_POLICIES)}")
+
+
+class _EncoderCompiler:
+    """Generate the source of an encoder function for a model, then compile it."""
+
+    def __init__(self, omit: str) -> None:
+        self.omit = omit
+        self.sources: List[str] = []
+
+    def compile(self, model: Type[BaseModel]) -> ModelEncoder:
+        name = f"_encode_{model.__name__}"
+        self.sources.append(f"def {name}(obj):\n    return {self.model_expression(model, 'obj', 0)}")
+        namespace: Dict[str, Any] = {
+            "_encode_string": _encode_string,
+            "_encode_float": _encode_float,
+            "_encode_any": _encode_any,
+            "_float_text": _float_text,
+        }
+        exec(compile("\n\n".join(self.sources), f"<encoder {model.__name__}>", "exec"), namespace)
+        encoder: ModelEncoder = namespace[name]
+        return encoder
+
+    def model_expression(self, model: Type[BaseModel], var: str, depth: int) -> str:
+        """
+        Get an f-string encoding a model, with the field names and punctuation as its constant text.
+
+        Nested models are inlined. When the first field may be omitted, the comma
+        before the second is only known at runtime, so such models get a function.
+        """
+        fields = list(model.model_fields.items())
+        if fields and self.omit_condition(fields[0][1], "") is None:
+            return "f'{{" + self.fields_template(fields, var, depth)[1:] + "}}'"
+
+        name = f"_encode_{model.__name__}_{len(self.sources)}"
+        # Every field starts with a comma, the first one written is dropped
+        self.sources.append("\n".join([
+            f"def {name}(obj):",
+            f"    text = f'{self.fields_template(fields, 'obj', 0)}'",
+            "    return '{' + text[1:] + '}' if text else '{}'",
+        ]))
+        return f"{name}({var})"
+
+    def fields_template(self, fields: List[Tuple[str, FieldInfo]], var: str, depth: int) -> str:
+        """Get the f-string text of fields, each starting with a comma."""
+        template = ""
+        for field_name, field in fields:
+            path = f"{var}.{field_name}"
+            key = f",{json.dumps(field_name)}:"
+            value = self.expression(field.annotation, path, depth)
+            condition = self.omit_condition(field, path)
+            if condition:
+                template += f"{{'{key}' if {condition} else ''}}{{{value} if {condition} else ''}}"
+            else:
+                template += f"{key}{{{value}}}"
+        return template
+
+    def omit_condition(self, field: FieldInfo, var: str) -> Optional[str]:
+        """Get the condition under which a field is written, None to always write it."""
+        annotation = field.annotation
+        nullable = get_origin(annotation) is Union and _NONE_TYPE in get_args(annotation)
+        if self.omit == "empty" and not field.is_required() and field.default in _EMPTY_DEFAULTS:
+            base = _without_none(annotation)
+            if base is str or get_origin(base) in (list, dict, Literal):
+                return var
+        if self.omit != "none" and nullable:
+            return f"{var} is not None"
+        return None
+
+    def expression(self, annotation: Any, var: str, depth: int = 0) -> str:
+        """Get an expression encoding `var`, of type `annotation`, to JSON text."""
+        origin = get_origin(annotation)
+        args = get_args(annotation)
+
+        if origin is Union and _NONE_TYPE in args:
+            inner = self.expression(_without_none(annotation), var, depth)
+            return f"('null' if {var} is None else {inner})"
+        if inspect.isclass(annotation) and issubclass(annotation, BaseModel):
+            return self.model_expression(annotation, var, depth)
+        if annotation is str or (origin is Literal and all(isinstance(arg, str) for arg in args)):
+            return f"_encode_string({var})"
+        if annotation is bool:
+            return f"('true' if {var} else 'false')"
+        if annotation is int:
+            return f"int.__repr__({var})"
+        if inspect.isclass(annotation) and issubclass(annotation, float):
+            # Money included, it is the float nearest to its amount
+            return f"(_float_text.get({var}) or _encode_float({var}))"
+        if origin is list and args and args[0] is not Any:
+            item = f"item{depth}"
+            inner = self.expression(args[0], item, depth + 1)
+            return f"('[' + ','.join([{inner} for {item} in {var}]) + ']')"
+        if origin is dict and args and args[0] is str:
+            key, item = f"key{depth}", f"item{depth}"
+            inner = self.expression(args[1], item, depth + 1)
+            return f"('{{' + ','.join([_encode_string({key}) + ':' + {inner} for {key}, {item} in {var}.items()]) + '}}')"
+        # Unstructured values, e.g. Dict[str, Any]
+        return f"_encode_any({var})"
+
+
+def _without_none(annotation: Any) -> Any:
+    """Strip None from an Optional annotation."""
+    if get_origin(annotation) is not Union:
+        return annotation
+    args = tuple(arg for arg in get_args(annotation) if arg is not _NONE_TYPE)
+    return args[0] if len(args) == 1 else Union[args]
+
+
+def compile_encoder(model: Type[BaseModel], omit: str = "none") -> ModelEncoder:
+    """
+    Compile a JSON encoder specialized to a model's schema.
+
+    The model is compiled into nested f-strings whose constant text holds the
+    field names and punctuation, so only the values are encoded at runtime,
+    without walking the schema or calling a function per nested model.
+
+    Args:
+        model: The model class, its fields and nested models must be annotated
+        omit: Which fields to leave out, one of OMIT_POLICIES
+
+    Returns:
+        A function encoding an instance of the model to JSON text
+
+    Raises:
+        ValueError: When the omit policy is unknown
+    """
+    check_omit_policy(omit)
+    return _EncoderCompiler(omit).compile(model)
+
+
+class HailEncoder:
+    """
+    Serialize Hail transactions with an encoder compiled from their schema.
+
+    The output is byte-identical to `model_dump_json(exclude_none=True)` under
+    the "null" policy. The "empty" policy also leaves out the many optional
+    fields of a receipt that are empty strings or lists. Under "none" nothing
+    is left out and `model_dump_json` is used as is: the compiled encoder only
+    beats it while the formatted amounts are cached, and sent amounts rarely
+    repeat.
+    """
+
+    def __init__(self, omit: str = "none", model: Type[BaseModel] = HailTransaction) -> None:
+        """
+        Compile the encoder.
+
+        Args:
+            omit: Which fields to leave out, one of OMIT_POLICIES
+            model: The model encoded, HailTransaction unless testing
+
+        Raises:
+            ValueError: When the omit policy is unknown
+        """
+        self.omit = omit
+        self._encode = compile_encoder(model, omit) if omit != "none" else None
+
+    def encode(self, transaction: BaseModel) -> bytes:
+        """
+        Serialize a transaction to JSON.
+
+        Args:
+            transaction: The transaction
+
+        Returns:
+            The JSON body
+        """
+        if self._encode is None:
+            return transaction.model_dump_json().encode()
+        return self._encode(transaction).encode()
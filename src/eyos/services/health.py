@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+
+from eyos.config import Settings
+from eyos.services.hail_client import HailClient
+from eyos.services.queue_processor import InMemoryQueue
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A JSON response rendered once and served with an ETag."""
+
+    body: bytes
+    etag: str
+    status_code: int = 200
+
+    @classmethod
+    def from_content(cls, content: Dict[str, Any], status_code: int = 200) -> "CachedResponse":
+        """
+        Render the content and derive its ETag.
+
+        Args:
+            content: The JSON content
+            status_code: HTTP status of the response
+
+        Returns:
+            The cached response
+        """
+        body = json.dumps(content, sort_keys=True, separators=(",", ":")).encode()
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        return cls(body=body, etag=etag, status_code=status_code)
+
+    def respond(self, request: Request) -> Response:
+        """
+        Answer a request, with `304 Not Modified` when the client has the current version.
+
+        Only successful responses are conditional: a probe treats any 3xx as a
+        success, so a failing snapshot is always answered with its status.
+
+        Args:
+            request: The incoming request
+
+        Returns:
+            The response
+        """
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if 200 <= self.status_code < 300 and request.headers.get("if-none-match") == self.etag:
+            return Response(status_code=304, headers=headers)
+        return Response(self.body, status_code=self.status_code, media_type="application/json", headers=headers)
+
+
+class ReadinessMonitor:
+    """
+    Periodically evaluate whether this process should receive traffic.
+
+    Checks run in a background task and their result is kept as a pre-rendered
+    snapshot, so readiness probes only return bytes and never wait on the queue
+    or the Hail API. The process is ready when the queue is not shedding load,
+    the Hail API is reachable and requests to it are not failing repeatedly.
+    """
+
+    def __init__(self, queue: InMemoryQueue, hail_client: HailClient, settings: Settings) -> None:
+        """
+        Initialize the monitor.
+
+        Args:
+            queue: The event queue of this process
+            hail_client: The Hail API client of this process
+            settings: Application settings
+        """
+        self.queue = queue
+        self.hail_client = hail_client
+        self.interval = settings.health_check_interval
+        self.hail_timeout = settings.health_hail_timeout
+        self.max_hail_failures = settings.health_max_hail_failures
+        self.snapshot = CachedResponse.from_content({"status": "starting"}, status_code=503)
+        self.task: Optional[asyncio.Task[None]] = None
+
+    async def check(self) -> CachedResponse:
+        """
+        Evaluate readiness and replace the snapshot.
+
+        Returns:
+            The new snapshot
+        """
+        hail_reachable = await self.hail_client.ping(self.hail_timeout)
+        hail_failures = self.hail_client.consecutive_failures
+        shedding = self.queue.is_overloaded()
+
+        checks = {
+            "queue": {
+                "ok": not shedding,
+                "depth": self.queue.qsize(),
+                "high_watermark": self.queue.high_watermark,
+                "shedding": shedding,
+            },
+            "hail": {
+                "ok": hail_reachable and hail_failures < self.max_hail_failures,
+                "reachable": hail_reachable,
+                "consecutive_failures": hail_failures,
+            },
+        }
+        ready = all(check["ok"] for check in checks.values())
+        self.snapshot = CachedResponse.from_content(
+            {"status": "ready" if ready else "not ready", "checks": checks},
+            status_code=200 if ready else 503,
+        )
+        return self.snapshot
+
+    async def run(self) -> None:
+        """Check readiness periodically until cancelled."""
+        while True:
+            started_at = time.monotonic()
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error("Readiness check failed: %s", e)
+                self.snapshot = CachedResponse.from_content({"status": "not ready", "error": str(e)}, status_code=503)
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started_at)))
+
+    def start(self) -> None:
+        """Start checking in a background task."""
+        if self.task is None:
+            self.task = asyncio.create_task(self.run(), name="eyos-readiness-monitor")
+
+    async def stop(self) -> None:
+        """Stop the background check task."""
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
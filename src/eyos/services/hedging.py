@@ -0,0 +1,91 @@
+from collections import deque
+from typing import Deque, Optional
+
+
+class LatencyTracker:
+    """
+    Latency quantile over a window of recent requests.
+
+    The quantile is recomputed every `window // 8` samples rather than on each
+    request, sorting a thousand floats is cheap but not free.
+    """
+
+    def __init__(self, quantile: float = 0.95, window: int = 1024, min_samples: int = 50) -> None:
+        """
+        Initialize the tracker.
+
+        Args:
+            quantile: The quantile tracked, between 0 and 1
+            window: Number of recent latencies kept
+            min_samples: Latencies needed before the quantile is reported
+        """
+        if not 0 < quantile < 1:
+            raise ValueError("The hedge quantile must be between 0 and 1")
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.samples: Deque[float] = deque(maxlen=window)
+        self._refresh_every = max(1, window // 8)
+        self._since_refresh = 0
+        self._value: Optional[float] = None
+
+    def record(self, seconds: float) -> None:
+        """
+        Add the latency of a completed request.
+
+        Args:
+            seconds: Time from sending the request to its response
+        """
+        self.samples.append(seconds)
+        self._since_refresh += 1
+        if self._value is None or self._since_refresh >= self._refresh_every:
+            self._refresh()
+
+    def _refresh(self) -> None:
+        self._since_refresh = 0
+        if len(self.samples) < self.min_samples:
+            return
+        ordered = sorted(self.samples)
+        self._value = ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))]
+
+    @property
+    def value(self) -> Optional[float]:
+        """The latency quantile in seconds, None until enough requests completed."""
+        return self._value
+
+
+class HedgeBudget:
+    """
+    Token bucket bounding hedged requests to a fraction of all requests.
+
+    Every request earns `ratio` tokens and every hedge spends one, so when
+    latency degrades across the board hedging stops at the budget instead of
+    doubling the load.
+    """
+
+    def __init__(self, ratio: float, burst: float = 10) -> None:
+        """
+        Initialize a full budget.
+
+        Args:
+            ratio: Hedged requests allowed per request
+            burst: Most tokens saved up
+        """
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+
+    def earn(self) -> None:
+        """Credit the budget for a request."""
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def spend(self) -> bool:
+        """
+        Take a token for a hedge.
+
+        Returns:
+            True when the hedge may be sent
+        """
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
@@ -0,0 +1,271 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from eyos.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    tenant TEXT NOT NULL,
+    order_id TEXT NOT NULL,
+    event TEXT NOT NULL,
+    state TEXT NOT NULL,
+    at REAL NOT NULL,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS deliveries_order ON deliveries (order_id, tenant, at);
+"""
+
+# tenant, order_id, event, state, at, detail
+Record = Tuple[str, str, str, str, float, Optional[str]]
+
+
+class DeliveryState(str, Enum):
+    """Steps in the delivery of an event to the Hail API."""
+
+    RECEIVED = "received"  # Accepted by the webhook
+    QUEUED = "queued"  # Waiting in the queue
+    SENT = "sent"  # Transformed and being sent
+    ACKED = "acked"  # Accepted by the Hail API
+    FAILED = "failed"  # Dropped or rejected, see the detail
+
+
+def connect(path: str, read_only: bool = False) -> sqlite3.Connection:
+    """
+    Open a ledger database, creating it unless read only.
+
+    Args:
+        path: The database file
+        read_only: Open the existing database without writing to it
+
+    Returns:
+        The connection, usable from any thread
+    """
+    if read_only:
+        connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(path, check_same_thread=False)
+        # Readers, like an export, do not block writers, and worker processes wait for each other's writes
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(_SCHEMA)
+    connection.execute("PRAGMA busy_timeout=5000")
+    return connection
+
+
+def _iso(at: float) -> str:
+    return datetime.fromtimestamp(at, timezone.utc).isoformat()
+
+
+def _row(record: Record) -> Dict[str, Any]:
+    tenant, order_id, event, state, at, detail = record
+    return {"tenant": tenant, "order_id": order_id, "event": event, "state": state, "at": _iso(at), "detail": detail}
+
+
+class DeliveryLedger:
+    """
+    Local record of each event's delivery, in an SQLite database.
+
+    Every step is appended as a row, so an order's history can be told from the
+    table, and the database outlives the process and its logs. Recording only
+    appends to a list: rows are written in batches by a background task, in a
+    thread, every `flush_interval` seconds or sooner once `batch_size` are
+    waiting. When writes keep failing, at most `max_pending` rows are held and
+    newer ones are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 0.5,
+        batch_size: int = 500,
+        max_pending: int = 100_000,
+    ) -> None:
+        """
+        Initialize the ledger, creating its database.
+
+        Args:
+            path: The database file
+            flush_interval: Seconds between batched writes
+            batch_size: Waiting rows that trigger a write before the interval
+            max_pending: Most rows held in memory before new ones are dropped
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.connection = connect(path)
+        self._pending: List[Record] = []
+        # The connection is shared by the writer and queries running in threads
+        self._lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def record(
+        self, tenant: str, order_id: str, event: str, state: DeliveryState, detail: Optional[str] = None
+    ) -> None:
+        """
+        Record a step in the delivery of an event, to be written with the next batch.
+
+        Args:
+            tenant: The tenant
+            order_id: ID of the order
+            event: The event name
+            state: The step reached
+            detail: Transaction ID or failure reason
+        """
+        if len(self._pending) >= self.max_pending:
+            metrics.increment("ledger_dropped_total")
+            return
+        self._pending.append((tenant, order_id, event, state.value, time.time(), detail))
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    def _write(self, rows: List[Record]) -> None:
+        with self._lock, self.connection:
+            self.connection.executemany("INSERT INTO deliveries VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    async def flush(self) -> None:
+        """Write the waiting rows, keeping them for the next flush if the write fails."""
+        async with self._flush_lock:
+            rows, self._pending = self._pending, []
+            if not rows:
+                return
+            try:
+                await asyncio.to_thread(self._write, rows)
+            except sqlite3.Error as e:
+                logger.error("Failed to write %d rows to the delivery ledger: %s", len(rows), e)
+                self._pending[:0] = rows[: max(0, self.max_pending - len(self._pending))]
+                return
+            metrics.increment("ledger_rows_written_total", len(rows))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        """Start writing batches in the background."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background writer, write what is waiting and close the database."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        self.connection.close()
+
+    def stats(self) -> Dict[str, float]:
+        """Gauges of the ledger, for the metrics registry."""
+        return {"ledger_pending": len(self._pending)}
+
+    def _history(self, order_id: str, tenant: Optional[str]) -> List[Record]:
+        query = "SELECT tenant, order_id, event, state, at, detail FROM deliveries WHERE order_id = ?"
+        parameters: Tuple[str, ...] = (order_id,)
+        if tenant is not None:
+            query += " AND tenant = ?"
+            parameters += (tenant,)
+        with self._lock:
+            return self.connection.execute(query + " ORDER BY at, rowid", parameters).fetchall()
+
+    async def status(self, order_id: str, tenant: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Look up the delivery of an order's events.
+
+        Rows waiting for a batch are written first, so the answer includes
+        every step recorded so far.
+
+        Args:
+            order_id: ID of the order
+            tenant: The tenant, None for any tenant
+
+        Returns:
+            Per tenant and event, the last state and the history of steps, empty when the order is unknown
+        """
+        await self.flush()
+        deliveries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for record in await asyncio.to_thread(self._history, order_id, tenant):
+            row = _row(record)
+            delivery = deliveries.setdefault(
+                (row["tenant"], row["event"]),
+                {"tenant": row["tenant"], "event": row["event"], "state": None, "updated_at": None, "history": []},
+            )
+            delivery["state"], delivery["updated_at"] = row["state"], row["at"]
+            delivery["history"].append({"state": row["state"], "at": row["at"], "detail": row["detail"]})
+        return list(deliveries.values())
+
+
+def export_rows(
+    connection: sqlite3.Connection, tenant: Optional[str] = None, since: Optional[float] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Read the ledger in the order it was recorded, without loading it whole.
+
+    Args:
+        connection: The ledger database
+        tenant: Only rows of this tenant
+        since: Only rows recorded from this Unix time on
+
+    Yields:
+        Each row, with an ISO timestamp
+    """
+    query = "SELECT tenant, order_id, event, state, at, detail FROM deliveries WHERE 1"
+    parameters: List[Any] = []
+    if tenant is not None:
+        query += " AND tenant = ?"
+        parameters.append(tenant)
+    if since is not None:
+        query += " AND at >= ?"
+        parameters.append(since)
+    for record in connection.execute(query + " ORDER BY rowid", parameters):
+        yield _row(record)
+
+
+def write_export(rows: Iterator[Dict[str, Any]], output: TextIO, fmt: str = "jsonl") -> int:
+    """
+    Write exported rows.
+
+    Args:
+        rows: The rows
+        output: Where to write them
+        fmt: jsonl, or csv with a header line
+
+    Returns:
+        The number of rows written
+
+    Raises:
+        ValueError: When the format is unknown
+    """
+    if fmt not in ("jsonl", "csv"):
+        raise ValueError(f"Unsupported export format {fmt!r}, use jsonl or csv")
+    count = 0
+    if fmt == "csv":
+        import csv
+
+        writer = csv.DictWriter(output, fieldnames=["tenant", "order_id", "event", "state", "at", "detail"])
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in rows:
+            output.write(json.dumps(row) + "\n")
+            count += 1
+    return count
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import os
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+MetricsCollector = Callable[[], Dict[str, float]]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value as in the Prometheus text format, values such as tenants come from payloads."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def metric_name(name: str, **labels: str) -> str:
+    """
+    Build a metric key with Prometheus-style labels.
+
+    Args:
+        name: The metric name
+        labels: Label values, rendered in sorted order
+
+    Returns:
+        The metric key, e.g. `queue_depth{tenant="newlook"}`
+    """
+    if not labels:
+        return name
+    rendered = ",".join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+    return f"{name}{{{rendered}}}"
+
+
+def _with_label(key: str, label: str, value: str) -> str:
+    """Add a label to a metric key built by `metric_name`."""
+    if key.endswith("}"):
+        return f'{key[:-1]},{label}="{_escape(value)}"}}'
+    return metric_name(key, **{label: value})
+
+
+class Metrics:
+    """
+    Process-local metrics registry.
+
+    Counters and gauges are plain dict updates so they are cheap enough for the
+    hot path. Components that already track their own state register a collector
+    instead, which is only evaluated when a snapshot is taken.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.gauges: Dict[str, float] = {}
+        self.collectors: Dict[str, MetricsCollector] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            name: The counter name
+            value: Amount to add
+            labels: Label values for the counter
+        """
+        self.counters[metric_name(name, **labels)] += value
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        """
+        Set a gauge to the given value.
+
+        Args:
+            name: The gauge name
+            value: The current value
+            labels: Label values for the gauge
+        """
+        self.gauges[metric_name(name, **labels)] = value
+
+    def register_collector(self, name: str, collector: MetricsCollector) -> None:
+        """
+        Register a callback that reports gauges at snapshot time.
+
+        Args:
+            name: Unique name of the collector, registering again replaces it
+            collector: Callback returning gauge values keyed by metric name
+        """
+        with self._lock:
+            self.collectors[name] = collector
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Take a point-in-time copy of all metrics.
+
+        Returns:
+            Counters and gauges of this process
+        """
+        gauges = dict(self.gauges)
+        with self._lock:
+            collectors = list(self.collectors.values())
+        for collector in collectors:
+            gauges.update(collector())
+
+        return {
+            "pid": os.getpid(),
+            "counters": dict(self.counters),
+            "gauges": gauges,
+        }
+
+    def publish(self, directory: str) -> None:
+        """
+        Write this process' snapshot to `<directory>/<pid>.json`.
+
+        The file is replaced atomically so readers never see a partial snapshot.
+
+        Args:
+            directory: Directory shared by all worker processes
+        """
+        snapshot = self.snapshot()
+        path = Path(directory) / f"{snapshot['pid']}.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(snapshot))
+        os.replace(tmp_path, path)
+
+    def unpublish(self, directory: str) -> None:
+        """
+        Remove this process' snapshot file.
+
+        Args:
+            directory: Directory shared by all worker processes
+        """
+        (Path(directory) / f"{os.getpid()}.json").unlink(missing_ok=True)
+
+    async def run_publisher(self, directory: str, interval: float) -> None:
+        """
+        Publish snapshots periodically until cancelled.
+
+        Args:
+            directory: Directory shared by all worker processes
+            interval: Seconds between publications
+        """
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        try:
+            while True:
+                await asyncio.to_thread(self.publish, directory)
+                await asyncio.sleep(interval)
+        finally:
+            self.unpublish(directory)
+
+    def reset(self) -> None:
+        """Clear all metrics and collectors."""
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.collectors.clear()
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def aggregate_published(directory: str) -> Dict[str, Any]:
+    """
+    Combine the snapshots published by all live worker processes.
+
+    Counters are summed across processes. Gauges such as the shedding state or
+    the watermarks do not add up, so each process' gauges are kept apart with a
+    `pid` label. The individual snapshots are included as well.
+
+    Args:
+        directory: Directory shared by all worker processes
+
+    Returns:
+        The aggregated metrics
+    """
+    counters: Dict[str, float] = defaultdict(float)
+    gauges: Dict[str, float] = {}
+    processes = []
+
+    for path in sorted(Path(directory).glob("*.json")):
+        try:
+            snapshot = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        if not _process_alive(snapshot["pid"]):
+            continue
+
+        processes.append(snapshot)
+        for name, value in snapshot["counters"].items():
+            counters[name] += value
+        for name, value in snapshot["gauges"].items():
+            gauges[_with_label(name, "pid", str(snapshot["pid"]))] = value
+
+    return {
+        "processes": processes,
+        "counters": dict(counters),
+        "gauges": gauges,
+    }
+
+
+metrics = Metrics()
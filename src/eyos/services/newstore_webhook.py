@@ -2,14 +2,15 @@ import base64
 import hashlib
 import hmac
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Union
 
 from fastapi import HTTPException, Request, status
 
 from eyos.config import Settings
-from eyos.models import NewStoreEvent
+from eyos.models import NewStoreEvent, NewStoreEventEnvelope
 from eyos.services.hail_client import HailClient
-from eyos.services.transformer import transform_newstore_to_hail
+from eyos.services.tax import load_tax_table
+from eyos.services.transformer import payment_token_key, transform_newstore_to_hail
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +29,8 @@ class NewStoreWebhookHandler:
         self.webhook_secret = settings.newstore_webhook_secret
         self.supported_events = settings.newstore_supported_events
         self.hail_client = hail_client
+        self.token_key = payment_token_key(settings)
+        self.tax_table = load_tax_table(settings.tax_rates_file)
 
     async def validate_signature(self, request: Request, body: bytes) -> None:
         """
@@ -67,12 +70,12 @@ class NewStoreWebhookHandler:
                 detail="Invalid signature"
             )
 
-    async def validate_event(self, event: NewStoreEvent) -> None:
+    async def validate_event(self, event: Union[NewStoreEvent, NewStoreEventEnvelope]) -> None:
         """
         Validate the webhook event.
 
         Args:
-            event: The webhook event to validate
+            event: The webhook event to validate, or just its envelope
 
         Raises:
             HTTPException: When the event is invalid
@@ -97,7 +100,7 @@ class NewStoreWebhookHandler:
             )
 
         # Additional validation could be added here
-        logger.info(f"Validated {event.name} event for order {event.payload.id}")
+        logger.info("Validated %s event for order %s", event.name, event.payload.id)
 
     async def process_event(self, event: NewStoreEvent) -> Dict[str, Any]:
         """
@@ -112,11 +115,11 @@ class NewStoreWebhookHandler:
         Raises:
             HTTPException: When processing fails
         """
-        logger.info(f"Processing {event.name} event for order {event.payload.id}")
+        logger.info("Processing %s event for order %s", event.name, event.payload.id)
 
         try:
             # Transform the NewStore event to a Hail transaction
-            hail_transaction = await transform_newstore_to_hail(event)
+            hail_transaction = await transform_newstore_to_hail(event, self.token_key, self.tax_table)
 
             # Send the transaction to the Hail API
             result = await self.hail_client.send_transaction(hail_transaction)
@@ -130,7 +133,7 @@ class NewStoreWebhookHandler:
                 "hail_response": result
             }
         except Exception as e:
-            logger.error(f"Error processing event: {e!s}")
+            logger.error("Error processing event: %s", e)
             raise HTTPException(
                 status_code=500,
                 detail=f"Error processing event: {e!s}"
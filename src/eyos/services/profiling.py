@@ -0,0 +1,375 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Upper bounds (in milliseconds) of the loop stall histogram buckets
+LOOP_LAG_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class CpuSampler:
+    """
+    Statistical CPU profiler for a single thread.
+
+    A background thread periodically captures the target thread's current stack
+    via `sys._current_frames()` and counts identical stacks. The profiled code is
+    never instrumented, so the overhead is bounded by the sampling interval.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005) -> None:
+        """
+        Initialize the sampler.
+
+        Args:
+            thread_id: Identifier of the thread to sample, defaults to the calling thread
+            interval: Seconds between samples
+        """
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.stacks: Counter[Tuple[str, ...]] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+
+        stack: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+
+        stack.reverse()
+        self.stacks[tuple(stack)] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="eyos-cpu-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def report(self, limit: int = 50) -> Dict[str, Any]:
+        """
+        Summarize the collected samples.
+
+        Args:
+            limit: Maximum number of stacks and functions to include
+
+        Returns:
+            The most frequent collapsed stacks and the functions most often on CPU
+        """
+        leaves: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack[-1]] += count
+
+        return {
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "stacks": [
+                {"stack": ";".join(stack), "count": count}
+                for stack, count in self.stacks.most_common(limit)
+            ],
+            "functions": [
+                {"function": function, "count": count, "percent": round(100 * count / self.samples, 2)}
+                for function, count in leaves.most_common(limit)
+            ],
+        }
+
+
+class MemoryProfiler:
+    """Compare tracemalloc snapshots against a baseline taken when tracing started."""
+
+    def __init__(self) -> None:
+        """Initialize the memory profiler."""
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def tracing(self) -> bool:
+        """Whether tracemalloc is currently tracing allocations."""
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> None:
+        """
+        Start tracing allocations and take the baseline snapshot.
+
+        Args:
+            frames: Number of frames stored per allocation traceback
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.baseline = tracemalloc.take_snapshot()
+
+    def stop(self) -> None:
+        """Stop tracing allocations and discard the baseline."""
+        tracemalloc.stop()
+        self.baseline = None
+
+    def diff(self, key_type: str = "lineno", limit: int = 25) -> Dict[str, Any]:
+        """
+        Compare the current allocations against the baseline.
+
+        Args:
+            key_type: How allocations are grouped ("filename", "lineno" or "traceback")
+            limit: Maximum number of entries to include
+
+        Returns:
+            The largest allocation changes since the baseline
+        """
+        if self.baseline is None:
+            raise RuntimeError("tracemalloc is not started")
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            )
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        stats = snapshot.compare_to(self.baseline, key_type)
+
+        return {
+            "traced_current_bytes": current,
+            "traced_peak_bytes": peak,
+            "top": [
+                {
+                    "location": str(stat.traceback),
+                    "size_bytes": stat.size,
+                    "size_diff_bytes": stat.size_diff,
+                    "count": stat.count,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats[:limit]
+            ],
+        }
+
+
+class TaskTracker:
+    """
+    Record creation times of asyncio tasks via the loop's task factory.
+
+    Tasks created before the tracker was installed are reported without an age.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the task tracker."""
+        self.created_at: "weakref.WeakKeyDictionary[asyncio.Task[Any], float]" = weakref.WeakKeyDictionary()
+
+    def install(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Install the tracking task factory on the given loop.
+
+        Args:
+            loop: The event loop whose tasks should be tracked
+        """
+        previous_factory = loop.get_task_factory()
+
+        def factory(
+            loop: asyncio.AbstractEventLoop,
+            coro: Any,
+            **kwargs: Any,
+        ) -> "asyncio.Future[Any]":
+            if previous_factory is not None:
+                task = previous_factory(loop, coro, **kwargs)
+            else:
+                task = asyncio.Task(coro, loop=loop, **kwargs)
+            if isinstance(task, asyncio.Task):
+                self.created_at[task] = loop.time()
+            return task
+
+        loop.set_task_factory(factory)
+
+    def dump(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> List[Dict[str, Any]]:
+        """
+        Describe every pending task, oldest first.
+
+        Args:
+            loop: The event loop to inspect, defaults to the running loop
+
+        Returns:
+            One entry per pending task with its coroutine, age and current location
+        """
+        loop = loop or asyncio.get_running_loop()
+        now = loop.time()
+        tasks: List[Dict[str, Any]] = []
+
+        for task in asyncio.all_tasks(loop):
+            created_at = self.created_at.get(task)
+            coro = task.get_coro()
+            stack = task.get_stack(limit=1)
+            location = f"{stack[0].f_code.co_filename}:{stack[0].f_lineno}" if stack else None
+            tasks.append(
+                {
+                    "name": task.get_name(),
+                    "coroutine": getattr(coro, "__qualname__", repr(coro)),
+                    "age_seconds": round(now - created_at, 3) if created_at is not None else None,
+                    "location": location,
+                }
+            )
+
+        # Oldest tracked tasks first, untracked tasks (unknown age) last
+        tasks.sort(key=lambda entry: (entry["age_seconds"] is None, -(entry["age_seconds"] or 0)))
+        return tasks
+
+
+class LoopLagMonitor:
+    """
+    Measure event loop responsiveness.
+
+    A background task repeatedly sleeps for `interval` seconds and records how much
+    later than scheduled it was woken up. Stalls above `threshold` are counted in a
+    histogram and the most recent ones are kept for inspection.
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.05, history: int = 100) -> None:
+        """
+        Initialize the monitor.
+
+        Args:
+            interval: Seconds between probes
+            threshold: Minimum lag in seconds counted as a stall
+            history: Number of recent stalls to keep
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.probes = 0
+        self.max_lag = 0.0
+        self.buckets: Dict[str, int] = {f"le_{bound}ms": 0 for bound in LOOP_LAG_BUCKETS_MS}
+        self.buckets["le_infms"] = 0
+        self.recent: Deque[Dict[str, float]] = deque(maxlen=history)
+        self.task: Optional[asyncio.Task[None]] = None
+
+    def record(self, lag: float) -> None:
+        """
+        Record a single lag measurement.
+
+        Args:
+            lag: Seconds between the scheduled and actual wake-up
+        """
+        self.probes += 1
+        self.max_lag = max(self.max_lag, lag)
+        if lag < self.threshold:
+            return
+
+        lag_ms = lag * 1000
+        bucket = next((f"le_{bound}ms" for bound in LOOP_LAG_BUCKETS_MS if lag_ms <= bound), "le_infms")
+        self.buckets[bucket] += 1
+        self.recent.append({"at": time.time(), "lag_ms": round(lag_ms, 3)})
+
+    async def run(self) -> None:
+        """Probe the event loop until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - scheduled))
+
+    def start(self) -> None:
+        """Start probing in a background task."""
+        if self.task is None:
+            self.task = asyncio.create_task(self.run(), name="eyos-loop-lag-monitor")
+
+    async def stop(self) -> None:
+        """Stop the background probe task."""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Summarize the recorded measurements.
+
+        Returns:
+            Probe count, stall histogram and the most recent stalls
+        """
+        return {
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "probes": self.probes,
+            "stalls": sum(self.buckets.values()),
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "histogram": self.buckets,
+            "recent": list(self.recent),
+        }
+
+
+@dataclass
+class ImportTiming:
+    """Import time of one module, as reported by `python -X importtime`."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportTiming]:
+    """
+    Parse the report that `python -X importtime` writes to stderr.
+
+    Args:
+        output: The stderr of the interpreter
+
+    Returns:
+        The modules in import order, nested imports are listed before their parent
+    """
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        stripped = name.lstrip()
+        timings.append(
+            ImportTiming(
+                module=stripped.strip(),
+                self_us=int(self_us),
+                cumulative_us=int(cumulative_us),
+                depth=(len(name) - len(stripped) - 1) // 2,
+            )
+        )
+    return timings
+
+
+def measure_import(statement: str, env: Optional[Dict[str, str]] = None) -> List[ImportTiming]:
+    """
+    Measure a cold import in a fresh interpreter.
+
+    Args:
+        statement: Python code performing the import, e.g. `import eyos.main`
+        env: Environment of the interpreter, defaults to the current one
+
+    Returns:
+        The parsed import timings
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return parse_importtime(completed.stderr)
@@ -1,91 +1,314 @@
 import asyncio
-import json
 import logging
+import math
+import time
 from contextlib import asynccontextmanager
-from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Optional, Union
+from typing import (
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from pydantic import ValidationError
 
 from eyos.config import Settings
-from eyos.models import NewStoreEvent
+from eyos.exceptions.queue import QueueOverloadedError
+from eyos.models import HailTransaction, NewStoreEvent
 from eyos.services.hail_client import HailClient
-from eyos.services.transformer import transform_newstore_to_hail
+from eyos.services.ledger import DeliveryLedger, DeliveryState
+from eyos.services.metrics import metric_name, metrics
+from eyos.services.queued_event import EventPriority, QueuedEvent
+from eyos.services.scheduling import FairScheduler, PriorityScheduler
+from eyos.services.tax import load_tax_table
+from eyos.services.transformer import payment_token_key, transform_newstore_to_hail
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class InMemoryQueue:
     """
     In-memory queue for background processing.
 
+    Events are split into priority lanes (live store checkouts first, historical
+    replays last, see `EventPriority`) with aging, so even the lowest lane keeps
+    draining. Within a lane events are kept in per-tenant sub-queues and handed
+    to a pool of workers in deficit round-robin order (see `FairScheduler`), so
+    one tenant's backlog cannot starve the others. Events are held as compact
+    `QueuedEvent` records, so a large backlog stays cheap in memory.
+
+    The queue is bounded and sheds load with hysteresis: once the depth reaches
+    the high watermark, new events are rejected until workers have drained it
+    back down to the low watermark. Rejected callers are told when to retry based
+    on the measured drain rate.
+
+    With coalescing enabled, an event for the same tenant, order and event name
+    as one still waiting replaces the waiting one in place, so only the latest
+    state of an order is sent. An index of waiting events keeps this O(1).
+
     In a production environment, this would be replaced with a proper message queue
     like RabbitMQ, AWS SQS, or Redis.
     """
 
-    def __init__(self) -> None:
-        """Initialize the in-memory queue."""
-        self.queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+    def __init__(
+        self,
+        maxsize: int = 0,
+        high_watermark: Optional[int] = None,
+        low_watermark: Optional[int] = None,
+        max_retry_after: int = 60,
+        shed_status_code: int = 503,
+        scheduler: Optional[PriorityScheduler[QueuedEvent]] = None,
+        coalesce: bool = False,
+    ) -> None:
+        """
+        Initialize the in-memory queue.
+
+        Args:
+            maxsize: Maximum number of queued events, 0 for unbounded
+            high_watermark: Depth at which new events start being rejected, defaults to `maxsize`
+            low_watermark: Depth at which events are accepted again, defaults to `high_watermark`
+            max_retry_after: Upper bound in seconds for the suggested retry delay
+            shed_status_code: HTTP status returned to rejected callers (429 or 503)
+            scheduler: Event scheduler, defaults to one lane per `EventPriority` with equal tenant weights
+            coalesce: Replace waiting events by newer ones with the same key
+        """
+        self.high_watermark = high_watermark if high_watermark is not None else maxsize
+        self.low_watermark = low_watermark if low_watermark is not None else self.high_watermark
+        if self.low_watermark > self.high_watermark or (maxsize and self.high_watermark > maxsize):
+            raise ValueError("Queue watermarks must satisfy low <= high <= maxsize")
+
+        self.maxsize = maxsize
+        self.scheduler = scheduler or PriorityScheduler(len(EventPriority))
+        self.max_retry_after = max_retry_after
+        self.shed_status_code = shed_status_code
+        self.coalesce = coalesce
+        self.waiting: Dict[Tuple[str, str, str], QueuedEvent] = {}
+        self.shedding = False
         self.running = False
-        self.task: Optional[asyncio.Task[None]] = None
+        self.tasks: List[asyncio.Task[None]] = []
+        self._ready = asyncio.Condition()
+
+        # Drain rate (events/second) as an exponentially weighted moving average
+        self.drain_rate = 0.0
+        self._drain_window_start = time.monotonic()
+        self._drain_window_count = 0
 
-    async def enqueue(self, event: Dict[str, Any]) -> None:
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "InMemoryQueue":
         """
-        Add an event to the queue.
+        Create a queue sized according to the application settings.
+
+        Args:
+            settings: Application settings
+
+        Returns:
+            The configured queue
+        """
+        return cls(
+            maxsize=settings.queue_max_size,
+            high_watermark=settings.queue_high_watermark,
+            low_watermark=settings.queue_low_watermark,
+            max_retry_after=settings.queue_max_retry_after,
+            shed_status_code=settings.queue_shed_status_code,
+            scheduler=PriorityScheduler(
+                len(EventPriority),
+                aging_interval=settings.queue_priority_aging_interval,
+                level_factory=lambda in_flight: FairScheduler(
+                    weights=settings.queue_tenant_weights,
+                    default_weight=settings.queue_default_tenant_weight,
+                    max_in_flight=settings.queue_tenant_max_in_flight,
+                    default_max_in_flight=settings.queue_default_tenant_max_in_flight,
+                    in_flight=in_flight,
+                ),
+            ),
+            coalesce=settings.queue_coalesce,
+        )
+
+    def qsize(self) -> int:
+        """Number of events waiting to be processed."""
+        return len(self.scheduler)
+
+    def is_overloaded(self) -> bool:
+        """
+        Check whether new events should be rejected.
+
+        Returns:
+            True while the queue is shedding load
+        """
+        if not self.high_watermark:
+            return False
+
+        depth = self.qsize()
+        if self.shedding and depth <= self.low_watermark:
+            self.shedding = False
+            logger.info("Queue drained to %d events, accepting new events again", depth)
+        elif not self.shedding and depth >= self.high_watermark:
+            self.shedding = True
+            logger.warning("Queue reached %d events, shedding new events", depth)
+        return self.shedding
+
+    def retry_after(self) -> int:
+        """
+        Estimate how long it will take to drain to the low watermark.
+
+        Returns:
+            Suggested retry delay in whole seconds
+        """
+        backlog = self.qsize() - self.low_watermark
+        if self.drain_rate <= 0:
+            return self.max_retry_after
+        return max(1, min(self.max_retry_after, math.ceil(backlog / self.drain_rate)))
+
+    def _record_dequeue(self) -> None:
+        """Update the drain rate estimate after an event was taken off the queue."""
+        self._drain_window_count += 1
+        now = time.monotonic()
+        elapsed = now - self._drain_window_start
+        if elapsed >= 1.0:
+            window_rate = self._drain_window_count / elapsed
+            self.drain_rate = window_rate if self.drain_rate == 0 else 0.3 * window_rate + 0.7 * self.drain_rate
+            self._drain_window_start = now
+            self._drain_window_count = 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Report the queue state as gauges.
+
+        Returns:
+            Queue depth, capacity, watermarks, shedding state, drain rate and per-lane and per-tenant backlog
+        """
+        gauges: Dict[str, float] = {
+            "queue_depth": self.qsize(),
+            "queue_capacity": self.maxsize,
+            "queue_high_watermark": self.high_watermark,
+            "queue_low_watermark": self.low_watermark,
+            "queue_shedding": int(self.shedding),
+            "queue_drain_rate": round(self.drain_rate, 3),
+        }
+        for priority in EventPriority:
+            gauges[metric_name("queue_priority_depth", priority=priority.name.lower())] = len(
+                self.scheduler.levels[priority]
+            )
+        for tenant, depth in self.scheduler.depths().items():
+            gauges[metric_name("queue_tenant_depth", tenant=tenant)] = depth
+        for tenant, in_flight in self.scheduler.in_flight.items():
+            gauges[metric_name("queue_tenant_in_flight", tenant=tenant)] = in_flight
+        return gauges
+
+    async def enqueue(self, event: QueuedEvent) -> None:
+        """
+        Add an event to its tenant's sub-queue in its priority lane.
 
         Args:
             event: The event to enqueue
+
+        Raises:
+            QueueOverloadedError: When the queue is shedding load or full
+        """
+        if self.coalesce:
+            # Replacing a waiting event does not grow the queue, so it is accepted even when shedding
+            waiting = self.waiting.get(event.key)
+            if waiting is not None:
+                waiting.supersede(event)
+                metrics.increment("queue_coalesced_total", tenant=event.tenant)
+                logger.info("Coalesced %s event for order %s with the waiting one", event.name, event.order_id)
+                return
+
+        if self.is_overloaded() or (self.maxsize and self.qsize() >= self.maxsize):
+            metrics.increment("queue_shed_total")
+            raise QueueOverloadedError(self.retry_after(), self.shed_status_code)
+
+        event.enqueued_at = time.monotonic()
+        async with self._ready:
+            self.scheduler.push(event.tenant, event, event.priority)
+            if self.coalesce:
+                self.waiting[event.key] = event
+            self._ready.notify()
+
+        metrics.increment("queue_enqueued_total")
+        logger.info("Enqueued event with ID: %s", event.order_id)
+
+    def _taken(self, tenant: str, event: QueuedEvent, now: float) -> None:
+        """Account for an event taken off the queue by the scheduler."""
+        if self.waiting.get(event.key) is event:
+            del self.waiting[event.key]
+        metrics.increment("queue_wait_seconds_sum", now - event.enqueued_at, tenant=tenant)
+        metrics.increment("queue_wait_seconds_count", tenant=tenant)
+        self._record_dequeue()
+
+    async def get(self) -> Tuple[str, QueuedEvent]:
         """
-        await self.queue.put(event)
-        logger.info(f"Enqueued event with ID: {event.get('payload', {}).get('id', 'unknown')}")
+        Wait for the next event the scheduler allows to run.
 
-    async def process_queue(
-        self,
-        processor: Callable[[Dict[str, Any]], Awaitable[None]]
-    ) -> None:
+        Returns:
+            The tenant and the event, which must be passed to `task_done` afterwards
+        """
+        async with self._ready:
+            while (entry := self.scheduler.pop()) is None:
+                await self._ready.wait()
+
+        tenant, event = entry
+        self._taken(tenant, event, time.monotonic())
+        return tenant, event
+
+    async def get_batch(self, max_size: int) -> List[Tuple[str, QueuedEvent]]:
         """
-        Process items from the queue.
+        Wait for the next event, then take the events the scheduler allows after it without waiting.
 
         Args:
-            processor: Callback function to process each item
+            max_size: Most events taken
+
+        Returns:
+            The tenants and events in scheduling order, each must be passed to `task_done` afterwards
         """
-        while self.running:
-            try:
-                # Wait for an item with a timeout to allow for graceful shutdown
-                try:
-                    item = await asyncio.wait_for(self.queue.get(), timeout=1.0)
-                except asyncio.TimeoutError:
-                    continue
+        async with self._ready:
+            while (entry := self.scheduler.pop()) is None:
+                await self._ready.wait()
+            batch = [entry]
+            while len(batch) < max_size and (entry := self.scheduler.pop()) is not None:
+                batch.append(entry)
+
+        now = time.monotonic()
+        for tenant, event in batch:
+            self._taken(tenant, event, now)
+        return batch
+
+    async def task_done(self, tenant: str) -> None:
+        """
+        Release the tenant's in-flight slot taken by `get`.
 
-                # Process the item
-                try:
-                    await processor(item)
-                except Exception as e:
-                    logger.error(f"Error processing queue item: {e!s}")
-                finally:
-                    self.queue.task_done()
-
-            except asyncio.CancelledError:
-                logger.info("Queue processor task was cancelled")
-                break
-            except Exception as e:
-                logger.error(f"Unexpected error in queue processor: {e!s}")
-                # Avoid tight loop if there's a persistent error
-                await asyncio.sleep(1)
-
-    async def start(
-        self,
-        processor: Callable[[Dict[str, Any]], Awaitable[None]]
-    ) -> None:
+        Args:
+            tenant: The tenant whose event finished processing
+        """
+        async with self._ready:
+            self.scheduler.done(tenant)
+            # A worker may be waiting for this tenant to drop below its in-flight cap
+            self._ready.notify()
+
+    async def start(self, run: Callable[[], Coroutine[Any, Any, None]]) -> None:
         """
-        Start processing the queue.
+        Start the pipeline taking batches of events off the queue.
 
         Args:
-            processor: Callback function to process each item
+            run: Runs the pipeline until cancelled, see `BatchPipeline.run`
         """
         if self.running:
             return
 
         self.running = True
-        self.task = asyncio.create_task(self.process_queue(processor))
-        logger.info("Queue processor started")
+        self.tasks = [asyncio.create_task(run())]
+        logger.info("Queue pipeline started")
 
     async def stop(self) -> None:
         """Stop processing the queue."""
@@ -93,15 +316,157 @@ class InMemoryQueue:
             return
 
         self.running = False
-        if self.task:
-            self.task.cancel()
-            try:
-                await self.task
-            except asyncio.CancelledError:
-                pass
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
         logger.info("Queue processor stopped")
 
 
+# A prepared event: its tenant, the queued event, what prepare returned and when processing started
+_Prepared = Tuple[str, QueuedEvent, T, float]
+
+
+class BatchPipeline(Generic[T]):
+    """
+    Staged pipeline processing events taken off the queue in batches.
+
+    Three stages run at once, connected by bounded buffers:
+    1. Dequeue: takes a batch of events, sized to the backlog
+    2. Prepare: parses and transforms the events of a batch (CPU)
+    3. Send: sends the prepared events, `concurrency` at a time (I/O)
+
+    Batch N+1 is transformed while batch N is in flight, and a stage that falls
+    behind fills its input buffer until the stage before it waits, so at most
+    `buffer_size` batches wait between two stages. While the queue keeps up,
+    batches are a single event so it goes out at once. They grow with the
+    backlog, up to `max_batch_size`, so a deep queue is drained with fewer,
+    larger handoffs between the stages.
+    """
+
+    def __init__(
+        self,
+        queue: InMemoryQueue,
+        prepare: Callable[[QueuedEvent], Awaitable[Optional[T]]],
+        send: Callable[[QueuedEvent, T], Awaitable[None]],
+        max_batch_size: int = 32,
+        buffer_size: int = 2,
+        concurrency: int = 4,
+    ) -> None:
+        """
+        Initialize the pipeline.
+
+        Args:
+            queue: Queue the events are taken from
+            prepare: Prepares an event for sending, returning None to drop it
+            send: Sends a prepared event
+            max_batch_size: Most events taken off the queue at once
+            buffer_size: Batches that may wait between two stages
+            concurrency: Events sent at once
+        """
+        self.queue = queue
+        self.prepare = prepare
+        self.send = send
+        self.max_batch_size = max(1, max_batch_size)
+        self.concurrency = max(1, concurrency)
+        self.last_batch_size = 0
+        self._batches: asyncio.Queue[List[Tuple[str, QueuedEvent]]] = asyncio.Queue(buffer_size)
+        self._prepared: asyncio.Queue[List[_Prepared[T]]] = asyncio.Queue(buffer_size)
+        self._send_slots = asyncio.Semaphore(self.concurrency)
+        self._sending: Set[asyncio.Task[None]] = set()
+
+    def batch_size(self) -> int:
+        """
+        Size of the next batch: one event per round of sends waiting in the queue, at least one.
+
+        Returns:
+            Events to take off the queue
+        """
+        return max(1, min(self.max_batch_size, self.queue.qsize() // self.concurrency))
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Report the pipeline state as gauges.
+
+        Returns:
+            Last batch size, batches waiting before each stage and events being sent
+        """
+        return {
+            "queue_pipeline_batch_size": self.last_batch_size,
+            "queue_pipeline_prepare_backlog": self._batches.qsize(),
+            "queue_pipeline_send_backlog": self._prepared.qsize(),
+            "queue_pipeline_sending": len(self._sending),
+        }
+
+    async def run(self) -> None:
+        """Run the stages until cancelled."""
+        stages = [
+            asyncio.create_task(self._dequeue_stage()),
+            asyncio.create_task(self._prepare_stage()),
+            asyncio.create_task(self._send_stage()),
+        ]
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            tasks = [*stages, *self._sending]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _done(self, tenant: str, started_at: float) -> None:
+        metrics.increment("queue_processing_seconds_sum", time.monotonic() - started_at, tenant=tenant)
+        metrics.increment("queue_processing_seconds_count", tenant=tenant)
+        await self.queue.task_done(tenant)
+
+    async def _dequeue_stage(self) -> None:
+        while True:
+            batch = await self.queue.get_batch(self.batch_size())
+            self.last_batch_size = len(batch)
+            metrics.increment("queue_batches_total")
+            metrics.increment("queue_batched_events_total", len(batch))
+            await self._batches.put(batch)
+
+    async def _prepare_stage(self) -> None:
+        while True:
+            batch = await self._batches.get()
+            prepared: List[_Prepared[T]] = []
+            for tenant, queued in batch:
+                started_at = time.monotonic()
+                try:
+                    item = await self.prepare(queued)
+                except Exception as e:
+                    logger.error("Error processing queue item: %s", e)
+                    item = None
+
+                if item is None:
+                    await self._done(tenant, started_at)
+                else:
+                    prepared.append((tenant, queued, item, started_at))
+                # Transforms do not wait on anything, let the responses of events in flight be handled
+                await asyncio.sleep(0)
+
+            if prepared:
+                await self._prepared.put(prepared)
+
+    async def _send_stage(self) -> None:
+        while True:
+            prepared = await self._prepared.get()
+            for entry in prepared:
+                await self._send_slots.acquire()
+                task = asyncio.create_task(self._send_one(*entry))
+                self._sending.add(task)
+                task.add_done_callback(self._sending.discard)
+
+    async def _send_one(self, tenant: str, queued: QueuedEvent, item: T, started_at: float) -> None:
+        try:
+            await self.send(queued, item)
+        except Exception as e:
+            logger.error("Error processing queue item: %s", e)
+        finally:
+            self._send_slots.release()
+            await self._done(tenant, started_at)
+
+
 class QueueProcessor:
     """
     Processor for handling queued events.
@@ -110,26 +475,46 @@ class QueueProcessor:
     1. Taking events from the queue
     2. Transforming NewStore events to Hail API format
     3. Sending the transformed events to the Hail API
+
+    Queued events go through a `BatchPipeline`, so transforms overlap with
+    the sends of earlier events.
     """
 
-    def __init__(self, queue: InMemoryQueue, settings: Settings) -> None:
+    def __init__(
+        self,
+        queue: InMemoryQueue,
+        settings: Settings,
+        hail_client: Optional[HailClient] = None,
+        ledger: Optional[DeliveryLedger] = None,
+    ) -> None:
         """
         Initialize the queue processor.
 
         Args:
             queue: Queue for event processing
             settings: Application settings
+            hail_client: Shared Hail API client, created from settings if omitted
+            ledger: Ledger recording the delivery of each event, None to not record it
         """
         self.settings = settings
         self.queue = queue
-
-        # Get HailClient from settings
-        self.hail_client = HailClient(settings)
+        self.hail_client = hail_client or HailClient(settings)
+        self.ledger = ledger
+        self.token_key = payment_token_key(settings)
+        self.tax_table = load_tax_table(settings.tax_rates_file)
+        self.pipeline: BatchPipeline[HailTransaction] = BatchPipeline(
+            queue,
+            self.prepare_event,
+            self.send_event,
+            max_batch_size=settings.queue_batch_max_size,
+            buffer_size=settings.queue_pipeline_buffer,
+            concurrency=settings.queue_workers,
+        )
 
     @asynccontextmanager
     async def lifespan(self) -> AsyncGenerator[None, None]:
         """Lifecycle manager for the queue processor."""
-        await self.queue.start(self.process_event)
+        await self.queue.start(self.pipeline.run)
         try:
             yield
         finally:
@@ -142,42 +527,83 @@ class QueueProcessor:
         Args:
             event: The event to enqueue (either a dict or NewStoreEvent)
         """
-        # Convert to dict for serialization if it's a Pydantic model
+        # Store a compact record rather than the nested event
         if isinstance(event, NewStoreEvent):
-            event_dict = json.loads(event.model_dump_json())
+            queued = QueuedEvent.from_event(event)
         else:
-            event_dict = event
+            queued = QueuedEvent.from_dict(event)
 
-        await self.queue.enqueue(event_dict)
+        await self.queue.enqueue(queued)
 
-    async def process_event(self, event_dict: Dict[str, Any]) -> None:
+    async def prepare_event(self, queued: QueuedEvent) -> Optional[HailTransaction]:
         """
-        Process a single event from the queue.
+        Validate a queued event and transform it to a Hail transaction.
 
         Args:
-            event_dict: The event to process
+            queued: The event to prepare
+
+        Returns:
+            The transaction, None when the event is dropped
         """
         try:
-            # Parse the event
-            event = NewStoreEvent.model_validate(event_dict)
-            logger.info(
-                f"Processing queued event: {event.name} for order {event.payload.id}"
-            )
+            # Only the envelope was validated when the event was accepted
+            event = queued.to_event()
+        except ValidationError as e:
+            metrics.increment("queue_invalid_events_total", tenant=queued.tenant)
+            logger.error("Dropping invalid %s event for order %s: %s", queued.name, queued.order_id, e)
+            self._record(queued, DeliveryState.FAILED, f"Invalid event: {e.error_count()} validation errors")
+            return None
 
-            # Transform the event to Hail API format
-            hail_transaction = await transform_newstore_to_hail(event)
+        try:
+            logger.info("Processing queued event: %s for order %s", event.name, event.payload.id)
+            return await transform_newstore_to_hail(event, self.token_key, self.tax_table)
+        except Exception as e:
+            logger.error("Error processing event from queue: %s", e)
+            self._record(queued, DeliveryState.FAILED, f"Transform failed: {e!s}")
+            return None
 
-            # Send the transformed event to the Hail API
-            response = await self.hail_client.send_transaction(hail_transaction)
+    def _record(self, queued: QueuedEvent, state: DeliveryState, detail: Optional[str] = None) -> None:
+        if self.ledger is not None:
+            self.ledger.record(queued.tenant, queued.order_id, queued.name, state, detail)
+
+    async def send_event(self, queued: QueuedEvent, hail_transaction: HailTransaction) -> None:
+        """
+        Send a prepared event to the Hail API.
+
+        Args:
+            queued: The event
+            hail_transaction: Its transaction
+        """
+        # The deadline runs from when the event was accepted, through queueing and retries
+        deadline = queued.enqueued_at + self.settings.hail_api_deadline if self.settings.hail_api_deadline else None
+        transaction_id = hail_transaction.receipt.transaction_information.id
+        self._record(queued, DeliveryState.SENT, transaction_id)
+        try:
+            response = await self.hail_client.send_transaction(hail_transaction, deadline=deadline)
+            self._record(queued, DeliveryState.ACKED, transaction_id)
 
             logger.info(
-                f"Successfully processed event: {event.name} for order {event.payload.id}. "
-                f"Hail API response: {response.get('status', 'unknown')}"
+                "Successfully processed event: %s for order %s. Hail API response: %s",
+                queued.name,
+                queued.order_id,
+                response.get("status", "unknown"),
             )
 
         except Exception as e:
-            logger.error(f"Error processing event from queue: {e!s}")
+            logger.error("Error processing event from queue: %s", e)
+            self._record(queued, DeliveryState.FAILED, str(getattr(e, "detail", e)))
             # In a production environment, we would:
             # 1. Implement a dead-letter queue for failed events
             # 2. Track retry counts per event
             # 3. Apply more sophisticated retry strategies
+
+    async def process_event(self, queued: QueuedEvent) -> None:
+        """
+        Process a single event outside of the pipeline.
+
+        Args:
+            queued: The event to process
+        """
+        hail_transaction = await self.prepare_event(queued)
+        if hail_transaction is not None:
+            await self.send_event(queued, hail_transaction)
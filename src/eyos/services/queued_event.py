@@ -0,0 +1,199 @@
+import json
+import sys
+import time
+import zlib
+from enum import IntEnum
+from typing import Any, Dict, Optional, Tuple
+
+from pydantic_core import to_json
+
+from eyos.models import NewStoreEvent, NewStoreEventEnvelope
+
+# Fast compression: queued events are compressed on the request path
+_COMPRESSION_LEVEL = 1
+
+
+class EventPriority(IntEnum):
+    """Priority lanes of queued events, lower is more urgent."""
+
+    LIVE_STORE = 0  # Customer waiting at the till for the e-receipt
+    LIVE_OTHER = 1  # Web and other live channels
+    HISTORICAL = 2  # Imports and replays
+
+
+def event_priority(event: Dict[str, Any]) -> EventPriority:
+    """
+    Derive the priority lane of an event from its order payload.
+
+    Args:
+        event: The event to classify
+
+    Returns:
+        The priority lane
+    """
+    payload = event.get("payload", {})
+    return _priority(payload.get("channel_type"), bool(payload.get("is_historical")))
+
+
+def _priority(channel_type: Optional[str], is_historical: bool) -> EventPriority:
+    if is_historical:
+        return EventPriority.HISTORICAL
+    if channel_type == "store":
+        return EventPriority.LIVE_STORE
+    return EventPriority.LIVE_OTHER
+
+
+class QueuedEvent:
+    """
+    Compact record of an event waiting in the queue.
+
+    Only the fields needed for scheduling are kept as attributes, with the
+    tenant and event name interned since they repeat across the backlog. The
+    event itself is held as compressed JSON and only decoded by the worker
+    that processes it, so a queued event costs a couple of kilobytes instead
+    of a tree of dicts and datetimes.
+    """
+
+    __slots__ = ("_data", "enqueued_at", "name", "order_id", "priority", "tenant")
+
+    def __init__(
+        self,
+        tenant: str,
+        name: str,
+        order_id: str,
+        priority: EventPriority,
+        data: bytes,
+        enqueued_at: Optional[float] = None,
+    ) -> None:
+        """
+        Initialize the record.
+
+        Args:
+            tenant: The tenant the event belongs to
+            name: The event name
+            order_id: ID of the order in the payload
+            priority: The priority lane
+            data: The event as zlib-compressed JSON
+            enqueued_at: Monotonic time the event was queued, defaults to now
+        """
+        self.tenant = sys.intern(tenant)
+        self.name = sys.intern(name)
+        self.order_id = order_id
+        self.priority = priority
+        self._data = data
+        self.enqueued_at = enqueued_at if enqueued_at is not None else time.monotonic()
+
+    @classmethod
+    def from_dict(cls, event: Dict[str, Any]) -> "QueuedEvent":
+        """
+        Build a record from an event dict.
+
+        Args:
+            event: The event, values such as datetimes are serialized as in the API
+
+        Returns:
+            The queued event record
+        """
+        return cls(
+            tenant=event.get("tenant", "unknown"),
+            name=event.get("name", ""),
+            order_id=str(event.get("payload", {}).get("id", "unknown")),
+            priority=event_priority(event),
+            data=zlib.compress(to_json(event), _COMPRESSION_LEVEL),
+        )
+
+    @classmethod
+    def from_event(cls, event: NewStoreEvent) -> "QueuedEvent":
+        """
+        Build a record from a validated event.
+
+        Args:
+            event: The event
+
+        Returns:
+            The queued event record
+        """
+        return cls(
+            tenant=event.tenant,
+            name=event.name,
+            order_id=event.payload.id,
+            priority=_priority(event.payload.channel_type, event.payload.is_historical),
+            data=zlib.compress(event.model_dump_json().encode(), _COMPRESSION_LEVEL),
+        )
+
+    @classmethod
+    def from_json(cls, body: bytes, envelope: NewStoreEventEnvelope) -> "QueuedEvent":
+        """
+        Build a record from the raw event, without validating it fully.
+
+        Args:
+            body: The event as received
+            envelope: The routing fields already extracted from the body
+
+        Returns:
+            The queued event record
+        """
+        return cls(
+            tenant=envelope.tenant,
+            name=envelope.name,
+            order_id=envelope.payload.id,
+            priority=_priority(envelope.payload.channel_type, envelope.payload.is_historical),
+            data=zlib.compress(body, _COMPRESSION_LEVEL),
+        )
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        """Identity of the order state the event carries: tenant, order ID and event name."""
+        return self.tenant, self.order_id, self.name
+
+    def supersede(self, newer: "QueuedEvent") -> None:
+        """
+        Replace the carried event by a newer version, keeping this record's place in the queue.
+
+        The queueing time is refreshed, so the delivery deadline of the newer
+        version counts from when it arrived.
+
+        Args:
+            newer: The newer event with the same key
+        """
+        self._data = newer._data
+        self.enqueued_at = time.monotonic()
+
+    @property
+    def size(self) -> int:
+        """Size of the compressed event in bytes."""
+        return len(self._data)
+
+    def json(self) -> bytes:
+        """
+        Decompress the event.
+
+        Returns:
+            The event as JSON
+        """
+        return zlib.decompress(self._data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Decode the event into plain JSON types.
+
+        Returns:
+            The event dict
+        """
+        event: Dict[str, Any] = json.loads(self.json())
+        return event
+
+    def to_event(self) -> NewStoreEvent:
+        """
+        Decode and validate the event.
+
+        Returns:
+            The NewStore event
+        """
+        return NewStoreEvent.model_validate_json(self.json())
+
+    def __repr__(self) -> str:
+        return (
+            f"QueuedEvent(tenant={self.tenant!r}, name={self.name!r}, order_id={self.order_id!r}, "
+            f"priority={self.priority.name}, size={self.size})"
+        )
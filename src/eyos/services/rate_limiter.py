@@ -0,0 +1,102 @@
+import asyncio
+import fcntl
+import mmap
+import os
+import struct
+import time
+from contextlib import contextmanager
+from typing import Generator, Optional, Tuple, Union
+
+# Bucket state: available tokens and the monotonic time they were last refilled
+_STATE = struct.Struct("dd")
+
+
+class RateLimiter:
+    """
+    Token bucket rate limiter that can be shared between processes.
+
+    Without a path the bucket lives in process memory. With a path the bucket is
+    kept in a small memory-mapped file guarded by an exclusive `flock`, so every
+    worker process on the host draws from the same budget. `CLOCK_MONOTONIC` is
+    system-wide on Linux, which makes the refill timestamps comparable across
+    processes.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None, path: Optional[str] = None) -> None:
+        """
+        Initialize the rate limiter.
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity, defaults to one second worth of tokens
+            path: File backing the shared bucket, None for a process-local bucket
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+
+        self.rate = rate
+        self.burst = float(burst if burst is not None else max(1, int(rate)))
+        self.path = path
+        self._fd: Optional[int] = None
+        self._state: Union[bytearray, mmap.mmap]
+
+        if path is None:
+            self._state = bytearray(_STATE.size)
+            _STATE.pack_into(self._state, 0, self.burst, time.monotonic())
+        else:
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            with self._locked():
+                if os.fstat(self._fd).st_size < _STATE.size:
+                    os.ftruncate(self._fd, _STATE.size)
+                    os.pwrite(self._fd, _STATE.pack(self.burst, time.monotonic()), 0)
+            self._state = mmap.mmap(self._fd, _STATE.size)
+
+    @contextmanager
+    def _locked(self) -> Generator[None, None, None]:
+        if self._fd is None:
+            yield
+            return
+
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available.
+
+        Returns:
+            0 when a token was taken, otherwise the seconds until one is available
+        """
+        with self._locked():
+            state: Tuple[float, float] = _STATE.unpack_from(self._state, 0)
+            tokens, updated_at = state
+            now = time.monotonic()
+            # A timestamp from the future means the host rebooted, start over with a full bucket
+            elapsed = now - updated_at if now >= updated_at else self.burst / self.rate
+            tokens = min(self.burst, tokens + elapsed * self.rate)
+
+            if tokens >= 1:
+                _STATE.pack_into(self._state, 0, tokens - 1, now)
+                return 0.0
+
+            _STATE.pack_into(self._state, 0, tokens, now)
+            return (1 - tokens) / self.rate
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return
+            await asyncio.sleep(wait)
+
+    def close(self) -> None:
+        """Release the backing file, if any."""
+        if isinstance(self._state, mmap.mmap):
+            self._state.close()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from typing import List, Optional, Type
+
+from fastapi import Depends, Request
+from pydantic import BaseModel
+
+from eyos.config import Settings, get_settings
+from eyos.exceptions.request_body import InvalidRequestBodyError, RequestBodyTooLargeError
+from eyos.services.metrics import metrics
+from eyos.utils.json_stream import JSONStreamError, JSONStreamValidator, SchemaNode, schema_for_model
+
+logger = logging.getLogger(__name__)
+
+
+def _too_large(route: str, limit: int) -> RequestBodyTooLargeError:
+    metrics.increment("request_body_rejected_total", route=route, reason="too_large")
+    return RequestBodyTooLargeError(limit)
+
+
+def _invalid(route: str, error: JSONStreamError) -> InvalidRequestBodyError:
+    metrics.increment("request_body_rejected_total", route=route, reason="invalid")
+    return InvalidRequestBodyError(str(error))
+
+
+async def read_body(
+    request: Request,
+    route: str,
+    limit: int,
+    stream_threshold: int,
+    schema: Optional[SchemaNode] = None,
+    max_depth: int = 32,
+) -> bytes:
+    """
+    Read a request body within a size limit.
+
+    A Content-Length above the limit is rejected before reading anything, and
+    a streamed body as soon as it goes over. Bodies above the stream
+    threshold are checked by a streaming JSON validator as their chunks
+    arrive, in a thread, so a malformed body is rejected at the chunk holding
+    the error instead of after it was read in full. Accepted bodies are
+    returned whole, to be validated by pydantic.
+
+    Args:
+        request: The request, its body must not have been read
+        route: Name of the route, for metrics
+        limit: Largest body accepted in bytes
+        stream_threshold: Bytes above which the body is validated as it streams
+        schema: Schema streamed bodies are checked against, None to only check their syntax
+        max_depth: Deepest JSON nesting of streamed bodies
+
+    Returns:
+        The body
+
+    Raises:
+        RequestBodyTooLargeError: When the body is larger than the limit
+        InvalidRequestBodyError: When a streamed body is not valid JSON or does not match the schema
+    """
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > limit:
+        raise _too_large(route, limit)
+
+    chunks: List[bytes] = []
+    size = 0
+    stream = request.stream()
+    async for chunk in stream:
+        size += len(chunk)
+        if size > limit:
+            raise _too_large(route, limit)
+        chunks.append(chunk)
+        if size > stream_threshold:
+            break
+    else:
+        return b"".join(chunks)
+
+    validator = JSONStreamValidator(schema, max_depth)
+    try:
+        # Validating a chunk takes milliseconds, it runs in a thread like large compressions
+        await asyncio.to_thread(validator.feed, b"".join(chunks))
+        async for chunk in stream:
+            size += len(chunk)
+            if size > limit:
+                raise _too_large(route, limit)
+            chunks.append(chunk)
+            await asyncio.to_thread(validator.feed, chunk)
+        validator.close()
+    except JSONStreamError as e:
+        raise _invalid(route, e) from e
+
+    logger.debug("Validated %d byte request body for %s as it streamed", size, route)
+    return b"".join(chunks)
+
+
+class RequestBody:
+    """
+    Dependency reading the raw body of a route within its size limit.
+
+    Limits are set per route name in `body_max_sizes`, with `body_max_size`
+    for the other routes. Large bodies are validated against the model's
+    schema while they stream, see `read_body`.
+    """
+
+    def __init__(self, route: str, model: Optional[Type[BaseModel]] = None) -> None:
+        """
+        Initialize the dependency.
+
+        Args:
+            route: Name of the route in `body_max_sizes`
+            model: Model the body should match, None to only check that it is JSON
+        """
+        self.route = route
+        self.model = model
+
+    async def __call__(self, request: Request, settings: Settings = Depends(get_settings)) -> bytes:
+        """Read the body of the request."""
+        return await read_body(
+            request,
+            self.route,
+            settings.body_max_sizes.get(self.route, settings.body_max_size),
+            settings.body_stream_threshold,
+            schema_for_model(self.model) if self.model is not None else None,
+            settings.body_max_depth,
+        )
@@ -0,0 +1,234 @@
+import time
+from collections import defaultdict, deque
+from typing import Callable, Deque, Dict, Generic, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def _release(in_flight: Dict[str, int], tenant: str) -> None:
+    """Decrement a tenant's in-flight count, dropping it at zero."""
+    remaining = in_flight.get(tenant, 0) - 1
+    if remaining > 0:
+        in_flight[tenant] = remaining
+    else:
+        in_flight.pop(tenant, None)
+
+
+class FairScheduler(Generic[T]):
+    """
+    Deficit round-robin scheduler over per-tenant FIFO sub-queues.
+
+    Every tenant with a backlog takes turns. On its turn a tenant may dequeue up
+    to `weight` items before the next tenant is served, so a tenant replaying
+    history can never delay another tenant's events by more than one round.
+    Tenants that reached their in-flight cap are skipped until an item of theirs
+    completes. All operations are O(1) amortized. Tenant names come from event
+    payloads, so a tenant's entries are removed once it has nothing queued or
+    in flight.
+    """
+
+    def __init__(
+        self,
+        weights: Optional[Dict[str, int]] = None,
+        default_weight: int = 1,
+        max_in_flight: Optional[Dict[str, int]] = None,
+        default_max_in_flight: int = 0,
+        in_flight: Optional[Dict[str, int]] = None,
+    ) -> None:
+        """
+        Initialize the scheduler.
+
+        Args:
+            weights: Items a tenant may dequeue per round, keyed by tenant
+            default_weight: Weight of tenants without an explicit weight
+            max_in_flight: Maximum items being processed at once, keyed by tenant
+            default_max_in_flight: Cap for tenants without an explicit one, 0 for unlimited
+            in_flight: In-flight counters to share with other schedulers, so caps apply across them
+        """
+        self.weights = weights or {}
+        self.default_weight = default_weight
+        self.max_in_flight = max_in_flight or {}
+        self.default_max_in_flight = default_max_in_flight
+
+        self.queues: Dict[str, Deque[T]] = {}
+        self.active: Deque[str] = deque()
+        self.deficit: Dict[str, int] = {}
+        self.in_flight: Dict[str, int] = in_flight if in_flight is not None else {}
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _at_capacity(self, tenant: str) -> bool:
+        cap = self.max_in_flight.get(tenant, self.default_max_in_flight)
+        return bool(cap) and self.in_flight.get(tenant, 0) >= cap
+
+    def push(self, tenant: str, item: T) -> None:
+        """
+        Append an item to the tenant's sub-queue.
+
+        Args:
+            tenant: The tenant the item belongs to
+            item: The item to schedule
+        """
+        queue = self.queues.get(tenant)
+        if queue is None:
+            queue = self.queues[tenant] = deque()
+        if not queue:
+            self.active.append(tenant)
+            self.deficit[tenant] = 0
+        queue.append(item)
+        self.size += 1
+
+    def pop(self) -> Optional[Tuple[str, T]]:
+        """
+        Take the next item according to the round-robin order.
+
+        The item counts as in flight until `done` is called for its tenant.
+
+        Returns:
+            The tenant and item, or None when nothing is eligible
+        """
+        for _ in range(len(self.active)):
+            tenant = self.active[0]
+            if self._at_capacity(tenant):
+                self.active.rotate(-1)
+                continue
+
+            if self.deficit[tenant] < 1:
+                # Start of this tenant's turn
+                self.deficit[tenant] += max(1, self.weights.get(tenant, self.default_weight))
+
+            queue = self.queues[tenant]
+            item = queue.popleft()
+            self.deficit[tenant] -= 1
+            self.size -= 1
+            self.in_flight[tenant] = self.in_flight.get(tenant, 0) + 1
+
+            if not queue:
+                self.active.popleft()
+                del self.deficit[tenant]
+                del self.queues[tenant]
+            elif self.deficit[tenant] < 1:
+                self.active.rotate(-1)
+
+            return tenant, item
+
+        return None
+
+    def done(self, tenant: str) -> None:
+        """
+        Mark an item of the tenant as processed.
+
+        Args:
+            tenant: The tenant whose item completed
+        """
+        _release(self.in_flight, tenant)
+
+    def depths(self) -> Dict[str, int]:
+        """
+        Report the backlog per tenant.
+
+        Returns:
+            Number of queued items keyed by tenant
+        """
+        return {tenant: len(queue) for tenant, queue in self.queues.items()}
+
+
+class PriorityScheduler(Generic[T]):
+    """
+    Multi-level scheduler with aging.
+
+    Level 0 is the most urgent. Each level is a `FairScheduler`, so tenants share
+    a level fairly, and in-flight caps apply to a tenant across all levels. A
+    level's effective priority improves by one for every `aging_interval` seconds
+    it has had a backlog without being served, so lower levels keep draining even
+    under a constant stream of urgent events.
+    """
+
+    def __init__(
+        self,
+        levels: int,
+        aging_interval: float = 5.0,
+        level_factory: Optional[Callable[[Dict[str, int]], FairScheduler[T]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize the scheduler.
+
+        Args:
+            levels: Number of priority levels
+            aging_interval: Seconds of waiting that promote a level by one, 0 to disable aging
+            level_factory: Builds the scheduler of one level from the shared in-flight counters
+            clock: Time source, in seconds
+        """
+        self.in_flight: Dict[str, int] = {}
+        factory = level_factory or (lambda in_flight: FairScheduler(in_flight=in_flight))
+        self.levels: List[FairScheduler[T]] = [factory(self.in_flight) for _ in range(levels)]
+        self.aging_interval = aging_interval
+        self.clock = clock
+        self.last_served: List[float] = [0.0] * levels
+
+    def __len__(self) -> int:
+        return sum(len(level) for level in self.levels)
+
+    def push(self, tenant: str, item: T, priority: int = 0) -> None:
+        """
+        Append an item to the tenant's sub-queue of the given level.
+
+        Args:
+            tenant: The tenant the item belongs to
+            item: The item to schedule
+            priority: Level index, lower is more urgent
+        """
+        level = self.levels[priority]
+        if not level:
+            # Waiting time of a level is counted from when it got a backlog
+            self.last_served[priority] = self.clock()
+        level.push(tenant, item)
+
+    def _effective_priority(self, priority: int, now: float) -> int:
+        if not self.aging_interval:
+            return priority
+        return priority - int((now - self.last_served[priority]) / self.aging_interval)
+
+    def pop(self) -> Optional[Tuple[str, T]]:
+        """
+        Take the next item from the level with the best effective priority.
+
+        Returns:
+            The tenant and item, or None when nothing is eligible
+        """
+        now = self.clock()
+        candidates = sorted(
+            (priority for priority, level in enumerate(self.levels) if level),
+            key=lambda priority: (self._effective_priority(priority, now), priority),
+        )
+        for priority in candidates:
+            entry = self.levels[priority].pop()
+            if entry is not None:
+                self.last_served[priority] = now
+                return entry
+        return None
+
+    def done(self, tenant: str) -> None:
+        """
+        Mark an item of the tenant as processed.
+
+        Args:
+            tenant: The tenant whose item completed
+        """
+        _release(self.in_flight, tenant)
+
+    def depths(self) -> Dict[str, int]:
+        """
+        Report the backlog per tenant across all levels.
+
+        Returns:
+            Number of queued items keyed by tenant
+        """
+        depths: Dict[str, int] = defaultdict(int)
+        for level in self.levels:
+            for tenant, depth in level.depths().items():
+                depths[tenant] += depth
+        return dict(depths)
@@ -0,0 +1,288 @@
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from eyos.models.hail import Amount, Tax, TaxAuthority
+from eyos.models.money import Money
+
+DEFAULT_TAX_RATES_FILE = Path(__file__).parent.parent / "data" / "tax_rates.json"
+
+# Countries and provider rates missing from the tables come from webhook payloads, so the rules
+# compiled for them are bounded, the least recently used being evicted first
+MAX_UNLISTED_COUNTRIES = 256
+MAX_PROVIDER_RATES = 1024
+
+
+@dataclass(frozen=True, eq=False)
+class TaxRule:
+    """A tax rate of a country, with the authority collecting it. Rules are shared and compared by identity."""
+
+    header: str
+    rate: float  # Percent
+    code: str
+    reason: str
+    text: str
+    authority: TaxAuthority
+
+
+class CountryRules(NamedTuple):
+    """The rules of a country compiled from a section of the rate tables."""
+
+    tax_classes: Dict[str, TaxRule]
+    default: TaxRule
+    rates: Dict[float, TaxRule]
+
+
+def _rate_key(rate: float) -> float:
+    # Provider rates are fractions, e.g. 0.135 * 100 == 13.500000000000002
+    return round(rate, 4)
+
+
+class TaxTable:
+    """
+    Tax rules compiled from rate tables into dict lookups.
+
+    Rules and their authorities are built once, so every receipt and line
+    taxed under the same rule shares the same objects. Countries missing from
+    the tables get rules from the default section the first time they are seen,
+    and rates reported by the tax provider but missing from the tables get
+    rules named after the country's tax. Both are kept in bounded LRU caches,
+    so crafted payloads cannot grow the process-wide table.
+    """
+
+    def __init__(self, data: Dict[str, Any]) -> None:
+        """
+        Compile the rate tables.
+
+        Args:
+            data: Rate tables, in the format of `data/tax_rates.json`
+
+        Raises:
+            ValueError: When the tables are incomplete
+        """
+        try:
+            self._default_section = data["default"]
+            # (country, tax class) -> rule
+            self.rules: Dict[Tuple[str, str], TaxRule] = {}
+            # country -> rule for unmapped tax classes
+            self.country_defaults: Dict[str, TaxRule] = {}
+            # (country, rate) -> rule, for rates reported by the tax provider
+            self.rates: Dict[Tuple[str, float], TaxRule] = {}
+            # Bounded caches of rules compiled for values only seen in payloads
+            self.unlisted_countries: OrderedDict[str, CountryRules] = OrderedDict()
+            self.provider_rates: OrderedDict[Tuple[str, float], TaxRule] = OrderedDict()
+            for country, section in data.get("countries", {}).items():
+                self._compile_country(country, section)
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid tax rate tables, missing or malformed {e!s}") from e
+
+    @classmethod
+    def from_file(cls, path: Path) -> "TaxTable":
+        """
+        Load and compile rate tables from a JSON file.
+
+        Args:
+            path: The rate tables file
+
+        Returns:
+            The compiled table
+        """
+        with open(path, "rb") as f:
+            return cls(json.load(f))
+
+    def _compile_section(self, country: str, section: Dict[str, Any]) -> CountryRules:
+        authority = TaxAuthority(
+            identifier=section["authority"]["identifier"].format(country=country),
+            name=section["authority"]["name"],
+        )
+        rules = {
+            name: TaxRule(
+                header=section["header"],
+                rate=_rate_key(float(rate["rate"])),
+                code=rate["code"],
+                reason=rate["reason"],
+                text=rate["text"],
+                authority=authority,
+            )
+            for name, rate in section["rates"].items()
+        }
+        rates: Dict[float, TaxRule] = {}
+        for rule in rules.values():
+            rates.setdefault(rule.rate, rule)
+        return CountryRules(
+            tax_classes={tax_class: rules[name] for tax_class, name in section.get("tax_classes", {}).items()},
+            default=rules[section["default_rate"]],
+            rates=rates,
+        )
+
+    def _compile_country(self, country: str, section: Dict[str, Any]) -> None:
+        compiled = self._compile_section(country, section)
+        for rate, rule in compiled.rates.items():
+            self.rates[(country, rate)] = rule
+        for tax_class, rule in compiled.tax_classes.items():
+            self.rules[(country, tax_class)] = rule
+        self.country_defaults[country] = compiled.default
+
+    def _unlisted_country(self, country: str) -> CountryRules:
+        compiled = self.unlisted_countries.get(country)
+        if compiled is None:
+            compiled = self._compile_section(country, self._default_section)
+            self.unlisted_countries[country] = compiled
+            if len(self.unlisted_countries) > MAX_UNLISTED_COUNTRIES:
+                self.unlisted_countries.popitem(last=False)
+        else:
+            self.unlisted_countries.move_to_end(country)
+        return compiled
+
+    def lookup(self, country: str, tax_class: str, rate: Optional[float] = None) -> TaxRule:
+        """
+        Find the rule taxing a line.
+
+        Args:
+            country: ISO country code of the shipping address
+            tax_class: Tax class of the item
+            rate: Rate in percent charged by the tax provider, when known
+
+        Returns:
+            The rule of the tax class, or the rule of the country matching the provider's rate
+        """
+        rule = self.rules.get((country, tax_class))
+        if rule is None:
+            rule = self.country_defaults.get(country)
+            if rule is None:
+                compiled = self._unlisted_country(country)
+                rule = compiled.tax_classes.get(tax_class, compiled.default)
+
+        if rate is None or _rate_key(rate) == rule.rate:
+            return rule
+        return self._rule_for_rate(country, rule, rate)
+
+    def _rule_for_rate(self, country: str, like: TaxRule, rate: float) -> TaxRule:
+        key = (country, _rate_key(rate))
+        rule = self.rates.get(key)
+        if rule is None and country in self.unlisted_countries:
+            rule = self.unlisted_countries[country].rates.get(key[1])
+        if rule is not None:
+            return rule
+
+        rule = self.provider_rates.get(key)
+        if rule is not None:
+            self.provider_rates.move_to_end(key)
+            return rule
+        # A rate missing from the tables, named after the country's tax so it is still shared
+        rule = TaxRule(
+            header=like.header,
+            rate=key[1],
+            code=f"{like.header.upper()}{key[1]:g}",
+            reason="Provider rate",
+            text=f"{like.header} at {key[1]:g}%",
+            authority=like.authority,
+        )
+        self.provider_rates[key] = rule
+        if len(self.provider_rates) > MAX_PROVIDER_RATES:
+            self.provider_rates.popitem(last=False)
+        return rule
+
+
+@lru_cache(maxsize=None)
+def load_tax_table(path: Optional[str] = None) -> TaxTable:
+    """
+    Load the compiled tax table, once per file and process.
+
+    Args:
+        path: Rate tables file, the bundled tables when None
+
+    Returns:
+        The compiled table
+    """
+    return TaxTable.from_file(Path(path) if path else DEFAULT_TAX_RATES_FILE)
+
+
+class ReceiptTaxes:
+    """
+    Collect the taxes of a receipt while its lines are transformed.
+
+    Each line's tax is added to the total of its rule, so the receipt-level
+    taxes are ready after a single pass. Lines with identical taxes share one
+    `Tax` object.
+    """
+
+    def __init__(self, currency_code: str) -> None:
+        """
+        Initialize empty totals.
+
+        Args:
+            currency_code: Currency of the amounts
+        """
+        self.currency_code = currency_code
+        # rule -> [tax, net taxed amount, gross taxed amount]
+        self.totals: Dict[TaxRule, List[Money]] = {}
+        self._line_taxes: Dict[Tuple[TaxRule, Money, Money, Money], Tax] = {}
+
+    def add(self, rule: TaxRule, amount: Money, net: Money, gross: Money) -> None:
+        """
+        Add an amount taxed under a rule to the receipt totals.
+
+        Args:
+            rule: The rule the amount is taxed under
+            amount: The tax
+            net: The amount before tax
+            gross: The amount including tax
+        """
+        totals = self.totals.get(rule)
+        if totals is None:
+            self.totals[rule] = [amount, net, gross]
+        else:
+            totals[0] += amount
+            totals[1] += net
+            totals[2] += gross
+
+    def line_tax(self, rule: TaxRule, amount: Money, net: Money, gross: Money) -> Tax:
+        """
+        Get the tax of a line and add it to the receipt totals.
+
+        Args:
+            rule: The rule the line is taxed under
+            amount: The tax of the line
+            net: The line amount before tax
+            gross: The line amount including tax
+
+        Returns:
+            The line's tax, shared with identical lines
+        """
+        self.add(rule, amount, net, gross)
+        key = (rule, amount, net, gross)
+        tax = self._line_taxes.get(key)
+        if tax is None:
+            tax = self._line_taxes[key] = self._tax(rule, amount, net, gross, exempt=False)
+        return tax
+
+    def receipt_taxes(self, exempt: bool) -> List[Tax]:
+        """
+        Build the receipt-level taxes, one per rule.
+
+        Args:
+            exempt: Whether the order is tax exempt
+
+        Returns:
+            The taxes, in the order their rules first appeared
+        """
+        return [self._tax(rule, amount, net, gross, exempt) for rule, (amount, net, gross) in self.totals.items()]
+
+    def _tax(self, rule: TaxRule, amount: Money, net: Money, gross: Money, exempt: bool) -> Tax:
+        return Tax(
+            header=rule.header,
+            footer="",
+            amount=Amount(value=amount, unit=self.currency_code),
+            exempt=exempt,
+            net_taxed_amount=Amount(value=net, unit=self.currency_code),
+            rate=rule.rate,
+            gross_taxed_amount=Amount(value=gross, unit=self.currency_code),
+            code=rule.code,
+            reason=rule.reason,
+            authority=rule.authority,
+            text=rule.text,
+        )
@@ -0,0 +1,173 @@
+import importlib.util
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+
+from eyos.models.money import Money
+from eyos.models.newstore import OrderItem, OrderPayload
+
+# Below this many lines the per-call overhead of NumPy outweighs vectorizing
+VECTORIZE_MIN_ITEMS = 64
+
+
+@dataclass
+class LineAmounts:
+    """Per-line amounts of an order and their receipt totals, in minor units of the order currency."""
+
+    exponent: int
+    unit_prices: Sequence[int]
+    nets: Sequence[int]
+    grosses: Sequence[int]
+    taxes: Sequence[int]
+    subtotal: int  # Sum of list prices
+    tax_total: int
+    net_total: int
+    gross_total: int
+
+    def money(self, minor: int) -> Money:
+        """Get one of the amounts as Money."""
+        return Money(minor, self.exponent)
+
+
+def _line_amounts_python(items: Sequence[OrderItem], tax_included: bool, exponent: int) -> LineAmounts:
+    """Compute line amounts one item at a time, into compact arrays."""
+    unit_prices, nets, grosses, taxes = array("q"), array("q"), array("q"), array("q")
+    subtotal = 0
+    for item in items:
+        list_price = item.list_price.quantize(exponent)
+        tax = item.tax.quantize(exponent).minor
+        net = list_price.minor - tax if tax_included else list_price.minor
+        unit_prices.append((list_price / item.quantity).minor)
+        nets.append(net)
+        grosses.append(net + tax)
+        taxes.append(tax)
+        subtotal += list_price.minor
+
+    return LineAmounts(
+        exponent=exponent,
+        unit_prices=unit_prices,
+        nets=nets,
+        grosses=grosses,
+        taxes=taxes,
+        subtotal=subtotal,
+        tax_total=sum(taxes),
+        net_total=sum(nets),
+        gross_total=sum(grosses),
+    )
+
+
+def _quantize_numpy(minors: Any, exponents: Any, exponent: int) -> Any:
+    """Round amounts given as minor units and exponents to `exponent` decimals, half away from zero."""
+    import numpy as np
+
+    shifts = exponent - exponents
+    scaled = minors * 10 ** np.maximum(shifts, 0)
+    divisors = 10 ** np.maximum(-shifts, 0)
+    return np.sign(scaled) * ((2 * np.abs(scaled) + divisors) // (2 * divisors))
+
+
+def _line_amounts_numpy(items: Sequence[OrderItem], tax_included: bool, exponent: int) -> LineAmounts:
+    """Compute line amounts for all items at once with NumPy."""
+    import numpy as np
+
+    # Only the stored integers are read per item, rounding is done on whole columns
+    columns = np.array(
+        [
+            (item.list_price.minor, item.list_price.exponent, item.tax.minor, item.tax.exponent, item.quantity)
+            for item in items
+        ],
+        dtype=np.int64,
+    ).reshape(len(items), 5)
+    quantities = columns[:, 4]
+    if (quantities <= 0).any():
+        raise ZeroDivisionError("Money can only be divided by a positive integer")
+
+    list_prices = _quantize_numpy(columns[:, 0], columns[:, 1], exponent)
+    taxes = _quantize_numpy(columns[:, 2], columns[:, 3], exponent)
+    nets = list_prices - taxes if tax_included else list_prices
+    grosses = nets + taxes
+    unit_prices = np.sign(list_prices) * ((2 * np.abs(list_prices) + quantities) // (2 * quantities))
+
+    return LineAmounts(
+        exponent=exponent,
+        unit_prices=unit_prices.tolist(),
+        nets=nets.tolist(),
+        grosses=grosses.tolist(),
+        taxes=taxes.tolist(),
+        subtotal=int(list_prices.sum()),
+        tax_total=int(taxes.sum()),
+        net_total=int(nets.sum()),
+        gross_total=int(grosses.sum()),
+    )
+
+
+# Checked without importing, NumPy is only loaded by the first large order
+_HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+
+def compute_line_amounts(items: Sequence[OrderItem], tax_included: bool, exponent: int = 2) -> LineAmounts:
+    """
+    Compute the unit price, net and gross amount of every line and their totals.
+
+    Large orders are computed in bulk with NumPy when it is installed, other
+    orders line by line. Both paths use the same integer arithmetic and give
+    identical results.
+
+    Args:
+        items: The order items
+        tax_included: Whether list prices include tax
+        exponent: Decimals of the order currency, amounts are rounded to it
+
+    Returns:
+        The amounts in minor units
+    """
+    if _HAS_NUMPY and len(items) >= VECTORIZE_MIN_ITEMS:
+        return _line_amounts_numpy(items, tax_included, exponent)
+    return _line_amounts_python(items, tax_included, exponent)
+
+
+@dataclass
+class Reconciliation:
+    """Differences between the totals of an order and the totals of its lines."""
+
+    # Field -> (order value, value computed from the lines)
+    mismatches: Dict[str, Tuple[Money, Money]] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        """Whether every total matches its lines."""
+        return not self.mismatches
+
+
+def reconcile(order: OrderPayload, amounts: LineAmounts) -> Reconciliation:
+    """
+    Check the totals of an order against the totals of its lines.
+
+    Args:
+        order: The order
+        amounts: The amounts of its lines
+
+    Returns:
+        The fields that do not match
+    """
+    exponent = amounts.exponent
+    tax_total = amounts.tax_total + order.shipping_tax.quantize(exponent).minor
+    grand_total = (
+        amounts.subtotal
+        - order.discount_total.quantize(exponent).minor
+        + order.shipping_total.quantize(exponent).minor
+    )
+    if order.price_method != "tax_included":
+        grand_total += tax_total
+
+    expected: List[Tuple[str, Money, int]] = [
+        ("subtotal", order.subtotal, amounts.subtotal),
+        ("tax_total", order.tax_total, tax_total),
+        ("grand_total", order.grand_total, grand_total),
+    ]
+    reconciliation = Reconciliation()
+    for name, order_value, computed in expected:
+        order_value = order_value.quantize(exponent)
+        if order_value.minor != computed:
+            reconciliation.mismatches[name] = (order_value, amounts.money(computed))
+    return reconciliation
@@ -0,0 +1,77 @@
+import asyncio
+from functools import cached_property
+from typing import Optional
+
+from eyos.models import HailTransaction, NewStoreEvent
+from eyos.services.hail_encoder import HailEncoder
+from eyos.services.tax import TaxTable, load_tax_table
+from eyos.services.transformer import transform_newstore_to_hail
+
+
+class TransformWorker:
+    """
+    State of a pool process transforming raw events, for the backfill and the bulk transform.
+
+    Each pool process keeps one event loop to drive the async transformer, and
+    loads the tax tables once rather than for every batch.
+    """
+
+    def __init__(self, token_key: Optional[bytes] = None, tax_rates_file: Optional[str] = None) -> None:
+        """
+        Initialize the worker state.
+
+        Args:
+            token_key: Key deriving payment tokens, random tokens when None
+            tax_rates_file: Tax rate tables, the bundled tables when None
+        """
+        self.loop = asyncio.new_event_loop()
+        self.token_key = token_key
+        self.tax_table: TaxTable = load_tax_table(tax_rates_file)
+
+    @cached_property
+    def encoder(self) -> HailEncoder:
+        """Encoder of transactions, compiled on first use."""
+        return HailEncoder()
+
+    def transform(self, record: bytes) -> HailTransaction:
+        """
+        Validate and transform a raw event.
+
+        Args:
+            record: The event as JSON
+
+        Returns:
+            The Hail transaction
+        """
+        event = NewStoreEvent.model_validate_json(record)
+        return self.loop.run_until_complete(transform_newstore_to_hail(event, self.token_key, self.tax_table))
+
+
+_worker: Optional[TransformWorker] = None
+
+
+def init_worker(token_key: Optional[bytes] = None, tax_rates_file: Optional[str] = None) -> None:
+    """
+    Set up a pool process, to be passed as the pool's initializer.
+
+    Args:
+        token_key: Key deriving payment tokens, random tokens when None
+        tax_rates_file: Tax rate tables, the bundled tables when None
+    """
+    global _worker
+    _worker = TransformWorker(token_key, tax_rates_file)
+
+
+def current_worker() -> TransformWorker:
+    """
+    Get the state of this pool process.
+
+    Returns:
+        The worker state
+
+    Raises:
+        RuntimeError: When the process was not set up with `init_worker`
+    """
+    if _worker is None:
+        raise RuntimeError("Transform worker used outside of a pool initialized with init_worker")
+    return _worker
@@ -0,0 +1,119 @@
+import json
+from pathlib import Path
+from typing import Any, Dict
+from unittest.mock import patch
+
+import pytest
+
+from eyos.config import Settings
+from eyos.models import HailTransaction
+from eyos.services.backfill import Backfill, Checkpoint, detect_format, iter_json_array, iter_ndjson
+
+
+@pytest.fixture
+def sample_event_data() -> Dict[str, Any]:
+    """Load sample NewStore event data."""
+    sample_file = Path(__file__).parent.parent.parent.parent / "newstore_sample_payload.json"
+    with open(sample_file, "r") as f:
+        data: Dict[str, Any] = json.load(f)
+    return data
+
+
+def test_iter_json_array_splits_elements() -> None:
+    """Test that top-level elements are split without being confused by strings."""
+    data = b'[ {"a": "x,]}\\"y"}, {"b": [1, {"c": 2}]},\n{"d": {}} ]'
+
+    elements = [element for _, element in iter_json_array(data)]
+
+    assert [json.loads(element) for element in elements] == [{"a": 'x,]}"y'}, {"b": [1, {"c": 2}]}, {"d": {}}]
+
+
+def test_iter_json_array_resumes_from_offset() -> None:
+    """Test that iteration resumes after the element a previous offset points past."""
+    data = b'[{"a": 1}, {"b": 2}, {"c": 3}]'
+    first_offset, _ = next(iter_json_array(data))
+
+    remaining = [json.loads(element) for _, element in iter_json_array(data, first_offset)]
+
+    assert remaining == [{"b": 2}, {"c": 3}]
+
+
+def test_iter_ndjson_skips_blank_lines() -> None:
+    """Test that blank lines are skipped and offsets point past each line."""
+    data = b'{"a": 1}\n\n{"b": 2}'
+
+    records = list(iter_ndjson(data))
+
+    assert records == [(9, b'{"a": 1}'), (len(data), b'{"b": 2}')]
+    assert detect_format(data) == "ndjson"
+    assert detect_format(b'  [{"a": 1}]') == "json"
+
+
+@pytest.mark.asyncio
+async def test_backfill_sends_events_and_checkpoints(tmp_path: Path, sample_event_data: Dict[str, Any]) -> None:
+    """Test that a backfill sends valid events, records failures and saves its checkpoint."""
+    input_path = tmp_path / "orders.ndjson"
+    with open(input_path, "w") as f:
+        for i in range(5):
+            sample_event_data["payload"]["id"] = f"order-{i}"
+            f.write(json.dumps(sample_event_data) + "\n")
+        f.write('{"invalid": true}\n')
+
+    checkpoint_path = tmp_path / "orders.checkpoint"
+    errors_path = tmp_path / "orders.errors.ndjson"
+    backfill = Backfill(
+        Settings(hail_api_base_url="mock"),
+        input_path,
+        checkpoint_path,
+        errors_path,
+        concurrency=4,
+        batch_size=2,
+        processes=1,
+    )
+
+    progress = await backfill.run()
+
+    assert progress.sent == 5
+    assert progress.failed == 1
+    assert json.loads(errors_path.read_text()) == {"invalid": True}
+
+    checkpoint = Checkpoint.load(checkpoint_path, str(input_path.resolve()))
+    assert checkpoint.offset == input_path.stat().st_size
+    assert checkpoint.sent == 5
+
+
+@pytest.mark.asyncio
+async def test_backfill_fails_when_a_batch_raises(tmp_path: Path, sample_event_data: Dict[str, Any]) -> None:
+    """Test that an error other than a rejected send fails the run instead of stalling the checkpoint."""
+    input_path = tmp_path / "orders.ndjson"
+    with open(input_path, "w") as f:
+        for i in range(6):
+            sample_event_data["payload"]["id"] = f"order-{i}"
+            f.write(json.dumps(sample_event_data) + "\n")
+
+    checkpoint_path = tmp_path / "orders.checkpoint"
+    backfill = Backfill(
+        Settings(hail_api_base_url="mock"),
+        input_path,
+        checkpoint_path,
+        tmp_path / "orders.errors.ndjson",
+        concurrency=4,
+        batch_size=1,
+        processes=1,
+    )
+
+    sends = 0
+
+    async def send_transaction(transaction: HailTransaction) -> Dict[str, Any]:
+        nonlocal sends
+        sends += 1
+        if sends == 1:
+            raise RuntimeError("Connection pool closed")
+        return {"status": "success"}
+
+    with patch.object(backfill.hail_client, "send_transaction", send_transaction):
+        with pytest.raises(RuntimeError, match="Connection pool closed"):
+            await backfill.run()
+
+    # The checkpoint never moves past the failed batch
+    assert Checkpoint.load(checkpoint_path, str(input_path.resolve())).offset < input_path.stat().st_size
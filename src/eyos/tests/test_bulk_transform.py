@@ -0,0 +1,68 @@
+import gzip
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+from eyos.services.bulk_transform import BulkTransform, ShardWriter
+
+
+@pytest.fixture
+def sample_event_data() -> Dict[str, Any]:
+    """Load sample NewStore event data."""
+    sample_file = Path(__file__).parent.parent.parent.parent / "newstore_sample_payload.json"
+    with open(sample_file, "r") as f:
+        data: Dict[str, Any] = json.load(f)
+    return data
+
+
+def test_shard_writer_rotates_shards(tmp_path: Path) -> None:
+    """Test that a new shard is started every `shard_size` lines."""
+    writer = ShardWriter(tmp_path, shard_size=2)
+    for i in range(5):
+        writer.write(json.dumps({"i": i}).encode())
+    writer.close()
+
+    assert [path.name for path in writer.paths] == ["part-00000.ndjson", "part-00001.ndjson", "part-00002.ndjson"]
+    assert writer.paths[2].read_text() == '{"i": 4}\n'
+
+
+def test_shard_writer_rejects_unknown_compression(tmp_path: Path) -> None:
+    """Test that unsupported compression fails before any work is done."""
+    with pytest.raises(ValueError, match="Unsupported compression"):
+        ShardWriter(tmp_path, shard_size=0, compression="lz4")
+
+
+def test_bulk_transform_writes_ordered_compressed_shards(tmp_path: Path, sample_event_data: Dict[str, Any]) -> None:
+    """Test that transactions are written in input order and failures are collected."""
+    events = []
+    for i in range(5):
+        sample_event_data["payload"]["id"] = f"order-{i}"
+        events.append(json.loads(json.dumps(sample_event_data)))
+    events.insert(2, {"invalid": True})
+    input_path = tmp_path / "orders.json"
+    input_path.write_text(json.dumps(events))
+
+    output_dir = tmp_path / "out"
+    errors_path = tmp_path / "errors.ndjson"
+    job = BulkTransform(
+        input_path,
+        output_dir,
+        errors_path=errors_path,
+        batch_size=2,
+        shard_size=3,
+        compression="gzip",
+        processes=1,
+    )
+
+    stats = job.run()
+
+    assert stats.transformed == 5
+    assert stats.failed == 1
+    assert [path.name for path in stats.shards] == ["part-00000.ndjson.gz", "part-00001.ndjson.gz"]
+    transactions = [json.loads(line) for path in stats.shards for line in gzip.open(path)]
+    assert [transaction["receipt"]["transaction_information"]["id"] for transaction in transactions] == [
+        f"TRX-newlook-order-{i}" for i in range(5)
+    ]
+    assert json.loads(errors_path.read_text()) == {"invalid": True}
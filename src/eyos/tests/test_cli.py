@@ -0,0 +1,28 @@
+from unittest.mock import patch
+
+import pytest
+import typer
+
+from eyos.commands.cli import resolve_server_implementation
+
+
+@pytest.mark.parametrize(
+    ("kind", "fast", "fallback"),
+    [("loop", "uvloop", "asyncio"), ("http", "httptools", "h11")],
+)
+def test_resolve_server_implementation(kind: str, fast: str, fallback: str) -> None:
+    """Test that the faster implementation is used when installed, with a fallback otherwise."""
+    with patch("importlib.util.find_spec", return_value=object()):
+        assert resolve_server_implementation(kind, "auto") == fast
+        assert resolve_server_implementation(kind, fast) == fast
+        assert resolve_server_implementation(kind, fallback) == fallback
+
+    with patch("importlib.util.find_spec", return_value=None):
+        assert resolve_server_implementation(kind, "auto") == fallback
+        assert resolve_server_implementation(kind, fast) == fallback
+
+
+def test_resolve_server_implementation_rejects_unknown() -> None:
+    """Test that unknown implementations are reported as a bad parameter."""
+    with pytest.raises(typer.BadParameter):
+        resolve_server_implementation("loop", "trio")
@@ -1,12 +1,26 @@
+import asyncio
+import gzip
+import time
+from pathlib import Path
+from typing import Any, Dict
 from unittest.mock import MagicMock, patch
 
 import httpx
 import pytest
-from fastapi import HTTPException
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
 
 from eyos.config import Settings
-from eyos.models.hail import HailTransaction, Receipt, TransactionInfo
-from eyos.services.hail_client import HailClient
+from eyos.exceptions import exception_handlers
+from eyos.models import NewStoreEvent
+from eyos.models.hail import HailTransaction
+from eyos.routers import hail_mock
+from eyos.services.hail_client import HailClient, retry_safety
+from eyos.services.hedging import HedgeBudget, LatencyTracker
+from eyos.services.transformer import transform_newstore_to_hail
+from eyos.utils.compression import decompress
+
+SAMPLE_PAYLOAD = Path(__file__).parent.parent.parent.parent / "newstore_sample_payload.json"
 
 
 @pytest.fixture
@@ -22,13 +36,9 @@ def settings() -> Settings:
 
 @pytest.fixture
 def mock_transaction() -> HailTransaction:
-    """Create a mock transaction."""
-    # Create a minimal transaction for testing
-    transaction = MagicMock(spec=HailTransaction)
-    transaction.receipt = MagicMock(spec=Receipt)
-    transaction.receipt.transaction_information = MagicMock(spec=TransactionInfo)
+    """Create a transaction from the sample payload."""
+    transaction = asyncio.run(_sample_transaction())
     transaction.receipt.transaction_information.id = "test-transaction-id"
-    transaction.model_dump_json.return_value = '{"test": "data"}'
     return transaction
 
 
@@ -150,3 +160,246 @@ async def test_send_transaction_max_retries_exceeded(settings: Settings, mock_tr
         assert excinfo.value.status_code == 503
         assert "Failed to send transaction to Hail API after 1 retries" in excinfo.value.detail
         assert mock_post.call_count == 2  # Initial + 1 retry
+
+
+def _status_error(status_code: int, headers: Dict[str, str]) -> httpx.HTTPStatusError:
+    return httpx.HTTPStatusError(
+        "Error",
+        request=httpx.Request("POST", "https://api.example.com"),
+        response=httpx.Response(status_code, headers=headers),
+    )
+
+
+@pytest.mark.parametrize(
+    ("error", "safe"),
+    [
+        (httpx.ConnectError("Refused"), True),
+        (httpx.ReadTimeout("Timed out"), False),
+        (httpx.RemoteProtocolError("Disconnected"), False),
+        (_status_error(429, {}), True),
+        (_status_error(503, {}), True),
+        (_status_error(500, {}), False),
+        (_status_error(422, {}), None),
+        (httpx.UnsupportedProtocol("ftp"), None),
+    ],
+)
+def test_retry_safety(error: Exception, safe: bool) -> None:
+    """Test which failures may have applied the transaction."""
+    assert retry_safety(error) is safe
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("idempotency", [True, False])
+async def test_unsafe_retries_need_an_idempotency_key(
+    settings: Settings, mock_transaction: HailTransaction, idempotency: bool
+) -> None:
+    """Test that a read timeout is only retried when the request carries an idempotency key."""
+    settings.hail_api_base_url = "https://api.example.com"
+    settings.hail_api_idempotency = idempotency
+    client = HailClient(settings)
+
+    success = MagicMock()
+    success.json.return_value = {"status": "success"}
+    throttled = MagicMock()
+    throttled.raise_for_status.side_effect = _status_error(429, {"Retry-After": "0"})
+
+    with patch("httpx.AsyncClient.post") as mock_post:
+        mock_post.side_effect = [throttled, httpx.ReadTimeout("Timed out"), success]
+        if idempotency:
+            assert (await client.send_transaction(mock_transaction))["status"] == "success"
+            assert mock_post.call_count == 3
+            assert mock_post.call_args.kwargs["headers"]["Idempotency-Key"] == "test-transaction-id"
+        else:
+            with pytest.raises(HTTPException) as exc_info:
+                await client.send_transaction(mock_transaction)
+            assert exc_info.value.status_code == 502
+            assert mock_post.call_count == 2
+            assert "Idempotency-Key" not in mock_post.call_args.kwargs["headers"]
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_bounded(settings: Settings, mock_transaction: HailTransaction) -> None:
+    """Test that a Retry-After longer than the configured maximum is cut to it."""
+    settings.hail_api_base_url = "https://api.example.com"
+    settings.hail_api_max_retry_after = 0.5
+    client = HailClient(settings)
+
+    success = MagicMock()
+    success.json.return_value = {"status": "success"}
+    throttled = MagicMock()
+    throttled.raise_for_status.side_effect = _status_error(429, {"Retry-After": "86400"})
+
+    with patch("httpx.AsyncClient.post", side_effect=[throttled, success]), patch("asyncio.sleep") as sleep:
+        assert (await client.send_transaction(mock_transaction))["status"] == "success"
+
+    sleep.assert_awaited_once_with(0.5)
+
+
+def test_latency_tracker_and_hedge_budget() -> None:
+    """Test the latency quantile and the bound on hedges."""
+    tracker = LatencyTracker(0.9, window=100, min_samples=10)
+    for i in range(9):
+        tracker.record(i / 100)
+    assert tracker.value is None
+    for i in range(9, 100):
+        tracker.record(i / 100)
+    # Refreshed every 12 samples, so it may lag the latest few
+    assert tracker.value is not None and 0.8 <= tracker.value <= 0.9
+
+    budget = HedgeBudget(0.25, burst=2)
+    assert budget.spend() and budget.spend() and not budget.spend()
+    for _ in range(4):
+        budget.earn()
+    assert budget.spend() and not budget.spend()
+
+
+@pytest.mark.asyncio
+async def test_slow_requests_are_hedged(settings: Settings, mock_transaction: HailTransaction) -> None:
+    """Test that a request slower than the latency quantile is duplicated and the faster response used."""
+    settings.hail_api_base_url = "https://api.example.com"
+    settings.hail_api_hedge = True
+    settings.hail_api_hedge_min_samples = 1
+    client = HailClient(settings)
+    client.latency.record(0.01)
+
+    response = MagicMock()
+    response.json.return_value = {"status": "success"}
+    delays = [10.0, 0.0]
+    keys = []
+
+    async def post(url: str, **kwargs: Any) -> MagicMock:
+        keys.append(kwargs["headers"]["Idempotency-Key"])
+        await asyncio.sleep(delays.pop(0))
+        return response
+
+    with patch("httpx.AsyncClient.post", side_effect=post):
+        started = time.monotonic()
+        assert (await client.send_transaction(mock_transaction))["status"] == "success"
+
+    assert time.monotonic() - started < 1
+    assert keys == ["test-transaction-id", "test-transaction-id"]
+    assert client.hedge_budget.tokens < client.hedge_budget.burst
+
+
+@pytest.mark.asyncio
+async def test_deadline_stops_retries(settings: Settings, mock_transaction: HailTransaction) -> None:
+    """Test that attempts are cut short and retries stop once the deadline passed."""
+    settings.hail_api_base_url = "https://api.example.com"
+    client = HailClient(settings)
+
+    async def post(url: str, **kwargs: Any) -> None:
+        await asyncio.sleep(10)
+
+    with patch("httpx.AsyncClient.post", side_effect=post) as mock_post:
+        started = time.monotonic()
+        with pytest.raises(HTTPException) as exc_info:
+            await client.send_transaction(mock_transaction, deadline=time.monotonic() + 0.1)
+
+    assert exc_info.value.status_code == 504
+    assert time.monotonic() - started < 1
+    assert mock_post.call_count == 1
+
+
+async def _sample_transaction() -> HailTransaction:
+    event = NewStoreEvent.model_validate_json(SAMPLE_PAYLOAD.read_bytes())
+    return await transform_newstore_to_hail(event)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", ["gzip", "deflate"])
+async def test_encode_body_compresses_large_bodies(settings: Settings, encoding: str) -> None:
+    """Test that only bodies above the threshold are compressed, in a thread when they are very large."""
+    settings.hail_api_compression = encoding
+    settings.hail_api_compression_min_size = 100
+    settings.hail_api_compression_thread_min_size = 10_000
+    client = HailClient(settings)
+
+    assert await client.encode_body(b"{}") == (b"{}", {})
+
+    for body in (b'{"items": "%s"}' % (b"x" * 1000), b'{"items": "%s"}' % (b"x" * 100_000)):
+        content, headers = await client.encode_body(body)
+        assert headers == {"Content-Encoding": encoding}
+        assert len(content) < len(body)
+        assert decompress(content, encoding, len(body)) == body
+
+
+def test_unsupported_compression_is_rejected(settings: Settings) -> None:
+    """Test that an unknown encoding fails when the client is created."""
+    settings.hail_api_compression = "brotli"
+
+    with pytest.raises(ValueError, match="Unsupported content encoding"):
+        HailClient(settings)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", ["none", "gzip", "deflate"])
+async def test_mock_hail_api_accepts_compressed_transactions(settings: Settings, encoding: str) -> None:
+    """Test that the mock Hail API decodes compressed bodies and validates the transaction."""
+    app = FastAPI()
+    exception_handlers(app)
+    app.include_router(hail_mock.router)
+
+    settings.hail_api_base_url = "http://hail/mock/hail"
+    settings.hail_api_compression = encoding
+    settings.hail_api_compression_min_size = 0
+    client = HailClient(settings)
+    client._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    transaction = await _sample_transaction()
+
+    response = await client.send_transaction(transaction)
+
+    assert response["transaction_id"] == transaction.receipt.transaction_information.id
+    await client.aclose()
+
+
+@pytest.mark.parametrize(
+    ("headers", "body", "status_code"),
+    [
+        ({"Content-Encoding": "gzip"}, b"not gzip", 400),
+        ({"Content-Encoding": "gzip"}, gzip.compress(b"not gzip")[:-4], 400),
+        ({"Content-Encoding": "gzip"}, gzip.compress(b'{"device_ref": "truncated'), 422),
+        ({"Content-Encoding": "br"}, b"{}", 415),
+    ],
+    ids=["corrupt", "truncated", "invalid-transaction", "unsupported-encoding"],
+)
+def test_mock_hail_api_rejects_bad_bodies(headers: Dict[str, str], body: bytes, status_code: int) -> None:
+    """Test that the mock Hail API rejects bodies that do not decode to a transaction."""
+    app = FastAPI()
+    exception_handlers(app)
+    app.include_router(hail_mock.router)
+
+    response = TestClient(app).post(
+        "/mock/hail/events/v2/transaction/",
+        content=body,
+        headers={"Content-Type": "application/json", **headers},
+    )
+
+    assert response.status_code == status_code
+
+
+def test_mock_hail_api_deduplicates_by_idempotency_key() -> None:
+    """Test that a retried transaction is answered from the first response, within a bounded cache."""
+    app = FastAPI()
+    app.include_router(hail_mock.router)
+    transaction = asyncio.run(_sample_transaction())
+    body = transaction.model_dump_json()
+    client = TestClient(app)
+
+    def post(key: str) -> httpx.Response:
+        return client.post(
+            "/mock/hail/events/v2/transaction/",
+            content=body,
+            headers={"Content-Type": "application/json", "Idempotency-Key": key},
+        )
+
+    first, retried = post("key-1"), post("key-1")
+    assert first.json() == retried.json()
+    assert "Idempotent-Replayed" not in first.headers
+    assert retried.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in post("key-2").headers
+
+    cache = hail_mock.IdempotencyCache(2)
+    for key in ("a", "b", "a", "c"):
+        cache.put(key, {"key": key})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"key": "a"}
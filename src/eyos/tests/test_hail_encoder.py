@@ -0,0 +1,126 @@
+import inspect
+import json
+import random
+import string
+from typing import Any, Dict, Literal, Union, cast, get_args, get_origin
+
+import pytest
+from pydantic import BaseModel
+
+from eyos.models import HailTransaction
+from eyos.models.hail import ConsentAction, Customer
+from eyos.models.money import Money
+from eyos.services.hail_encoder import HailEncoder, compile_encoder
+
+# Quotes, escapes, control characters, non-ASCII and astral characters
+_ALPHABET = string.ascii_letters + string.digits + ' "\\/\n\t\x00\x1f\x7f' + "éß€中\U0001f600\u2028"
+_FLOATS = [0.0, -0.0, 1e16, 1e15, 1e-5, 1e-4, 1.5e-7, 1e300, -2.5, 0.1, 0.30000000000000004, 19.99]
+
+
+def _random_string(rng: random.Random) -> str:
+    return "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 12)))
+
+
+def _random_float(rng: random.Random) -> float:
+    if rng.random() < 0.3:
+        return rng.choice(_FLOATS)
+    return rng.uniform(-1, 1) * 10.0 ** rng.randint(-8, 20)
+
+
+def _random_json(rng: random.Random, depth: int = 0) -> Any:
+    kind = rng.randint(0, 7 if depth < 3 else 5)
+    if kind == 0:
+        return None
+    if kind == 1:
+        return rng.random() < 0.5
+    if kind == 2:
+        return rng.randint(-(10**20), 10**20)
+    if kind == 3:
+        return _random_float(rng)
+    if kind in (4, 5):
+        return _random_string(rng)
+    if kind == 6:
+        return [_random_json(rng, depth + 1) for _ in range(rng.randint(0, 3))]
+    return {_random_string(rng): _random_json(rng, depth + 1) for _ in range(rng.randint(0, 3))}
+
+
+def _random_value(annotation: Any, rng: random.Random) -> Any:
+    """Generate valid data for an annotation of the Hail models."""
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin is Union:
+        options = [arg for arg in args if arg is not type(None)]
+        return None if rng.random() < 0.3 else _random_value(options[0], rng)
+    if origin is Literal:
+        return rng.choice(args)
+    if origin is list:
+        return [_random_value(args[0], rng) for _ in range(rng.choice([0, 0, 1, 3]))]
+    if origin is dict:
+        return {_random_string(rng): _random_value(args[1], rng) for _ in range(rng.randint(0, 3))}
+    if inspect.isclass(annotation) and issubclass(annotation, BaseModel):
+        return {name: _random_value(field.annotation, rng) for name, field in annotation.model_fields.items()}
+    if annotation is Money:
+        return round(rng.uniform(-1, 1) * 10 ** rng.randint(0, 9), rng.randint(0, 6))
+    if annotation is float:
+        return _random_float(rng)
+    if annotation is int:
+        return rng.randint(-1000, 1000)
+    if annotation is bool:
+        return rng.random() < 0.5
+    if annotation is str:
+        return "" if rng.random() < 0.2 else _random_string(rng)
+    return _random_json(rng)
+
+
+def _without_empty(model: BaseModel) -> Dict[str, Any]:
+    """What the "empty" policy should keep: no None values, no empty optional strings or collections."""
+    data: Dict[str, Any] = {}
+    for name, field in type(model).model_fields.items():
+        value = getattr(model, name)
+        if value is None or (not field.is_required() and value in ("", [], {}) and field.default in ("", [], {}, None)):
+            continue
+        if isinstance(value, BaseModel):
+            data[name] = _without_empty(value)
+        elif isinstance(value, list):
+            data[name] = [_without_empty(item) if isinstance(item, BaseModel) else item for item in value]
+        else:
+            data[name] = value
+    return data
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_encoder_matches_model_dump_json(seed: int) -> None:
+    """Test the compiled encoder against pydantic on randomized transactions."""
+    rng = random.Random(seed)
+    transaction = HailTransaction.model_validate(_random_value(HailTransaction, rng))
+
+    assert compile_encoder(HailTransaction, "none")(transaction) == transaction.model_dump_json()
+    assert HailEncoder("none").encode(transaction) == transaction.model_dump_json().encode()
+    assert HailEncoder("null").encode(transaction) == transaction.model_dump_json(exclude_none=True).encode()
+
+    expected = json.loads(json.dumps(_without_empty(transaction), ensure_ascii=False))
+    assert json.loads(HailEncoder("empty").encode(transaction)) == expected
+
+
+def test_empty_policy_drops_empty_optional_fields() -> None:
+    """Test that required and non-empty defaults are kept, and a model can end up empty."""
+    encoder = HailEncoder("empty", model=Customer)
+    assert encoder.encode(Customer()) == b"{}"
+    assert encoder.encode(Customer(consent_actions=[ConsentAction(identifier="email", value="grant_consent")])) == (
+        b'{"consent_actions":[{"identifier":"email","value":"grant_consent"}]}'
+    )
+
+
+def test_float_text_is_shared_by_equal_amounts() -> None:
+    """Test that cached float text is right for Money, plain floats and signed zeros."""
+    encoder = compile_encoder(HailTransaction, "none")
+    transaction = HailTransaction.model_validate(_random_value(HailTransaction, random.Random(1)))
+    for total in (Money(1999), 19.99, Money(0), -0.0, 0.0, Money(0), 1e16, 1e16):
+        # Assignments are not validated, so plain floats stay floats
+        transaction.receipt.total.amount.value = cast(Money, total)
+        assert encoder(transaction) == transaction.model_dump_json()
+
+
+def test_unsupported_omit_policy_is_rejected() -> None:
+    """Test that unknown policies fail when the encoder is compiled."""
+    with pytest.raises(ValueError, match="Unsupported omit policy"):
+        HailEncoder("all")
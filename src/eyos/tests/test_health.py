@@ -0,0 +1,79 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from eyos.config import Settings
+from eyos.main import create_app
+from eyos.services.hail_client import HailClient
+from eyos.services.health import CachedResponse, ReadinessMonitor
+from eyos.services.queue_processor import InMemoryQueue
+from eyos.services.queued_event import QueuedEvent
+
+
+def test_liveness_supports_conditional_get() -> None:
+    """Test that the liveness probe answers 304 for a matching ETag."""
+    with TestClient(create_app()) as client:
+        response = client.get("/health/live")
+        assert response.status_code == 200
+        assert response.json() == {"status": "alive"}
+
+        response = client.get("/health/live", headers={"If-None-Match": response.headers["ETag"]})
+        assert response.status_code == 304
+        assert response.content == b""
+
+
+def test_readiness_is_served_from_snapshot() -> None:
+    """Test that the readiness probe reports the background checks with an ETag."""
+    with TestClient(create_app()) as client:
+        monitor = client.app.state.readiness_monitor  # type: ignore[attr-defined]
+        client.portal.call(monitor.check)  # type: ignore[union-attr]
+
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+        assert response.json()["checks"]["hail"]["reachable"] is True
+
+        etag = response.headers["ETag"]
+        assert client.get("/health/ready", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_failing_readiness_is_not_conditional() -> None:
+    """Test that a not ready snapshot is answered 503 even when the client has its ETag."""
+    with TestClient(create_app()) as client:
+        monitor = client.app.state.readiness_monitor  # type: ignore[attr-defined]
+        monitor.snapshot = CachedResponse.from_content({"status": "not_ready"}, status_code=503)
+
+        response = client.get("/health/ready", headers={"If-None-Match": monitor.snapshot.etag})
+        assert response.status_code == 503
+        assert response.json() == {"status": "not_ready"}
+
+
+def test_index_shows_environment_details() -> None:
+    """Test that the index route serves the build details."""
+    with TestClient(create_app()) as client:
+        response = client.get("/")
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"status", "git_hash", "image_build_date", "version"}
+    assert "ETag" in response.headers
+
+
+@pytest.mark.asyncio
+async def test_readiness_fails_when_shedding_or_hail_failing() -> None:
+    """Test that a shedding queue or repeated Hail failures make the process not ready."""
+    settings = Settings(hail_api_base_url="mock", health_max_hail_failures=3)
+    queue = InMemoryQueue(maxsize=2, high_watermark=1, low_watermark=0)
+    hail_client = HailClient(settings)
+    monitor = ReadinessMonitor(queue, hail_client, settings)
+
+    assert (await monitor.check()).status_code == 200
+
+    hail_client.consecutive_failures = 3
+    snapshot = await monitor.check()
+    assert snapshot.status_code == 503
+    assert b'"consecutive_failures":3' in snapshot.body
+
+    hail_client.consecutive_failures = 0
+    await queue.enqueue(QueuedEvent.from_dict({"tenant": "newlook", "name": "order.completed", "payload": {"id": "1"}}))
+    snapshot = await monitor.check()
+    assert snapshot.status_code == 503
+    assert b'"shedding":true' in snapshot.body
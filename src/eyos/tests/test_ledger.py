@@ -0,0 +1,80 @@
+import csv
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from typer.testing import CliRunner
+
+from eyos.commands.cli import cli_app
+from eyos.main import create_app
+from eyos.services.ledger import DeliveryLedger, DeliveryState
+
+_SAMPLE_FILE = Path(__file__).parent.parent.parent.parent / "newstore_sample_payload.json"
+
+
+def _count(path: Path) -> int:
+    with sqlite3.connect(path) as connection:
+        count: int = connection.execute("SELECT COUNT(*) FROM deliveries").fetchone()[0]
+    return count
+
+
+@pytest.mark.asyncio
+async def test_ledger_writes_in_batches(tmp_path: Path) -> None:
+    """Test that rows are written by batch, and that status includes rows still waiting."""
+    path = tmp_path / "ledger.db"
+    ledger = DeliveryLedger(str(path), flush_interval=60, batch_size=3, max_pending=4)
+
+    ledger.record("acme", "order-1", "order.completed", DeliveryState.RECEIVED)
+    ledger.record("acme", "order-1", "order.completed", DeliveryState.QUEUED)
+    ledger.record("other", "order-1", "order.completed", DeliveryState.RECEIVED)
+    assert _count(path) == 0
+
+    deliveries = await ledger.status("order-1")
+    assert _count(path) == 3
+    assert [(d["tenant"], d["state"]) for d in deliveries] == [("acme", "queued"), ("other", "received")]
+    assert [step["state"] for step in deliveries[0]["history"]] == ["received", "queued"]
+    assert len(await ledger.status("order-1", tenant="other")) == 1
+    assert await ledger.status("order-2") == []
+
+    for _ in range(5):
+        ledger.record("acme", "order-2", "order.completed", DeliveryState.FAILED, "Rejected")
+    assert ledger.stats() == {"ledger_pending": 4}
+    await ledger.stop()
+    assert _count(path) == 7
+
+
+def test_delivery_status_and_export(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a processed event's steps can be queried and exported."""
+    path = tmp_path / "ledger.db"
+    monkeypatch.setenv("EYOS_LEDGER_PATH", str(path))
+    event = json.loads(_SAMPLE_FILE.read_bytes())
+    order_id = event["payload"]["id"]
+
+    with TestClient(create_app()) as client:
+        response = client.get(f"/webhooks/newstore/status/{order_id}")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+        assert client.post("/webhooks/newstore/simulate", json=event).status_code == status.HTTP_202_ACCEPTED
+        response = client.get(f"/webhooks/newstore/status/{order_id}", params={"tenant": event["tenant"]})
+        assert response.status_code == status.HTTP_200_OK
+        (delivery,) = response.json()["deliveries"]
+        assert delivery["state"] == "acked"
+        assert [step["state"] for step in delivery["history"]] == ["received", "sent", "acked"]
+
+        response = client.get(f"/webhooks/newstore/status/{order_id}", params={"tenant": "nobody"})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    output = tmp_path / "deliveries.csv"
+    result = CliRunner().invoke(cli_app, ["deliveries", "--database", str(path), "--format", "csv", "-o", str(output)])
+    assert result.exit_code == 0, result.output
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["state"] for row in rows] == ["received", "sent", "acked"]
+    assert {row["order_id"] for row in rows} == {order_id}
+
+    result = CliRunner().invoke(cli_app, ["deliveries", "--database", str(path), "--since", "2999-01-01"])
+    assert result.exit_code == 0
+    assert "Exported 0 rows" in result.output
@@ -0,0 +1,60 @@
+import json
+import logging
+import sys
+from typing import Tuple
+
+from eyos.utils.helpers import DeferredQueueHandler, JsonFormatter, SamplingFilter
+
+
+def _record(name: str, level: int = logging.INFO, msg: str = "hello %s", args: Tuple[object, ...] = ("world",)) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_json_formatter_merges_args_and_extras() -> None:
+    """Test that the JSON formatter renders lazy args and `extra` fields."""
+    record = _record("eyos.test")
+    record.order_id = "order-1"
+
+    document = json.loads(JsonFormatter().format(record))
+
+    assert document["message"] == "hello world"
+    assert document["logger"] == "eyos.test"
+    assert document["level"] == "INFO"
+    assert document["order_id"] == "order-1"
+
+
+def test_sampling_filter_keeps_every_nth_info_record() -> None:
+    """Test that sampled loggers keep a fraction of INFO records."""
+    sampling_filter = SamplingFilter({"eyos.services": 0.25})
+
+    kept = [sampling_filter.filter(_record("eyos.services.queue_processor")) for _ in range(8)]
+
+    assert kept.count(True) == 2
+
+
+def test_sampling_filter_never_drops_warnings() -> None:
+    """Test that warnings and errors bypass sampling."""
+    sampling_filter = SamplingFilter({"eyos": 0})
+
+    assert sampling_filter.filter(_record("eyos.services", logging.WARNING)) is True
+    assert sampling_filter.filter(_record("eyos.services", logging.INFO)) is False
+    assert sampling_filter.filter(_record("uvicorn", logging.INFO)) is True
+
+
+def test_deferred_queue_handler_merges_args_on_the_calling_thread() -> None:
+    """Test that args are logged as they were at the logging call, with the traceback rendered to text."""
+    handler = DeferredQueueHandler(queue=None)  # type: ignore[arg-type]
+    items = ["a"]
+    record = _record("eyos.test", args=(items,))
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record.exc_info = sys.exc_info()
+
+    prepared = handler.prepare(record)
+    items.append("b")
+
+    assert (prepared.msg, prepared.args, prepared.exc_info) == ("hello ['a']", None, None)
+    document = json.loads(JsonFormatter().format(prepared))
+    assert document["message"] == "hello ['a']"
+    assert "ValueError: boom" in document["exc_info"]
@@ -0,0 +1,39 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict
+
+from eyos.services.metrics import aggregate_published, metric_name
+
+
+def _publish(directory: Path, pid: int, counters: Dict[str, float], gauges: Dict[str, float]) -> None:
+    (directory / f"{pid}.json").write_text(json.dumps({"pid": pid, "counters": counters, "gauges": gauges}))
+
+
+def test_aggregate_sums_counters_and_labels_gauges(tmp_path: Path) -> None:
+    """Test that counters add up across workers while each worker's gauges are kept apart."""
+    worker, other = os.getpid(), os.getppid()
+    _publish(
+        tmp_path,
+        worker,
+        {"queue_enqueued_total": 3, 'queue_coalesced_total{tenant="newlook"}': 1},
+        {"queue_shedding": 1, "queue_high_watermark": 100, 'queue_tenant_depth{tenant="newlook"}': 5},
+    )
+    _publish(tmp_path, other, {"queue_enqueued_total": 4}, {"queue_shedding": 0, "queue_high_watermark": 100})
+
+    aggregated = aggregate_published(str(tmp_path))
+
+    assert len(aggregated["processes"]) == 2
+    assert aggregated["counters"] == {"queue_enqueued_total": 7, 'queue_coalesced_total{tenant="newlook"}': 1}
+    assert aggregated["gauges"] == {
+        f'queue_shedding{{pid="{worker}"}}': 1,
+        f'queue_high_watermark{{pid="{worker}"}}': 100,
+        f'queue_tenant_depth{{tenant="newlook",pid="{worker}"}}': 5,
+        f'queue_shedding{{pid="{other}"}}': 0,
+        f'queue_high_watermark{{pid="{other}"}}': 100,
+    }
+
+
+def test_label_values_are_escaped() -> None:
+    """Test that label values from payloads cannot break out of their quotes."""
+    assert metric_name("queue_tenant_depth", tenant='a"b\\c\nd') == 'queue_tenant_depth{tenant="a\\"b\\\\c\\nd"}'
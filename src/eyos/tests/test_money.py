@@ -0,0 +1,112 @@
+import pickle
+from decimal import Decimal
+from typing import Dict, List
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from eyos.models.hail import Amount
+from eyos.models.money import Money, currency_exponent
+
+
+class Prices(BaseModel):
+    price: Money
+    prices: List[Money] = []
+
+
+@pytest.mark.parametrize(
+    "value,exponent,minor",
+    [
+        (0.285, 2, 29),  # 28.499999999999996 cents as a float
+        (1.005, 2, 101),
+        (2.675, 2, 268),
+        (-0.285, 2, -29),
+        (19.99, 2, 1999),
+        (0.125, 0, 0),
+        (0.5, 0, 1),
+        (1.0005, 3, 1001),
+        ("12.345", 2, 1235),
+        (7, 2, 700),
+    ],
+)
+def test_amounts_round_half_away_from_zero(value: float, exponent: int, minor: int) -> None:
+    """Test that parsed amounts round as written, not as their binary float."""
+    assert Money.from_number(value).quantize(exponent).minor == minor
+
+
+def test_amounts_keep_their_decimals() -> None:
+    """Test that amounts keep up to six decimals and add up exactly."""
+    assert Money.from_number(0.1).exponent == 2
+    assert Money.from_number(0.0001).exponent == 4
+    assert Money.from_number(1.23456789).minor == 1234568
+
+    total = sum([Money.from_number(0.1)] * 10, Money(0))
+    assert total.minor == 100
+    assert total == 1.0
+
+
+def test_amounts_compare_and_hash_as_floats() -> None:
+    """Test that amounts behave as the floats they replace."""
+    amount = Money(1999)
+    assert amount == 19.99
+    assert amount == Money(19990, 3)
+    whole: float = Money(15000)
+    assert whole == 150
+    assert hash(whole) == hash(150)
+    labels: Dict[float, str] = {Money(250): "a"}
+    assert labels[2.5] == "a"
+    assert Money(100) < Money(101) < 1.02
+    assert not Money(0)
+    assert str(Money(-5, 3)) == "-0.005"
+    assert Money(1999).to_decimal() == Decimal("19.99")
+
+
+def test_arithmetic_is_exact() -> None:
+    """Test addition, subtraction and division by quantities in minor units."""
+    assert (Money(1999) - Money(1, 3)).minor == 19989
+    assert (0.1 + Money(20)).minor == 30
+    assert (Money(5000) / 3).minor == 1667
+    assert (Money(-5) / 2).minor == -3
+    assert (Money(333) * 3).minor == 999
+    assert (-Money(1)).minor == -1
+    # Operations Money does not define degrade to floats
+    assert type(Money(100) * 1.5) is float
+    with pytest.raises(ZeroDivisionError):
+        Money(100) / 0
+
+
+def test_division_by_amounts_gives_ratios() -> None:
+    """Test that dividing by an amount or a float gives a plain float, like the float base class."""
+    ratio = Money(500) / Money(2000)
+    assert type(ratio) is float and ratio == 0.25
+    assert Money(1, 3) / Money(1) == 0.1
+    assert type(Money(300) / 1.5) is float and Money(300) / 1.5 == 2
+    assert 6 / Money(300) == 2
+    with pytest.raises(ZeroDivisionError):
+        Money(100) / Money(0)
+
+
+def test_currency_exponents() -> None:
+    """Test that currencies without cents or with mills get their own exponent."""
+    assert currency_exponent("JPY") == 0
+    assert currency_exponent("kwd") == 3
+    assert currency_exponent("EUR") == 2
+    assert currency_exponent(None) == 2
+
+
+def test_serialization_matches_floats() -> None:
+    """Test that amounts serialize as the JSON numbers floats would."""
+    body = b'{"price":19.99,"prices":[0.1,2,1.005,-0.0,150.0,1.23456]}'
+    prices = Prices.model_validate_json(body)
+    assert prices.prices[1] == Money(200)
+    assert prices.model_dump_json().encode() == b'{"price":19.99,"prices":[0.1,2.0,1.005,-0.0,150.0,1.23456]}'
+    assert Amount(value=Money(1999), unit="GBP").model_dump() == {"value": 19.99, "unit": "GBP"}
+    assert pickle.loads(pickle.dumps(prices)) == prices
+    assert Prices.model_json_schema()["properties"]["price"] == {"type": "number", "title": "Price"}
+
+
+@pytest.mark.parametrize("body", [b'{"price":"abc"}', b'{"price":NaN}', b'{"price":1e400}', b'{"price":null}'])
+def test_invalid_amounts_are_rejected(body: bytes) -> None:
+    """Test that non-numbers and non-finite amounts fail validation."""
+    with pytest.raises(ValidationError):
+        Prices.model_validate_json(body)
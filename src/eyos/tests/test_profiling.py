@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from eyos.main import create_app
+from eyos.services.profiling import CpuSampler, LoopLagMonitor, TaskTracker
+
+
+def test_loop_lag_monitor_histogram() -> None:
+    """Test that only lags above the threshold are counted as stalls."""
+    monitor = LoopLagMonitor(interval=0.1, threshold=0.05)
+
+    monitor.record(0.01)
+    monitor.record(0.08)
+    monitor.record(3.0)
+
+    report = monitor.report()
+    assert report["probes"] == 3
+    assert report["stalls"] == 2
+    assert report["histogram"]["le_100ms"] == 1
+    assert report["histogram"]["le_5000ms"] == 1
+    assert report["max_lag_ms"] == 3000.0
+
+
+def test_cpu_sampler_captures_busy_thread() -> None:
+    """Test that the sampler attributes samples to the busy function."""
+    def busy_loop(stop: threading.Event) -> None:
+        while not stop.is_set():
+            sum(range(1000))
+
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,))
+    worker.start()
+
+    sampler = CpuSampler(worker.ident, interval=0.001)
+    sampler.start()
+    time.sleep(0.1)
+    sampler.stop()
+    stop.set()
+    worker.join()
+
+    report = sampler.report()
+    assert report["samples"] > 0
+    assert any("busy_loop" in entry["stack"] for entry in report["stacks"])
+
+
+@pytest.mark.asyncio
+async def test_task_tracker_reports_age() -> None:
+    """Test that tasks created after installation are reported with an age."""
+    tracker = TaskTracker()
+    loop = asyncio.get_running_loop()
+    tracker.install(loop)
+    try:
+        task = asyncio.create_task(asyncio.sleep(1), name="sleeper")
+        await asyncio.sleep(0)
+
+        entries = {entry["name"]: entry for entry in tracker.dump()}
+        assert entries["sleeper"]["age_seconds"] is not None
+        assert entries["sleeper"]["coroutine"] == "sleep"
+        task.cancel()
+    finally:
+        loop.set_task_factory(None)
+
+
+def test_admin_router_disabled_by_default() -> None:
+    """Test that the profiling endpoints are not mounted by default."""
+    client = TestClient(create_app())
+
+    response = client.get("/admin/profiling/loop-lag", headers={"X-Admin-Token": "mock_admin_key"})
+
+    assert response.status_code == 404
+
+
+def test_admin_router_requires_token(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the profiling endpoints reject requests without the admin token."""
+    monkeypatch.setenv("EYOS_PROFILING_ENABLED", "true")
+    monkeypatch.setenv("EYOS_ADMIN_API_KEY", "test_admin_key")
+
+    with TestClient(create_app()) as client:
+        assert client.get("/admin/profiling/loop-lag").status_code == 403
+        response = client.get("/admin/profiling/loop-lag", headers={"X-Admin-Token": "mock_admin_key"})
+        assert response.status_code == 403
+
+        response = client.get("/admin/profiling/loop-lag", headers={"X-Admin-Token": "test_admin_key"})
+        assert response.status_code == 200
+        assert "histogram" in response.json()
+
+
+def test_profiling_requires_an_admin_key(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the profiling endpoints cannot be enabled with the public default admin key."""
+    monkeypatch.setenv("EYOS_PROFILING_ENABLED", "true")
+
+    with pytest.raises(ValueError, match="EYOS_ADMIN_API_KEY"):
+        create_app()
@@ -0,0 +1,332 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+
+from eyos.exceptions.queue import QueueOverloadedError
+from eyos.main import create_app
+from eyos.models import NewStoreEvent
+from eyos.services.metrics import metrics
+from eyos.services.queue_processor import BatchPipeline, InMemoryQueue
+from eyos.services.queued_event import EventPriority, QueuedEvent, event_priority
+from eyos.services.scheduling import FairScheduler, PriorityScheduler
+
+
+def _event(
+    order_id: str, tenant: str = "newlook", channel_type: str = "store", is_historical: bool = False
+) -> Dict[str, Any]:
+    return {
+        "tenant": tenant,
+        "name": "order.completed",
+        "payload": {"id": order_id, "channel_type": channel_type, "is_historical": is_historical},
+    }
+
+
+def _queued(order_id: str, **kwargs: Any) -> QueuedEvent:
+    return QueuedEvent.from_dict(_event(order_id, **kwargs))
+
+
+@pytest.fixture
+def sample_event_data() -> Dict[str, Any]:
+    """Load sample NewStore event data."""
+    sample_file = Path(__file__).parent.parent.parent.parent / "newstore_sample_payload.json"
+    with open(sample_file, "r") as f:
+        data: Dict[str, Any] = json.load(f)
+    return data
+
+
+@pytest.mark.asyncio
+async def test_queue_sheds_above_high_watermark() -> None:
+    """Test that the queue rejects events between the high and low watermark."""
+    queue = InMemoryQueue(maxsize=10, high_watermark=4, low_watermark=2)
+
+    for i in range(4):
+        await queue.enqueue(_queued(str(i)))
+
+    with pytest.raises(QueueOverloadedError) as excinfo:
+        await queue.enqueue(_queued("rejected"))
+    assert excinfo.value.status_code == 503
+
+    # Draining to just above the low watermark keeps shedding (hysteresis)
+    await queue.get()
+    assert queue.is_overloaded() is True
+
+    await queue.get()
+    assert queue.is_overloaded() is False
+    await queue.enqueue(_queued("accepted"))
+
+
+@pytest.mark.asyncio
+async def test_queue_retry_after_uses_drain_rate() -> None:
+    """Test that the suggested retry delay reflects the drain rate."""
+    queue = InMemoryQueue(maxsize=100, high_watermark=50, low_watermark=10, max_retry_after=60)
+    for i in range(50):
+        await queue.enqueue(_queued(str(i)))
+
+    assert queue.retry_after() == 60
+
+    queue.drain_rate = 8.0
+    assert queue.retry_after() == 5
+
+
+def test_queue_rejects_invalid_watermarks() -> None:
+    """Test that inconsistent watermarks are rejected."""
+    with pytest.raises(ValueError):
+        InMemoryQueue(maxsize=10, high_watermark=4, low_watermark=6)
+
+
+def test_webhook_returns_retry_after_when_overloaded(
+    monkeypatch: pytest.MonkeyPatch, sample_event_data: Dict[str, Any]
+) -> None:
+    """Test that the webhook endpoint sheds load with a Retry-After header."""
+    monkeypatch.setenv("EYOS_QUEUE_ENABLED", "true")
+    monkeypatch.setenv("EYOS_QUEUE_MAX_SIZE", "2")
+    monkeypatch.setenv("EYOS_QUEUE_HIGH_WATERMARK", "1")
+    monkeypatch.setenv("EYOS_QUEUE_LOW_WATERMARK", "0")
+
+    with TestClient(create_app()) as client:
+        # Stop the worker so the backlog stays in the queue
+        queue = client.app.state.queue_processor.queue  # type: ignore[attr-defined]
+        client.portal.call(queue.stop)  # type: ignore[union-attr]
+        queue.scheduler.push("newlook", _queued("backlog"))
+
+        response = client.post("/webhooks/newstore/", json=sample_event_data)
+
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+
+        gauges = client.get("/metrics").json()["gauges"]
+        assert gauges["queue_shedding"] == 1
+        assert gauges["queue_high_watermark"] == 1
+
+
+def test_fair_scheduler_interleaves_tenants() -> None:
+    """Test that a tenant with a large backlog does not starve a small one."""
+    scheduler: FairScheduler[str] = FairScheduler()
+    for i in range(100):
+        scheduler.push("backfill", f"b{i}")
+    scheduler.push("live", "l0")
+    scheduler.push("live", "l1")
+
+    order = []
+    while (entry := scheduler.pop()) is not None:
+        order.append(entry[1])
+        scheduler.done(entry[0])
+
+    assert order[:4] == ["b0", "l0", "b1", "l1"]
+    assert len(order) == 102
+
+
+def test_fair_scheduler_respects_weights() -> None:
+    """Test that weights set how many items a tenant takes per turn."""
+    scheduler: FairScheduler[str] = FairScheduler(weights={"big": 3})
+    for i in range(6):
+        scheduler.push("big", f"b{i}")
+        scheduler.push("small", f"s{i}")
+
+    order = []
+    for _ in range(8):
+        entry = scheduler.pop()
+        assert entry is not None
+        order.append(entry[1])
+        scheduler.done(entry[0])
+
+    assert order == ["b0", "b1", "b2", "s0", "b3", "b4", "b5", "s1"]
+
+
+def test_fair_scheduler_caps_in_flight() -> None:
+    """Test that a tenant at its in-flight cap is skipped until an item completes."""
+    scheduler: FairScheduler[str] = FairScheduler(max_in_flight={"backfill": 1})
+    scheduler.push("backfill", "b0")
+    scheduler.push("backfill", "b1")
+
+    assert scheduler.pop() == ("backfill", "b0")
+    assert scheduler.pop() is None
+
+    scheduler.done("backfill")
+    assert scheduler.pop() == ("backfill", "b1")
+
+
+@pytest.mark.asyncio
+async def test_queue_reports_tenant_metrics() -> None:
+    """Test that per-tenant depth is exposed in the queue stats."""
+    queue = InMemoryQueue()
+    await queue.enqueue(_queued("1", tenant="a"))
+    await queue.enqueue(_queued("2", tenant="a"))
+    await queue.enqueue(_queued("3", tenant="b"))
+
+    stats = queue.stats()
+
+    assert stats['queue_tenant_depth{tenant="a"}'] == 2
+    assert stats['queue_tenant_depth{tenant="b"}'] == 1
+    assert stats["queue_depth"] == 3
+
+
+@pytest.mark.asyncio
+async def test_queue_forgets_drained_tenants() -> None:
+    """Test that tenants leave no scheduler state or metrics behind once their events are processed."""
+    queue = InMemoryQueue()
+    for i in range(20):
+        await queue.enqueue(_queued(str(i), tenant=f'tenant-{i}"'))
+    for _ in range(20):
+        tenant, _ = await queue.get()
+        await queue.task_done(tenant)
+
+    assert queue.scheduler.in_flight == {}
+    assert all(not level.queues and not level.deficit for level in queue.scheduler.levels)
+    assert not [name for name in queue.stats() if "tenant=" in name]
+
+
+def test_event_priority_lanes() -> None:
+    """Test that events are classified by channel type and historical flag."""
+    assert event_priority(_event("1")) == EventPriority.LIVE_STORE
+    assert event_priority(_event("2", channel_type="web")) == EventPriority.LIVE_OTHER
+    assert event_priority(_event("3", is_historical=True)) == EventPriority.HISTORICAL
+
+
+@pytest.mark.asyncio
+async def test_queue_serves_live_store_events_first() -> None:
+    """Test that a live store receipt jumps ahead of a historical backlog."""
+    queue = InMemoryQueue()
+    for i in range(50):
+        await queue.enqueue(_queued(f"h{i}", tenant="bulk", is_historical=True))
+    await queue.enqueue(_queued("web", channel_type="web"))
+    await queue.enqueue(_queued("till"))
+
+    order = []
+    for _ in range(3):
+        tenant, event = await queue.get()
+        order.append(event.order_id)
+        await queue.task_done(tenant)
+
+    assert order == ["till", "web", "h0"]
+
+
+def test_priority_scheduler_ages_waiting_levels() -> None:
+    """Test that a starved lower level is eventually served ahead of urgent items."""
+    now = [0.0]
+    scheduler: PriorityScheduler[str] = PriorityScheduler(3, aging_interval=1.0, clock=lambda: now[0])
+    scheduler.push("t", "historical", priority=2)
+    for i in range(10):
+        scheduler.push("t", f"live{i}", priority=0)
+
+    served = []
+    for _ in range(5):
+        entry = scheduler.pop()
+        assert entry is not None
+        served.append(entry[1])
+        scheduler.done("t")
+        now[0] += 1.0
+
+    # The historical level overtakes once it waited more than (2 + 1) aging intervals
+    assert served == ["live0", "live1", "live2", "live3", "historical"]
+
+
+def test_queued_event_round_trips_compactly(sample_event_data: Dict[str, Any]) -> None:
+    """Test that a queued event keeps the scheduling fields and decodes to the original event."""
+    event = NewStoreEvent.model_validate(sample_event_data)
+
+    queued = QueuedEvent.from_event(event)
+
+    assert queued.tenant == "newlook"
+    assert queued.order_id == event.payload.id
+    assert queued.priority == event_priority(sample_event_data)
+    assert queued.size < len(event.model_dump_json())
+    assert queued.to_event() == event
+    assert QueuedEvent.from_dict(event.model_dump()).to_event() == event
+
+
+def test_queued_event_interns_repeated_strings() -> None:
+    """Test that tenant and event names are shared between queued events."""
+    first = _queued("1", tenant="".join(["new", "look"]))
+    second = _queued("2", tenant="".join(["new", "look"]))
+
+    assert first.tenant is second.tenant
+    assert first.name is second.name
+
+
+@pytest.mark.asyncio
+async def test_queue_coalesces_waiting_events() -> None:
+    """Test that a newer event for a waiting order replaces it in place."""
+    metrics.reset()
+    queue = InMemoryQueue(coalesce=True)
+    first = _event("1")
+    first["payload"]["version"] = 1
+    await queue.enqueue(QueuedEvent.from_dict(first))
+    await queue.enqueue(_queued("2"))
+
+    newer = _event("1")
+    newer["payload"]["version"] = 2
+    superseded_at = time.monotonic()
+    await queue.enqueue(QueuedEvent.from_dict(newer))
+
+    assert queue.qsize() == 2
+    assert metrics.counters['queue_coalesced_total{tenant="newlook"}'] == 1
+
+    # The replaced event keeps its place in the queue, ahead of order 2
+    tenant, event = await queue.get()
+    assert event.to_dict()["payload"]["version"] == 2
+    # Its deadline counts from the newer version
+    assert event.enqueued_at >= superseded_at
+    await queue.task_done(tenant)
+
+    # Once dequeued, a new event for the order is queued again
+    await queue.enqueue(_queued("1"))
+    assert queue.qsize() == 2
+
+
+@pytest.mark.asyncio
+async def test_queue_without_coalescing_keeps_every_event() -> None:
+    """Test that events for the same order are all kept by default."""
+    queue = InMemoryQueue()
+    await queue.enqueue(_queued("1"))
+    await queue.enqueue(_queued("1"))
+
+    assert queue.qsize() == 2
+
+
+@pytest.mark.asyncio
+async def test_pipeline_overlaps_transforms_with_sends() -> None:
+    """Test that batches follow the backlog and the next batch is prepared while one is being sent."""
+    metrics.reset()
+    queue = InMemoryQueue()
+    for i in range(16):
+        await queue.enqueue(_queued(str(i)))
+
+    timeline: List[Tuple[str, str]] = []
+    sent = asyncio.Event()
+
+    async def prepare(queued: QueuedEvent) -> str:
+        timeline.append(("prepare", queued.order_id))
+        return queued.order_id
+
+    async def send(queued: QueuedEvent, order_id: str) -> None:
+        await asyncio.sleep(0.01)
+        if order_id == "5":
+            raise RuntimeError("Hail API error")
+        timeline.append(("sent", order_id))
+        if sum(1 for step, _ in timeline if step == "sent") == 15:
+            sent.set()
+
+    pipeline = BatchPipeline(queue, prepare, send, max_batch_size=4, buffer_size=1, concurrency=2)
+    assert pipeline.batch_size() == 4
+
+    task = asyncio.create_task(pipeline.run())
+    await asyncio.wait_for(sent.wait(), 5)
+    await asyncio.sleep(0.02)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    # Batches shrink as the backlog drains: 16 -> 4, 12 -> 4, 8 -> 4, 4 -> 2, then single events
+    assert metrics.counters["queue_batches_total"] == 6
+    assert metrics.counters["queue_batched_events_total"] == 16
+    # The second batch was prepared before the first event was sent
+    assert timeline.index(("prepare", "4")) < timeline.index(("sent", "0"))
+    # Every event released its tenant slot, the failed one included
+    assert metrics.counters['queue_processing_seconds_count{tenant="newlook"}'] == 16
+    assert not any(queue.scheduler.in_flight.values())
+    assert pipeline.stats()["queue_pipeline_sending"] == 0
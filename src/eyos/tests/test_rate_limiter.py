@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import pytest
+
+from eyos.services.rate_limiter import RateLimiter
+
+
+def test_rate_limiter_allows_burst_then_waits() -> None:
+    """Test that the bucket allows a burst and then reports the wait time."""
+    limiter = RateLimiter(rate=10, burst=3)
+
+    assert [limiter.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert 0 < limiter.try_acquire() <= 0.1
+
+
+def test_rate_limiter_shares_budget_through_file(tmp_path: Path) -> None:
+    """Test that limiters backed by the same file draw from one bucket."""
+    path = str(tmp_path / "bucket")
+    first = RateLimiter(rate=1, burst=2, path=path)
+    second = RateLimiter(rate=1, burst=2, path=path)
+    try:
+        assert first.try_acquire() == 0.0
+        assert second.try_acquire() == 0.0
+        assert first.try_acquire() > 0
+        assert second.try_acquire() > 0
+    finally:
+        first.close()
+        second.close()
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_acquire_waits_for_token() -> None:
+    """Test that acquire blocks until a token is refilled."""
+    limiter = RateLimiter(rate=50, burst=1)
+
+    await limiter.acquire()
+    await limiter.acquire()
+
+    assert limiter.try_acquire() > 0
@@ -0,0 +1,131 @@
+import json
+import random
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from eyos.main import create_app
+from eyos.models.newstore import NewStoreEvent
+from eyos.utils.json_stream import JSONStreamError, JSONStreamValidator, schema_for_model
+
+_SAMPLE_FILE = Path(__file__).parent.parent.parent.parent / "newstore_sample_payload.json"
+
+
+def _random_string(rng: random.Random) -> str:
+    return "".join(rng.choice('ab "\\/\n\té€\U0001f600') for _ in range(rng.randint(0, 8)))
+
+
+def _random_json(rng: random.Random, depth: int = 0) -> Any:
+    kind = rng.randint(0, 6 if depth < 4 else 4)
+    if kind == 0:
+        return rng.choice([None, True, False])
+    if kind == 1:
+        return rng.choice([0, -1, 12345678901234567890, rng.uniform(-1e6, 1e6), 1e-7, -2.5e300])
+    if kind in (2, 3, 4):
+        return _random_string(rng)
+    if kind == 5:
+        return [_random_json(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    return {_random_string(rng): _random_json(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+
+
+def _split(data: bytes, rng: random.Random) -> List[bytes]:
+    """Cut data into chunks of 1 to 7 bytes, so tokens and escapes are split everywhere."""
+    chunks, position = [], 0
+    while position < len(data):
+        size = rng.randint(1, 7)
+        chunks.append(data[position:position + size])
+        position += size
+    return chunks
+
+
+def _validate(chunks: List[bytes], max_depth: int = 32, model: Any = None) -> None:
+    validator = JSONStreamValidator(schema_for_model(model) if model else None, max_depth)
+    for chunk in chunks:
+        validator.feed(chunk)
+    validator.close()
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_validator_agrees_with_json_parser(seed: int) -> None:
+    """Test random documents and their truncations, split into random chunks, against json.loads."""
+    rng = random.Random(seed)
+    text = json.dumps(_random_json(rng), ensure_ascii=rng.random() < 0.5, indent=rng.choice([None, 1]))
+    data = text.encode()
+    _validate(_split(data, rng))
+
+    for end in {rng.randint(0, len(data) - 1) for _ in range(5)}:
+        truncated = data[:end]
+        try:
+            json.loads(truncated)
+        except ValueError:
+            with pytest.raises(JSONStreamError):
+                _validate(_split(truncated, rng))
+        else:
+            _validate(_split(truncated, rng))
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"", b"{", b'{"a" 1}', b'{"a":1,}', b"[1 2]", b"01", b"tru", b'"\\x"', b'"a\nb"', b"{} {}", b"[1]]", b"-"],
+)
+def test_validator_rejects_malformed_documents(data: bytes) -> None:
+    """Test that malformed documents are rejected however they are chunked."""
+    with pytest.raises(JSONStreamError):
+        _validate([data])
+    with pytest.raises(JSONStreamError):
+        _validate(_split(data, random.Random(0)))
+
+
+def test_validator_accepts_tokens_split_anywhere() -> None:
+    """Test numbers, literals and escapes cut at every byte."""
+    data = b'[NaN, -Infinity, Infinity, -0.5E-3, 10, true, null, "\\u00e9\\n\xe2\x82\xac", {"\\"k\\"": false}]'
+    _validate([data[i:i + 1] for i in range(len(data))])
+    with pytest.raises(JSONStreamError, match="Invalid UTF-8"):
+        _validate([b'["\xe2\x82', b'"]'])
+
+
+def test_validator_checks_depth_and_schema() -> None:
+    """Test that nesting and the kinds of values are checked against the event schema."""
+    with pytest.raises(JSONStreamError, match="Nesting deeper than 3"):
+        _validate([b'{"a":[[[1]]]}'], max_depth=3)
+
+    data = json.loads(_SAMPLE_FILE.read_bytes())
+    _validate(_split(json.dumps(data).encode(), random.Random(1)), model=NewStoreEvent)
+
+    data["payload"]["items"][0]["list_price"] = {"amount": 10}
+    with pytest.raises(JSONStreamError, match=r"\$\.payload\.items\[0\]\.list_price should be scalar, not object"):
+        _validate([json.dumps(data).encode()], model=NewStoreEvent)
+
+    del data["payload"]["items"][0]["list_price"]
+    with pytest.raises(JSONStreamError, match=r"\$\.payload\.items\[0\] is missing list_price"):
+        _validate([json.dumps(data).encode()], model=NewStoreEvent)
+
+
+def test_webhook_body_limits(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test per-route limits, and that large bodies are validated as they stream."""
+    monkeypatch.setenv("EYOS_BODY_MAX_SIZE", "20000")
+    monkeypatch.setenv("EYOS_BODY_MAX_SIZES", '{"simulate": 40000}')
+    monkeypatch.setenv("EYOS_BODY_STREAM_THRESHOLD", "1024")
+    data = json.loads(_SAMPLE_FILE.read_bytes())
+    data["payload"]["notes"] = "x" * 25000
+
+    with TestClient(create_app()) as client:
+        response = client.post("/webhooks/newstore/", json=data)
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+        # Validated while streaming and accepted
+        response = client.post("/webhooks/newstore/simulate", json=data)
+        assert response.status_code == status.HTTP_202_ACCEPTED
+
+        # Bodies without a Content-Length are cut off as they stream
+        chunks = iter([json.dumps(data).encode()] * 2)
+        response = client.post("/webhooks/newstore/simulate", content=chunks)
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+        data["payload"]["items"] = {"not": "a list"}
+        response = client.post("/webhooks/newstore/simulate", json=data)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["message"] == "Invalid request body"
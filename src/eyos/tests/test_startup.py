@@ -0,0 +1,77 @@
+import os
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from eyos.services.profiling import ImportTiming, measure_import, parse_importtime
+
+# Cold import budgets in milliseconds, about three times the time measured on a developer laptop
+APP_IMPORT_BUDGET_MS = 2000
+CLI_IMPORT_BUDGET_MS = 1200
+
+SRC_PATH = Path(__file__).parent.parent.parent
+
+
+def _environment() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_PATH), env.get("PYTHONPATH")]))
+    return env
+
+
+def _total_ms(timings: List[ImportTiming]) -> float:
+    return sum(timing.cumulative_us for timing in timings if timing.depth == 0) / 1000
+
+
+def test_parse_importtime() -> None:
+    """Test that nested imports are parsed with their depth."""
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     fastapi.types\n"
+        "import time:      1500 |       1620 |   fastapi\n"
+        "import time:        80 |       1700 | eyos.main\n"
+    )
+
+    timings = parse_importtime(output)
+
+    assert [(timing.module, timing.depth) for timing in timings] == [
+        ("fastapi.types", 2),
+        ("fastapi", 1),
+        ("eyos.main", 0),
+    ]
+    assert timings[1].self_us == 1500
+    assert _total_ms(timings) == 1.7
+
+
+@pytest.mark.parametrize(
+    ("statement", "forbidden"),
+    [
+        # The server and CLI frameworks are only needed by the CLI
+        (
+            "import eyos.main",
+            {"eyos.commands.cli", "typer", "uvicorn", "eyos.routers.admin", "eyos.services.profiling"},
+        ),
+        # The CLI must not build the application or load the server to run a command
+        ("import eyos.commands.cli", {"eyos.main", "fastapi", "uvicorn", "eyos.services"}),
+    ],
+)
+def test_import_does_not_load_heavy_dependencies(statement: str, forbidden: set[str]) -> None:
+    """Test that heavy or optional modules are imported lazily."""
+    modules = {timing.module for timing in measure_import(statement, _environment())}
+
+    assert modules & forbidden == set()
+
+
+@pytest.mark.parametrize(
+    ("statement", "budget_ms"),
+    [
+        ("import eyos.main", APP_IMPORT_BUDGET_MS),
+        ("import eyos.commands.cli", CLI_IMPORT_BUDGET_MS),
+    ],
+)
+def test_cold_import_within_budget(statement: str, budget_ms: float) -> None:
+    """Test that the application and the CLI start within their import time budget."""
+    # The best of a few runs filters out noise from other processes
+    elapsed_ms = min(_total_ms(measure_import(statement, _environment())) for _ in range(3))
+
+    assert elapsed_ms < budget_ms, f"`{statement}` took {elapsed_ms:.0f}ms, budget is {budget_ms}ms"
@@ -0,0 +1,121 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from eyos.models.money import Money
+from eyos.models.newstore import NewStoreEvent
+from eyos.services import tax
+from eyos.services.tax import ReceiptTaxes, TaxTable, load_tax_table
+from eyos.services.transformer import transform_newstore_to_hail
+
+SAMPLE_PAYLOAD = Path(__file__).parent.parent.parent.parent / "newstore_sample_payload.json"
+
+
+@pytest.fixture
+def tax_table() -> TaxTable:
+    """Load the bundled rate tables."""
+    return load_tax_table()
+
+
+def test_lookup_by_country_and_tax_class(tax_table: TaxTable) -> None:
+    """Test that tax classes map to the rules of their country."""
+    standard = tax_table.lookup("GB", "PC040100")
+    assert (standard.code, standard.rate, standard.authority.identifier) == ("VAT20", 20, "GBVAT")
+    assert tax_table.lookup("GB", "PC040144").code == "VAT0"
+    assert tax_table.lookup("DE", "PC040100").code == "MWST19"
+
+    # Unmapped tax classes use the country's default rate
+    assert tax_table.lookup("GB", "PC999999") is standard
+
+
+def test_lookup_prefers_the_provider_rate(tax_table: TaxTable) -> None:
+    """Test that the rate charged by the tax provider selects the matching rule of the country."""
+    assert tax_table.lookup("GB", "PC040100", 20.000000000000004).code == "VAT20"
+    assert tax_table.lookup("GB", "PC040100", 5).code == "VAT5"
+    assert tax_table.lookup("IE", "PC040100", 0.135 * 100).code == "VAT13.5"
+
+    # Rates missing from the tables get a rule once, which is then shared
+    unlisted = tax_table.lookup("GB", "PC040100", 17.5)
+    assert (unlisted.code, unlisted.authority.identifier) == ("VAT17.5", "GBVAT")
+    assert tax_table.lookup("GB", "PC040200", 17.5) is unlisted
+
+
+def test_unknown_country_uses_the_default_section(tax_table: TaxTable) -> None:
+    """Test that countries missing from the tables are compiled from the default section on first use."""
+    rule = tax_table.lookup("ZZ", "PC040100")
+
+    assert (rule.code, rule.rate, rule.authority.identifier) == ("VAT20", 20, "ZZVAT")
+    assert tax_table.lookup("ZZ", "other") is rule
+
+
+def test_rules_compiled_from_payloads_are_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that many distinct provider rates and unknown countries do not grow the table."""
+    tax_table = TaxTable.from_file(tax.DEFAULT_TAX_RATES_FILE)
+    monkeypatch.setattr(tax, "MAX_PROVIDER_RATES", 10)
+    monkeypatch.setattr(tax, "MAX_UNLISTED_COUNTRIES", 5)
+    rates, rules = len(tax_table.rates), len(tax_table.rules)
+
+    for i in range(1000):
+        tax_table.lookup("GB", "PC040100", 30 + i / 100)
+        tax_table.lookup(f"Z{i}", "PC040100", 20)
+        tax_table.lookup(f"Y{i}", "PC040100", 7.25)
+    assert (len(tax_table.rates), len(tax_table.rules)) == (rates, rules)
+    assert len(tax_table.provider_rates) == 10
+    assert len(tax_table.unlisted_countries) == 5
+
+    # Recently used rules are still shared
+    assert tax_table.lookup("GB", "PC040100", 39.99) is tax_table.lookup("GB", "PC040200", 39.99)
+    assert tax_table.lookup("Y999", "PC040100") is tax_table.lookup("Y999", "other")
+
+
+def test_invalid_tables_are_rejected() -> None:
+    """Test that incomplete rate tables fail when they are compiled."""
+    with pytest.raises(ValueError, match="Invalid tax rate tables"):
+        TaxTable({"default": {}, "countries": {"GB": {"header": "VAT"}}})
+
+
+def test_receipt_taxes_share_identical_line_taxes(tax_table: TaxTable) -> None:
+    """Test that lines are summed per rule in one pass and identical line taxes are shared."""
+    standard = tax_table.lookup("GB", "PC040100")
+    reduced = tax_table.lookup("GB", "PC040100", 5)
+    receipt_taxes = ReceiptTaxes("GBP")
+
+    first = receipt_taxes.line_tax(standard, Money(1000), Money(5000), Money(6000))
+    second = receipt_taxes.line_tax(standard, Money(1000), Money(5000), Money(6000))
+    receipt_taxes.line_tax(standard, Money(10), Money(50), Money(60))
+    receipt_taxes.line_tax(reduced, Money(100), Money(2000), Money(2100))
+
+    assert first is second
+    assert first.authority is standard.authority
+
+    taxes = receipt_taxes.receipt_taxes(exempt=False)
+    assert [(tax.code, tax.amount.value) for tax in taxes] == [("VAT20", 20.1), ("VAT5", 1)]
+    assert taxes[0].net_taxed_amount is not None and taxes[0].net_taxed_amount.value == 100.5
+    assert taxes[0].gross_taxed_amount is not None and taxes[0].gross_taxed_amount.value == 120.6
+
+
+@pytest.mark.asyncio
+async def test_transformed_receipt_taxes_reconcile_with_the_order() -> None:
+    """Test that receipt taxes are aggregated from the lines of a multi-rate order."""
+    data = json.loads(SAMPLE_PAYLOAD.read_text())
+    order = data["payload"]
+    # A zero-rated children's item and shipping
+    order["items"].append(
+        {**order["items"][0], "id": "kids", "product_id": "SKU-KIDS", "tax_class": "PC040144", "list_price": 20,
+         "tax": 0, "tax_provider_details": []}
+    )
+    order.update(subtotal=145, shipping_total=5, shipping_tax=1, tax_total=26, grand_total=171)
+
+    transaction = await transform_newstore_to_hail(NewStoreEvent(**data))
+
+    taxes = {tax.code: tax for tax in transaction.receipt.taxes}
+    assert set(taxes) == {"VAT20", "VAT0"}
+    assert sum(tax.amount.value for tax in taxes.values()) == order["tax_total"]
+    assert taxes["VAT20"].amount.value == Money(2600)
+    assert taxes["VAT0"].net_taxed_amount is not None and taxes["VAT0"].net_taxed_amount.value == Money(2000)
+    assert taxes["VAT20"].authority is taxes["VAT0"].authority
+
+    items = transaction.receipt.sale_items
+    assert items[0].tax.net_taxed_amount is not None and items[0].tax.net_taxed_amount.value == Money(5000)
+    assert items[0].salesperson is items[1].salesperson
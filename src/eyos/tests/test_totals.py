@@ -0,0 +1,82 @@
+import random
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from eyos.models.money import Money
+from eyos.models.newstore import NewStoreEvent, OrderItem
+from eyos.services.totals import _line_amounts_numpy, _line_amounts_python, compute_line_amounts, reconcile
+
+SAMPLE_PAYLOAD = Path(__file__).parent.parent.parent.parent / "newstore_sample_payload.json"
+
+
+@pytest.fixture
+def sample_event() -> NewStoreEvent:
+    """Load the sample NewStore event."""
+    return NewStoreEvent.model_validate_json(SAMPLE_PAYLOAD.read_bytes())
+
+
+def _items(sample_event: NewStoreEvent, count: int, seed: int = 7) -> List[OrderItem]:
+    rng = random.Random(seed)
+    template = sample_event.payload.items[0]
+    return [
+        template.model_copy(
+            update={
+                "list_price": Money.from_number(round(rng.uniform(-50, 500), 3)),
+                "tax": Money.from_number(round(rng.uniform(0, 50), 2)),
+                "quantity": rng.randint(1, 7),
+            }
+        )
+        for _ in range(count)
+    ]
+
+
+def test_unit_prices_are_rounded_to_cents(sample_event: NewStoreEvent) -> None:
+    """Test that unit prices are divided in minor units and round half away from zero."""
+    item = sample_event.payload.items[0]
+    items = [
+        item.model_copy(update={"list_price": Money(5000), "quantity": 3}),
+        item.model_copy(update={"list_price": Money(5), "quantity": 2}),
+    ]
+
+    assert list(compute_line_amounts(items, tax_included=False).unit_prices) == [1667, 3]
+    # Yen have no minor unit
+    assert list(compute_line_amounts(items, tax_included=False, exponent=0).unit_prices) == [17, 0]
+
+
+@pytest.mark.parametrize("exponent", [0, 2, 4])
+@pytest.mark.parametrize("tax_included", [False, True])
+def test_vectorized_amounts_match_line_by_line(sample_event: NewStoreEvent, tax_included: bool, exponent: int) -> None:
+    """Test that the NumPy path gives exactly the same amounts as the line-by-line path, rounding or scaling up."""
+    pytest.importorskip("numpy")
+    items = _items(sample_event, 500)
+
+    python = _line_amounts_python(items, tax_included, exponent)
+    vectorized = _line_amounts_numpy(items, tax_included, exponent)
+
+    for name in ("unit_prices", "nets", "grosses", "taxes"):
+        assert list(getattr(python, name)) == getattr(vectorized, name), name
+    for name in ("subtotal", "tax_total", "net_total", "gross_total"):
+        assert getattr(python, name) == getattr(vectorized, name), name
+        assert isinstance(getattr(vectorized, name), int)
+
+
+def test_sample_order_reconciles(sample_event: NewStoreEvent) -> None:
+    """Test that the totals of the sample order match its lines."""
+    amounts = compute_line_amounts(sample_event.payload.items, tax_included=False)
+
+    assert (amounts.subtotal, amounts.tax_total, amounts.gross_total) == (12500, 2500, 15000)
+    assert reconcile(sample_event.payload, amounts).ok
+
+
+def test_reconcile_reports_mismatched_totals(sample_event: NewStoreEvent) -> None:
+    """Test that totals which do not add up are reported in cents."""
+    order = sample_event.payload.model_copy(update={"tax_total": Money(2501), "grand_total": Money(15001)})
+
+    reconciliation = reconcile(order, compute_line_amounts(order.items, tax_included=False))
+
+    assert reconciliation.mismatches == {
+        "tax_total": (Money(2501), Money(2500)),
+        "grand_total": (Money(15001), Money(15000)),
+    }
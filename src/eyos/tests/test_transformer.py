@@ -1,11 +1,13 @@
 import json
 from pathlib import Path
+from typing import Optional, Tuple
 
 import pytest
 
+from eyos.config import Settings
 from eyos.models.hail import HailTransaction
 from eyos.models.newstore import NewStoreEvent
-from eyos.services.transformer import transform_newstore_to_hail
+from eyos.services.transformer import payment_token_key, transform_newstore_to_hail
 
 
 @pytest.fixture
@@ -75,3 +77,48 @@ async def test_transform_tenders(sample_newstore_event: NewStoreEvent) -> None:
     assert tender.type == "card"
     assert tender.payment_card is not None
     assert tender.payment_card.type == "VISA"
+
+
+def _card_identifiers(transaction: HailTransaction) -> Tuple[Optional[str], str, str, Optional[str]]:
+    tender = transaction.receipt.tenders[0]
+    assert tender.payment_card is not None and tender.payment_authorization is not None
+    authorization = tender.payment_authorization
+    return (tender.payment_card.token, authorization.reference_id, authorization.approval_code, authorization.token)
+
+
+@pytest.mark.asyncio
+async def test_derived_payment_tokens_are_reproducible(sample_newstore_event: NewStoreEvent) -> None:
+    """Test that derived tokens make re-sent transactions byte-identical and depend on the key."""
+    key = payment_token_key(Settings(payment_token_mode="derived", payment_token_key="secret"))
+
+    first = await transform_newstore_to_hail(sample_newstore_event, key)
+    second = await transform_newstore_to_hail(sample_newstore_event, key)
+    other_key = await transform_newstore_to_hail(sample_newstore_event, b"other secret")
+
+    assert first.model_dump_json() == second.model_dump_json()
+    assert _card_identifiers(first) != _card_identifiers(other_key)
+    card_token = _card_identifiers(first)[0]
+    assert card_token is not None and card_token.startswith("CardToken")
+
+
+@pytest.mark.asyncio
+async def test_random_payment_tokens_differ(sample_newstore_event: NewStoreEvent) -> None:
+    """Test that random mode generates new tokens for every transformation."""
+    assert payment_token_key(Settings(payment_token_mode="random")) is None
+
+    first = await transform_newstore_to_hail(sample_newstore_event)
+    second = await transform_newstore_to_hail(sample_newstore_event)
+
+    assert len(set(_card_identifiers(first)) & set(_card_identifiers(second))) == 0
+
+
+def test_unknown_payment_token_mode_is_rejected() -> None:
+    """Test that a misconfigured mode fails instead of silently using random tokens."""
+    with pytest.raises(ValueError, match="Unsupported payment token mode"):
+        payment_token_key(Settings(payment_token_mode="sequential"))
+
+
+def test_derived_payment_tokens_require_a_key() -> None:
+    """Test that derived tokens are refused under the public default key."""
+    with pytest.raises(ValueError, match="EYOS_PAYMENT_TOKEN_KEY must be set"):
+        payment_token_key(Settings(payment_token_mode="derived"))
@@ -1,5 +1,9 @@
+import base64
+import hashlib
+import hmac
 import json
 from pathlib import Path
+from typing import Dict, List, Tuple
 from unittest.mock import patch
 
 import pytest
@@ -7,10 +11,13 @@ from fastapi import HTTPException, status
 from fastapi.testclient import TestClient
 
 from eyos.config import Settings
-from eyos.main import app
-from eyos.models.newstore import NewStoreEvent
+from eyos.main import app, create_app
+from eyos.models.newstore import NewStoreEvent, NewStoreEventEnvelope
 from eyos.services.hail_client import HailClient
+from eyos.services.metrics import metrics
 from eyos.services.newstore_webhook import NewStoreWebhookHandler
+from eyos.services.queue_processor import InMemoryQueue, QueueProcessor
+from eyos.services.queued_event import QueuedEvent
 
 
 @pytest.fixture
@@ -96,3 +103,89 @@ def test_webhook_endpoint() -> None:
         assert "event_id" in response.json()
         assert "event_type" in response.json()
         assert "status" in response.json()
+
+
+def test_queued_webhook_defers_full_validation(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the queued accept path only checks the event envelope."""
+    monkeypatch.setenv("EYOS_QUEUE_ENABLED", "true")
+    sample_file = Path(__file__).parent.parent.parent.parent / "newstore_sample_payload.json"
+    with open(sample_file, "r") as f:
+        data = json.load(f)
+    data["payload"]["items"][0].pop("product_id")
+
+    with TestClient(create_app()) as client:
+        response = client.post("/webhooks/newstore/", json=data)
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.json()["queued"] is True
+
+
+@pytest.mark.asyncio
+async def test_queue_worker_drops_invalid_event() -> None:
+    """Test that the worker validates the full event and drops it when invalid."""
+    sample_file = Path(__file__).parent.parent.parent.parent / "newstore_sample_payload.json"
+    with open(sample_file, "r") as f:
+        data = json.load(f)
+    data["payload"]["items"][0].pop("product_id")
+    body = json.dumps(data).encode()
+    queued = QueuedEvent.from_json(body, NewStoreEventEnvelope.model_validate_json(body))
+
+    settings = Settings(hail_api_base_url="mock")
+    hail_client = HailClient(settings)
+    processor = QueueProcessor(InMemoryQueue(), settings, hail_client)
+    metrics.reset()
+
+    with patch.object(hail_client, "send_transaction") as send_transaction:
+        await processor.process_event(queued)
+
+    send_transaction.assert_not_called()
+    assert metrics.counters['queue_invalid_events_total{tenant="newlook"}'] == 1
+
+
+def test_queued_webhook_rejects_invalid_envelope(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that events without items or an order ID are still rejected before queueing."""
+    monkeypatch.setenv("EYOS_QUEUE_ENABLED", "true")
+    sample_file = Path(__file__).parent.parent.parent.parent / "newstore_sample_payload.json"
+    with open(sample_file, "r") as f:
+        data = json.load(f)
+
+    with TestClient(create_app()) as client:
+        data["payload"]["items"] = []
+        assert client.post("/webhooks/newstore/", json=data).status_code == status.HTTP_400_BAD_REQUEST
+
+        del data["payload"]["id"]
+        assert client.post("/webhooks/newstore/", json=data).status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_webhook_requires_signature(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the webhook endpoint checks the signature of the raw body."""
+    monkeypatch.setenv("EYOS_NEWSTORE_WEBHOOK_SECRET", "test_secret")
+    sample_file = Path(__file__).parent.parent.parent.parent / "newstore_sample_payload.json"
+    body = sample_file.read_bytes()
+    signature = base64.b64encode(hmac.new(b"test_secret", body, hashlib.sha256).digest()).decode()
+
+    with TestClient(create_app()) as client:
+        response = client.post("/webhooks/newstore/", content=body)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        response = client.post("/webhooks/newstore/", content=body, headers={"X-NewStore-Signature": signature})
+        assert response.status_code == status.HTTP_202_ACCEPTED
+
+
+@pytest.mark.parametrize("queue_enabled", ["true", "false"])
+@pytest.mark.parametrize("body", [b"not json", b"[1, 2]", b'"order"', b'{"tenant": "newlook"'])
+def test_webhook_rejects_malformed_body(monkeypatch: pytest.MonkeyPatch, queue_enabled: str, body: bytes) -> None:
+    """Test that bodies that are not a JSON object are answered 400 by both routes, queued or not."""
+    monkeypatch.setenv("EYOS_QUEUE_ENABLED", queue_enabled)
+    monkeypatch.setenv("EYOS_NEWSTORE_WEBHOOK_SECRET", "test_secret")
+    signature = base64.b64encode(hmac.new(b"test_secret", body, hashlib.sha256).digest()).decode()
+
+    with TestClient(create_app()) as client:
+        routes: List[Tuple[str, Dict[str, str]]] = [
+            ("/webhooks/newstore/", {"X-NewStore-Signature": signature}),
+            ("/webhooks/newstore/simulate", {}),
+        ]
+        for route, headers in routes:
+            response = client.post(route, content=body, headers=headers)
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+            assert response.json()["message"] == "Validation error"
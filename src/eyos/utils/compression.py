@@ -0,0 +1,99 @@
+import gzip
+import zlib
+
+# Content-Encoding values supported for request bodies, "none" sends the body as is
+CONTENT_ENCODINGS = ("none", "gzip", "deflate", "zstd")
+
+
+def check_encoding(encoding: str) -> None:
+    """
+    Check that a content encoding is supported and its codec is installed.
+
+    Args:
+        encoding: One of CONTENT_ENCODINGS
+
+    Raises:
+        ValueError: When the encoding is unknown or zstd is not installed
+    """
+    if encoding not in CONTENT_ENCODINGS:
+        raise ValueError(f"Unsupported content encoding: {encoding}, use one of {', '.join(CONTENT_ENCODINGS)}")
+    if encoding == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError as e:
+            raise ValueError("zstd content encoding requires the 'zstandard' package") from e
+
+
+def compress(body: bytes, encoding: str, level: int = 6) -> bytes:
+    """
+    Compress a body for the given Content-Encoding.
+
+    Args:
+        body: The uncompressed body
+        encoding: One of CONTENT_ENCODINGS
+        level: Compression level of the codec
+
+    Returns:
+        The encoded body
+    """
+    if encoding == "gzip":
+        # mtime=0 keeps the output identical for identical bodies
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == "deflate":
+        # HTTP deflate is the zlib format (RFC 1950), not a raw deflate stream
+        return zlib.compress(body, level)
+    if encoding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=level).compress(body)  # type: ignore[no-any-return]
+    return body
+
+
+def decompress(body: bytes, encoding: str, max_size: int) -> bytes:
+    """
+    Decode a body received with the given Content-Encoding.
+
+    Args:
+        body: The encoded body
+        encoding: The Content-Encoding header value, empty or "identity" for none
+        max_size: Largest decoded size accepted, protecting against decompression bombs
+
+    Returns:
+        The decoded body
+
+    Raises:
+        ValueError: When the encoding is unsupported, the body is corrupt or decodes to more than max_size bytes
+    """
+    encoding = encoding.strip().lower()
+    if encoding in ("", "identity", "none"):
+        return body
+
+    if encoding == "gzip":
+        decoder = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+    elif encoding == "deflate":
+        decoder = zlib.decompressobj()
+    elif encoding == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ValueError("Unsupported content encoding: zstd") from e
+        try:
+            with zstandard.ZstdDecompressor().stream_reader(body) as reader:
+                decoded = reader.read(max_size + 1)
+        except zstandard.ZstdError as e:
+            raise ValueError(f"Corrupt zstd body: {e}") from e
+        if len(decoded) > max_size:
+            raise ValueError(f"Decoded body exceeds {max_size} bytes")
+        return decoded  # type: ignore[no-any-return]
+    else:
+        raise ValueError(f"Unsupported content encoding: {encoding}")
+
+    try:
+        decoded = decoder.decompress(body, max_size + 1)
+    except zlib.error as e:
+        raise ValueError(f"Corrupt {encoding} body: {e}") from e
+    if len(decoded) > max_size:
+        raise ValueError(f"Decoded body exceeds {max_size} bytes")
+    if not decoder.eof or decoder.unused_data:
+        raise ValueError(f"Truncated or trailing data in {encoding} body")
+    return decoded
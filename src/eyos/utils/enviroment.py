@@ -7,13 +7,21 @@ from zoneinfo import ZoneInfo
 
 @functools.cache
 def get_latest_tag() -> str:
-    import subprocess
+    """
+    Version of the running code, without shelling out to `git`.
+
+    The tag is baked into the image as `GIT_TAG`, like `GIT_COMMIT_HASH`. Locally
+    the version of the installed package is used instead.
+    """
+    if "GIT_TAG" in os.environ:
+        return os.environ["GIT_TAG"]
+
+    from importlib.metadata import PackageNotFoundError, version
 
-    command = ["git", "describe", "--tags", "--abbrev=0"]
-    completed_process = subprocess.run(command, stdout=subprocess.PIPE)
-    if completed_process.returncode != 0:
+    try:
+        return version("eyos")
+    except PackageNotFoundError:
         return "unknown"
-    return completed_process.stdout.decode().strip()
 
 
 @functools.cache
@@ -1,8 +1,14 @@
+import atexit
+import copy
+import itertools
 import json
 import logging
 import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +36,7 @@ def load_sample_data(filename: str) -> Dict[str, Any]:
             data: Dict[str, Any] = json.load(f)
             return data
     except Exception as e:
-        logger.error(f"Error loading sample data from {filename}: {e!s}")
+        logger.error("Error loading sample data from %s: %s", filename, e)
         raise
 
 
@@ -56,29 +62,169 @@ def set_log_level(log_level: str = "info") -> None:
     logging.getLogger("httpx").setLevel(logging.WARNING)
 
 
-def configure_logging(log_level: str = "INFO") -> None:
+class JsonFormatter(logging.Formatter):
+    """Render log records as single-line JSON documents."""
+
+    # Attributes present on every LogRecord; anything else was passed via `extra=`
+    RESERVED_ATTRS = frozenset(
+        vars(logging.LogRecord("", 0, "", 0, "", None, None)).keys() | {"message", "asctime", "taskName"}
+    )
+
+    def format(self, record: logging.LogRecord) -> str:
+        document: Dict[str, Any] = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in self.RESERVED_ATTRS and not key.startswith("_"):
+                document[key] = value
+        if record.exc_info:
+            document["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            document["exc_info"] = record.exc_text
+        return json.dumps(document, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of the INFO-and-below records of selected loggers.
+
+    Rates are matched against the record's logger name and its parents, so a rate
+    configured for `eyos.services` also applies to `eyos.services.queue_processor`.
+    Warnings and errors are never sampled.
+    """
+
+    def __init__(self, sample_rates: Dict[str, float]) -> None:
+        super().__init__()
+        self.intervals = {name: max(1, round(1 / rate)) for name, rate in sample_rates.items() if rate > 0}
+        self.dropped = {name for name, rate in sample_rates.items() if rate <= 0}
+        self.counters: Dict[str, Iterator[int]] = {}
+
+    def _interval_for(self, name: str) -> Optional[int]:
+        while name:
+            if name in self.dropped:
+                return 0
+            if name in self.intervals:
+                return self.intervals[name]
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+
+        interval = self._interval_for(record.name)
+        if interval is None:
+            return True
+        if interval == 0:
+            return False
+
+        counter = self.counters.setdefault(record.name, itertools.count())
+        return next(counter) % interval == 0
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves the formatting of records to the listener thread.
+
+    `%`-style args are merged into the message on the calling thread, so a
+    mutable argument changed after the logging call is still logged as it was,
+    and a traceback is rendered to text so its frames are not kept alive
+    until the listener gets to the record. Unlike the stock
+    `QueueHandler.prepare`, the record is not formatted with the handler's
+    formatter: the JSON document is built off the event loop.
     """
-    Configure logging for the application.
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_log_listener: Optional[QueueListener] = None
+
+
+def configure_logging(
+    log_level: str = "INFO",
+    log_format: str = "json",
+    sample_rates: Optional[Dict[str, float]] = None,
+) -> QueueListener:
+    """
+    Configure non-blocking logging for the application.
+
+    Records are put on an in-process queue by the logging call and written to
+    stdout by a background `QueueListener` thread, so the event loop never blocks
+    on I/O or rendering records. Calling this again replaces the previous setup.
 
     Args:
         log_level: The log level to use
+        log_format: Either "json" for structured output or "text"
+        sample_rates: Fraction of INFO records to keep, keyed by logger name
+
+    Returns:
+        The running queue listener
     """
+    global _log_listener
+
     numeric_level = getattr(logging, log_level.upper(), None)
     if not isinstance(numeric_level, int):
         raise ValueError(f"Invalid log level: {log_level}")
 
-    logging.basicConfig(
-        level=numeric_level,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    )
+    formatter: logging.Formatter
+    if log_format == "json":
+        formatter = JsonFormatter()
+    elif log_format == "text":
+        formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    else:
+        raise ValueError(f"Invalid log format: {log_format}")
+
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    if sample_rates:
+        queue_handler.addFilter(SamplingFilter(sample_rates))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(numeric_level)
+
+    _log_listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _log_listener.start()
 
     # Set the level for specific loggers
+    logging.getLogger("eyos").setLevel(numeric_level)
     logging.getLogger("uvicorn").setLevel(numeric_level)
     logging.getLogger("fastapi").setLevel(numeric_level)
 
     # Set a higher level for noisy libraries
     logging.getLogger("httpx").setLevel(logging.WARNING)
 
+    return _log_listener
+
+
+@atexit.register
+def _stop_log_listener() -> None:
+    """Flush queued log records on interpreter shutdown."""
+    global _log_listener
+
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
 
 def format_currency(amount: float, currency: str = "GBP") -> str:
     """
@@ -0,0 +1,389 @@
+import codecs
+import json
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Type
+
+from pydantic import BaseModel
+
+# Kinds of JSON values told apart by the schema checks. Scalars are not told apart,
+# pydantic coerces between strings, numbers and booleans in lax mode.
+OBJECT, ARRAY, SCALAR, NULL = "object", "array", "scalar", "null"
+
+_SCHEMA_KINDS = {
+    "object": OBJECT,
+    "array": ARRAY,
+    "string": SCALAR,
+    "number": SCALAR,
+    "integer": SCALAR,
+    "boolean": SCALAR,
+    "null": NULL,
+}
+
+# Longest number or key kept while it is split across chunks
+_MAX_TOKEN_SIZE = 1024
+
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+# Characters and complete escapes of a string, up to its closing quote or an incomplete escape
+_STRING_BODY = re.compile(rb'(?:[^"\\\x00-\x1f]|\\["\\/bfnrt]|\\u[0-9a-fA-F]{4})*')
+_PARTIAL_ESCAPE = re.compile(rb"\\(?:u[0-9a-fA-F]{0,3})?\Z")
+_NUMBER_CHARS = re.compile(rb"[-+.0-9eE]*")
+# One complete token after optional whitespace: punctuation, a string, a scalar or null.
+# Non-finite floats are accepted by pydantic's JSON parser.
+_TOKEN = re.compile(
+    rb"[ \t\n\r]*(?:"
+    rb"([{}\[\],:])"
+    rb'|"((?:[^"\\\x00-\x1f]|\\["\\/bfnrt]|\\u[0-9a-fA-F]{4})*)"'
+    rb"|(-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?(?![-+.0-9eE])|true|false|NaN|-?Infinity)"
+    rb"|(null))"
+)
+_PUNCTUATION, _STRING, _SCALAR, _NULL = 1, 2, 3, 4
+_LITERALS = {ord(text[:1]): text for text in (b"true", b"false", b"null", b"NaN", b"Infinity")}
+
+# What the parser expects next
+_VALUE, _FIRST_VALUE, _FIRST_KEY, _KEY, _COLON, _NEXT, _END = range(7)
+
+
+@dataclass
+class SchemaNode:
+    """The kinds of value allowed at a place of a document, and the nodes of its fields and items."""
+
+    kinds: FrozenSet[str]
+    properties: Dict[str, Optional["SchemaNode"]] = field(default_factory=dict)
+    required: FrozenSet[str] = frozenset()
+    items: Optional["SchemaNode"] = None
+
+    @classmethod
+    def from_json_schema(cls, schema: Dict[str, Any], definitions: Dict[str, Any]) -> Optional["SchemaNode"]:
+        """
+        Compile a JSON schema into nodes.
+
+        Args:
+            schema: The schema, or one of its subschemas
+            definitions: The `$defs` the schema refers to
+
+        Returns:
+            The node, None where any value is allowed
+        """
+        if "$ref" in schema:
+            return cls.from_json_schema(definitions[schema["$ref"].rsplit("/", 1)[-1]], definitions)
+        alternatives = schema.get("anyOf") or schema.get("oneOf") or schema.get("allOf")
+        if alternatives:
+            nodes = [cls.from_json_schema(alternative, definitions) for alternative in alternatives]
+            if any(node is None for node in nodes):
+                return None
+            merged = cls(kinds=frozenset().union(*(node.kinds for node in nodes if node)))
+            for node in nodes:
+                if node and OBJECT in node.kinds and not merged.properties:
+                    merged.properties, merged.required = node.properties, node.required
+                if node and ARRAY in node.kinds and merged.items is None:
+                    merged.items = node.items
+            return merged
+
+        types = schema.get("type")
+        if types is None:
+            return None
+        kinds = frozenset(_SCHEMA_KINDS[name] for name in ([types] if isinstance(types, str) else types))
+        node = cls(kinds=kinds)
+        if OBJECT in kinds:
+            node.properties = {
+                name: cls.from_json_schema(subschema, definitions)
+                for name, subschema in schema.get("properties", {}).items()
+            }
+            node.required = frozenset(schema.get("required", ()))
+        if ARRAY in kinds and isinstance(schema.get("items"), dict):
+            node.items = cls.from_json_schema(schema["items"], definitions)
+        return node
+
+
+@lru_cache(maxsize=None)
+def schema_for_model(model: Type[BaseModel]) -> Optional[SchemaNode]:
+    """Compile the JSON schema of a model, once per model."""
+    schema = model.model_json_schema()
+    return SchemaNode.from_json_schema(schema, schema.get("$defs", {}))
+
+
+class JSONStreamError(ValueError):
+    """Raised when a streamed document is malformed, too deep or does not match its schema."""
+
+    def __init__(self, message: str, offset: int) -> None:
+        super().__init__(f"{message} at byte {offset}")
+        self.offset = offset
+
+
+class _Frame:
+    """An object or array being parsed."""
+
+    __slots__ = ("index", "is_object", "key", "node", "seen")
+
+    def __init__(self, is_object: bool, node: Optional[SchemaNode]) -> None:
+        self.is_object = is_object
+        self.node = node
+        self.key: Optional[str] = None
+        self.index = 0
+        self.seen: Optional[Set[str]] = set() if node is not None and node.required else None
+
+
+class JSONStreamValidator:
+    """
+    Check a JSON document incrementally, as its chunks arrive.
+
+    Only the parser state is kept, values are skipped as they are scanned, so
+    memory stays constant whatever the size of the document, and the first
+    syntax error, excessive nesting or value of the wrong kind for the schema
+    aborts the read. The document is not built, pydantic still validates it in
+    full once it is complete.
+    """
+
+    def __init__(self, schema: Optional[SchemaNode] = None, max_depth: int = 32) -> None:
+        """
+        Initialize the parser.
+
+        Args:
+            schema: Node of the document root, None to only check the syntax
+            max_depth: Deepest nesting of objects and arrays allowed
+        """
+        self.max_depth = max_depth
+        self._stack: List[_Frame] = []
+        self._state = _VALUE
+        self._value_node = schema
+        # Bytes of a token split across chunks, and their offset in the document
+        self._pending = b""
+        self._offset = 0
+        self._in_string = False
+        self._key_parts: Optional[List[bytes]] = None
+        # Checks the encoding, characters split across chunks included
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+
+    def feed(self, chunk: bytes) -> None:
+        """
+        Parse the next chunk of the document.
+
+        Args:
+            chunk: The bytes following the previous chunk
+
+        Raises:
+            JSONStreamError: When the document cannot be valid
+        """
+        self._check_encoding(chunk, final=False)
+        self._parse(self._pending + chunk if self._pending else chunk, final=False)
+
+    def close(self) -> None:
+        """
+        Check that the document is complete.
+
+        Raises:
+            JSONStreamError: When the document ends early
+        """
+        self._check_encoding(b"", final=True)
+        self._parse(self._pending, final=True)
+        if self._in_string or self._state != _END:
+            raise JSONStreamError("Unexpected end of document", self._offset)
+
+    def _check_encoding(self, chunk: bytes, final: bool) -> None:
+        try:
+            self._utf8.decode(chunk, final)
+        except UnicodeDecodeError as e:
+            raise self._error("Invalid UTF-8", len(self._pending) + e.start) from e
+
+    def _error(self, message: str, position: int) -> JSONStreamError:
+        return JSONStreamError(message, self._offset + position)
+
+    def _path(self, depth: Optional[int] = None) -> str:
+        """Get the path of the value being parsed, or of the container at a depth."""
+        parts = ["$"]
+        for frame in self._stack[:depth]:
+            parts.append(f".{frame.key}" if frame.is_object else f"[{frame.index}]")
+        return "".join(parts)
+
+    def _start_value(self, kind: str, position: int) -> Optional[SchemaNode]:
+        """Check the kind of the value starting at a position, returning its node."""
+        node = self._value_node
+        if node is not None and kind not in node.kinds:
+            expected = " or ".join(sorted(node.kinds))
+            raise self._error(f"{self._path()} should be {expected}, not {kind}", position)
+        return node
+
+    def _end_value(self) -> None:
+        self._state = _NEXT if self._stack else _END
+
+    def _parse(self, data: bytes, final: bool) -> None:
+        position, size = 0, len(data)
+        self._pending = b""
+        match_token = _TOKEN.match
+        try:
+            while True:
+                if self._in_string:
+                    position = self._scan_string(data, position, final)
+                    if self._in_string:
+                        return
+
+                match = match_token(data, position)
+                if match is None or (match.lastindex == _SCALAR and match.end() == size and not final):
+                    # A token split across chunks, a string longer than the chunk, or an error
+                    position = _WHITESPACE.match(data, position).end()  # type: ignore[union-attr]
+                    if position >= size:
+                        return
+                    position = self._partial_token(data, position, final)
+                    if position < 0:
+                        return
+                    continue
+
+                # Every alternative of the token pattern is a group
+                group = match.lastindex or 0
+                start = match.start(group)
+                position = match.end()
+                if group == _PUNCTUATION:
+                    self._punctuation(data[start], start)
+                elif group == _STRING:
+                    if self._state == _FIRST_KEY or self._state == _KEY:
+                        self._set_key(match.group(group), start)
+                    else:
+                        self._scalar(SCALAR, start)
+                else:
+                    self._scalar(SCALAR if group == _SCALAR else NULL, start)
+        finally:
+            self._offset += position if not self._pending else size - len(self._pending)
+
+    def _unexpected(self, position: int) -> JSONStreamError:
+        state = self._state
+        if state == _COLON:
+            return self._error("Expected ':'", position)
+        if state == _NEXT:
+            container = "object" if self._stack[-1].is_object else "array"
+            return self._error(f"Expected ',' or the end of the {container}", position)
+        if state == _FIRST_KEY or state == _KEY:
+            return self._error("Expected a field name", position)
+        if state == _END:
+            return self._error("Unexpected data after the document", position)
+        return self._error("Invalid value", position)
+
+    def _scalar(self, kind: str, position: int) -> None:
+        if self._state != _VALUE and self._state != _FIRST_VALUE:
+            raise self._unexpected(position)
+        self._start_value(kind, position)
+        self._end_value()
+
+    def _punctuation(self, char: int, position: int) -> None:
+        state = self._state
+        if char == 44:  # ,
+            if state != _NEXT:
+                raise self._unexpected(position)
+            frame = self._stack[-1]
+            if frame.is_object:
+                self._state = _KEY
+            else:
+                frame.index += 1
+                self._value_node = frame.node.items if frame.node is not None else None
+                self._state = _VALUE
+        elif char == 58:  # :
+            if state != _COLON:
+                raise self._unexpected(position)
+            self._state = _VALUE
+        elif char == 123 or char == 91:  # { or [
+            if state != _VALUE and state != _FIRST_VALUE:
+                raise self._unexpected(position)
+            is_object = char == 123
+            node = self._start_value(OBJECT if is_object else ARRAY, position)
+            if len(self._stack) >= self.max_depth:
+                raise self._error(f"Nesting deeper than {self.max_depth} levels", position)
+            self._stack.append(_Frame(is_object, node))
+            if is_object:
+                self._state = _FIRST_KEY
+            else:
+                self._value_node = node.items if node is not None else None
+                self._state = _FIRST_VALUE
+        else:  # } or ]
+            is_object = char == 125
+            if not (
+                (state == _NEXT and self._stack[-1].is_object == is_object)
+                or state == (_FIRST_KEY if is_object else _FIRST_VALUE)
+            ):
+                raise self._unexpected(position)
+            self._close(self._stack[-1], position + 1)
+
+    def _partial_token(self, data: bytes, position: int, final: bool) -> int:
+        """
+        Start a token the token pattern did not match whole.
+
+        Returns:
+            The position after the start of a long string, or -1 when the token is kept for the next chunk
+        """
+        char = data[position]
+        state = self._state
+        if char == 34:  # "
+            if state == _FIRST_KEY or state == _KEY:
+                self._key_parts = []
+            elif state == _VALUE or state == _FIRST_VALUE:
+                self._start_value(SCALAR, position)
+                self._key_parts = None
+            else:
+                raise self._unexpected(position)
+            self._in_string = True
+            return position + 1
+
+        if state != _VALUE and state != _FIRST_VALUE:
+            raise self._unexpected(position)
+        if char == 45 or 48 <= char <= 57:  # - or a digit
+            end = _NUMBER_CHARS.match(data, position).end()  # type: ignore[union-attr]
+            if end == position + 1 and data[end:end + 1] == b"I":
+                char = 73  # -Infinity
+            elif end == len(data) and not final:
+                return self._keep(data, position)
+            else:
+                raise self._error("Invalid number", position)
+        literal = _LITERALS.get(char)
+        if literal is not None and not final and literal.startswith(data[position:].lstrip(b"-")):
+            return self._keep(data, position)
+        raise self._error("Invalid value", position)
+
+    def _keep(self, data: bytes, position: int) -> int:
+        """Keep an incomplete token for the next chunk."""
+        if len(data) - position > _MAX_TOKEN_SIZE:
+            raise self._error("Token too long", position)
+        self._pending = data[position:]
+        return -1
+
+    def _scan_string(self, data: bytes, position: int, final: bool) -> int:
+        """Skip the characters of a string, collecting them when it is a field name."""
+        end = _STRING_BODY.match(data, position).end()  # type: ignore[union-attr]
+        if self._key_parts is not None and sum(map(len, self._key_parts)) < _MAX_TOKEN_SIZE:
+            self._key_parts.append(data[position:end])
+
+        if end < len(data) and data[end] == 34:  # "
+            self._in_string = False
+            if self._key_parts is not None:
+                self._set_key(b"".join(self._key_parts), end)
+                self._key_parts = None
+            else:
+                self._end_value()
+            return end + 1
+
+        rest = data[end:]
+        if end < len(data) and (final or not _PARTIAL_ESCAPE.match(rest)):
+            raise self._error("Invalid character in string", end)
+        if rest and not final:
+            # An escape split across chunks
+            self._pending = rest
+        return len(data)
+
+    def _set_key(self, raw: bytes, position: int) -> None:
+        frame = self._stack[-1]
+        try:
+            key = raw.decode() if b"\\" not in raw else json.loads(b'"' + raw + b'"')
+        except ValueError as e:
+            raise self._error("Invalid field name", position) from e
+        frame.key = key
+        if frame.seen is not None:
+            frame.seen.add(key)
+        self._value_node = frame.node.properties.get(key) if frame.node is not None else None
+        self._state = _COLON
+
+    def _close(self, frame: _Frame, position: int) -> None:
+        if frame.seen is not None and frame.node is not None:
+            missing = frame.node.required - frame.seen
+            if missing:
+                raise self._error(f"{self._path(-1)} is missing {', '.join(sorted(missing))}", position)
+        self._stack.pop()
+        self._end_value()